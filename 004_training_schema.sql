@@ -187,6 +187,10 @@ CREATE TABLE training.faculty_members (
 
 CREATE INDEX idx_fm_email ON training.faculty_members (email) WHERE email IS NOT NULL;
 
+-- Upsert key for the FacultyList loads: the export has no item id
+-- (source_id is the row's position), so members are matched by e-mail
+CREATE UNIQUE INDEX idx_fm_email_key ON training.faculty_members (LOWER(email));
+
 CREATE TRIGGER trg_fm_updated
     BEFORE UPDATE ON training.faculty_members
     FOR EACH ROW EXECUTE FUNCTION system.set_updated_at();
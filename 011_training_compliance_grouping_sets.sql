@@ -0,0 +1,187 @@
+-- ============================================================================
+-- Migration 011: Training Compliance Refresh (GROUPING SETS)
+-- REdI Data Platform
+-- ============================================================================
+-- Rewrites agg.refresh_training_compliance() around one scan of the snapshot:
+-- org-unit, directorate, job-family and facility-wide rows come from a single
+-- GROUPING SETS aggregate, and agg.training_compliance_tracking_group is
+-- filled from the same scan.
+--
+-- agg.training_compliance gains grouping_level so the new directorate and
+-- job-family rows (org_unit_id NULL) are not mistaken for facility-wide
+-- totals. Dashboards selecting facility-wide rows must now filter on
+-- grouping_level = 'facility' rather than org_unit_id IS NULL.
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- TRAINING COMPLIANCE: grouping level
+-- ============================================================================
+ALTER TABLE agg.training_compliance
+    ADD COLUMN grouping_level VARCHAR(20);
+
+-- Existing rows were written as org unit × stream or facility × stream
+UPDATE agg.training_compliance
+SET grouping_level = CASE WHEN org_unit_id IS NULL THEN 'facility' ELSE 'org_unit' END;
+
+ALTER TABLE agg.training_compliance
+    ALTER COLUMN grouping_level SET NOT NULL,
+    ADD CONSTRAINT chk_agg_tc_grouping_level
+        CHECK (grouping_level IN ('org_unit', 'directorate', 'job_family', 'facility'));
+
+COMMENT ON COLUMN agg.training_compliance.grouping_level IS
+    'org_unit | directorate | job_family | facility — which columns the row is grouped by; NULL columns outside that set mean "all"';
+
+DROP INDEX agg.idx_agg_tc_unique;
+
+CREATE UNIQUE INDEX idx_agg_tc_unique
+    ON agg.training_compliance (
+        snapshot_date, certification_type, grouping_level,
+        COALESCE(org_unit_id, 0),
+        COALESCE(directorate, '__ALL__'),
+        COALESCE(discipline_stream_code, '__ALL__'),
+        COALESCE(job_family_code, '__ALL__')
+    );
+
+CREATE INDEX idx_agg_tc_level_date
+    ON agg.training_compliance (grouping_level, certification_type, snapshot_date DESC);
+
+-- ============================================================================
+-- TRAINING COMPLIANCE (by tracking group): uniqueness
+-- ============================================================================
+CREATE UNIQUE INDEX idx_agg_tctg_unique
+    ON agg.training_compliance_tracking_group (
+        snapshot_date, certification_type, tracking_group_id,
+        COALESCE(discipline_stream_code, '__ALL__')
+    );
+
+CREATE INDEX idx_agg_tctg_group
+    ON agg.training_compliance_tracking_group (tracking_group_id, snapshot_date DESC);
+
+-- ============================================================================
+-- FUNCTIONS: Aggregation
+-- ============================================================================
+
+-- Refresh training compliance aggregates for a given snapshot.
+-- One pass over training.staff_certifications for the snapshot produces:
+--   org_unit     org unit (+ directorate) × stream
+--   directorate  directorate × stream
+--   job_family   job family × stream
+--   facility     stream, and all streams
+--   tracking group × stream, and all streams (separate table)
+-- Staff with no discipline stream are counted under 'other' (the
+-- system.map_discipline_stream() fallback), so a NULL stream always means
+-- "all streams".
+CREATE OR REPLACE FUNCTION agg.refresh_training_compliance(p_snapshot_id INT)
+RETURNS VOID AS $$
+DECLARE
+    v_cert_type VARCHAR(10);
+    v_snap_date DATE;
+    v_rows      INT;
+    v_tg_rows   INT;
+BEGIN
+    -- Get snapshot metadata
+    SELECT certification_type, snapshot_date
+    INTO v_cert_type, v_snap_date
+    FROM training.certification_snapshots
+    WHERE id = p_snapshot_id;
+
+    IF v_snap_date IS NULL THEN
+        RAISE EXCEPTION 'Certification snapshot % not found', p_snapshot_id;
+    END IF;
+
+    -- Delete existing aggregates for this snapshot date + type
+    DELETE FROM agg.training_compliance
+    WHERE snapshot_date = v_snap_date AND certification_type = v_cert_type;
+
+    DELETE FROM agg.training_compliance_tracking_group
+    WHERE snapshot_date = v_snap_date AND certification_type = v_cert_type;
+
+    WITH certs AS MATERIALIZED (
+        -- WHY: MATERIALIZED so both aggregates below read one scan of the
+        -- snapshot instead of re-joining core.staff and the lookup each time
+        SELECT
+            sc.org_unit_id,
+            ou.directorate,
+            COALESCE(s.discipline_stream_code, 'other') AS discipline_stream_code,
+            sc.job_family_code,
+            sc.status_code,
+            lcs.is_compliant
+        FROM training.staff_certifications sc
+        JOIN core.staff s ON s.id = sc.staff_id
+        LEFT JOIN core.org_units ou ON ou.id = sc.org_unit_id
+        LEFT JOIN system.lookup_certification_status lcs ON lcs.code = sc.status_code
+        WHERE sc.snapshot_id = p_snapshot_id
+    ),
+    tracking_group_rows AS (
+        INSERT INTO agg.training_compliance_tracking_group (
+            snapshot_date, certification_type, tracking_group_id,
+            discipline_stream_code,
+            total_staff, compliant_count, non_compliant_count, compliance_pct
+        )
+        SELECT
+            v_snap_date,
+            v_cert_type,
+            tgm.tracking_group_id,
+            c.discipline_stream_code,
+            COUNT(*),
+            COUNT(*) FILTER (WHERE c.is_compliant),
+            COUNT(*) FILTER (WHERE NOT c.is_compliant),
+            ROUND(100.0 * COUNT(*) FILTER (WHERE c.is_compliant) / NULLIF(COUNT(*), 0), 2)
+        FROM certs c
+        JOIN core.tracking_group_members tgm ON tgm.org_unit_id = c.org_unit_id
+        JOIN core.tracking_groups tg ON tg.id = tgm.tracking_group_id AND tg.is_active
+        GROUP BY tgm.tracking_group_id, ROLLUP (c.discipline_stream_code)
+        RETURNING 1
+    )
+    INSERT INTO agg.training_compliance (
+        snapshot_date, certification_type, grouping_level,
+        org_unit_id, directorate, discipline_stream_code, job_family_code,
+        total_staff, compliant_count, non_compliant_count, compliance_pct,
+        status_acquired, status_overdue, status_assigned,
+        status_expired, status_in_progress, status_not_assigned
+    )
+    SELECT
+        v_snap_date,
+        v_cert_type,
+        CASE
+            WHEN GROUPING(org_unit_id) = 0 THEN 'org_unit'
+            WHEN GROUPING(directorate) = 0 THEN 'directorate'
+            WHEN GROUPING(job_family_code) = 0 THEN 'job_family'
+            ELSE 'facility'
+        END,
+        org_unit_id,
+        directorate,
+        discipline_stream_code,
+        job_family_code,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE is_compliant),
+        COUNT(*) FILTER (WHERE NOT is_compliant),
+        ROUND(100.0 * COUNT(*) FILTER (WHERE is_compliant) / NULLIF(COUNT(*), 0), 2),
+        COUNT(*) FILTER (WHERE status_code = 'acquired'),
+        COUNT(*) FILTER (WHERE status_code = 'overdue'),
+        COUNT(*) FILTER (WHERE status_code = 'assigned'),
+        COUNT(*) FILTER (WHERE status_code = 'expired'),
+        COUNT(*) FILTER (WHERE status_code = 'in_progress'),
+        COUNT(*) FILTER (WHERE status_code = 'not_assigned')
+    FROM certs
+    GROUP BY GROUPING SETS (
+        (org_unit_id, directorate, discipline_stream_code),
+        (directorate, discipline_stream_code),
+        (job_family_code, discipline_stream_code),
+        (discipline_stream_code),
+        ()
+    );
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    SELECT COUNT(*) INTO v_tg_rows
+    FROM agg.training_compliance_tracking_group
+    WHERE snapshot_date = v_snap_date AND certification_type = v_cert_type;
+
+    RAISE NOTICE 'Refreshed training compliance aggregates for % snapshot %: % rows, % tracking group rows',
+        v_cert_type, v_snap_date, v_rows, v_tg_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
@@ -0,0 +1,206 @@
+-- ============================================================================
+-- Migration 012: Incremental Escalation Daily Refresh
+-- REdI Data Platform
+-- ============================================================================
+-- The pager pipeline refreshes agg.escalation_daily every 15 minutes for
+-- ~50 new events. Instead of deleting and regrouping whole days, the
+-- incremental refresh groups only events above a high-water mark
+-- (escalation.events.id) and adds their counts to the existing rows.
+--
+-- agg.refresh_escalation_daily(start, end) remains the full-range rebuild
+-- for corrections (manual re-classification, deleted events). Both take the
+-- watermark row lock, so they never run concurrently and never count an
+-- event twice.
+--
+-- Event ids are handed out at INSERT, not at COMMIT: a batch that commits
+-- after a later one would sit below a watermark already moved past it and
+-- never be counted. Every writer of escalation.events therefore calls
+-- escalation.lock_event_load() before inserting, in the same transaction,
+-- which holds the watermark lock until it commits.
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- AGGREGATE WATERMARKS
+-- ============================================================================
+-- Last source row folded into an incrementally maintained aggregate.
+-- ============================================================================
+CREATE TABLE system.aggregate_watermarks (
+    aggregate_name      VARCHAR(50) PRIMARY KEY,
+    last_source_id      BIGINT NOT NULL DEFAULT 0,
+    last_refreshed_at   TIMESTAMPTZ,
+    last_row_count      INT
+);
+
+COMMENT ON TABLE system.aggregate_watermarks IS 'High-water marks for incrementally refreshed agg.* tables';
+COMMENT ON COLUMN system.aggregate_watermarks.last_source_id IS 'Highest source row id already counted in the aggregate';
+
+-- ============================================================================
+-- ESCALATION DAILY: grouping level + upsert key
+-- ============================================================================
+ALTER TABLE agg.escalation_daily
+    ADD COLUMN grouping_level VARCHAR(20);
+
+-- Existing rows: the type total for a (date, type) is the one inserted after
+-- its detail rows, with no ward/unit/period.
+UPDATE agg.escalation_daily d
+SET grouping_level = CASE WHEN d.id = t.total_id THEN 'event_type' ELSE 'detail' END
+FROM (
+    SELECT event_date, event_type_code,
+           MAX(id) FILTER (WHERE ward_id IS NULL AND admitting_unit_id IS NULL
+                             AND time_of_day_code IS NULL) AS total_id
+    FROM agg.escalation_daily
+    GROUP BY event_date, event_type_code
+) t
+WHERE t.event_date = d.event_date
+  AND t.event_type_code IS NOT DISTINCT FROM d.event_type_code;
+
+ALTER TABLE agg.escalation_daily
+    ALTER COLUMN grouping_level SET NOT NULL,
+    ADD CONSTRAINT chk_agg_esc_grouping_level
+        CHECK (grouping_level IN ('detail', 'event_type'));
+
+COMMENT ON COLUMN agg.escalation_daily.grouping_level IS
+    'detail = type × ward × unit × weekday × period; event_type = daily total per type';
+
+-- WHY: NULLS NOT DISTINCT so ON CONFLICT matches rows with NULL ward, unit
+-- or period without COALESCE expressions in the conflict target
+CREATE UNIQUE INDEX idx_agg_esc_unique
+    ON agg.escalation_daily (
+        event_date, grouping_level, event_type_code,
+        ward_id, admitting_unit_id, weekday, time_of_day_code
+    ) NULLS NOT DISTINCT;
+
+-- ============================================================================
+-- FUNCTIONS: Aggregation
+-- ============================================================================
+
+-- Serialise an escalation.events load with the watermark: call before the
+-- INSERT, in the loading transaction. The row lock is held until commit, so
+-- no refresh reads MAX(id) while a lower id is still uncommitted, and loads
+-- do not interleave their ids.
+CREATE OR REPLACE FUNCTION escalation.lock_event_load()
+RETURNS VOID AS $$
+BEGIN
+    PERFORM 1
+    FROM system.aggregate_watermarks
+    WHERE aggregate_name = 'escalation_daily'
+    FOR UPDATE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Fold events added since the watermark into agg.escalation_daily.
+-- Returns the number of events counted. Called by the pager pipeline after
+-- load_events; new events on any date (including late-arriving ones for
+-- earlier days) are picked up. Only correct if event loads take
+-- escalation.lock_event_load() first (see header).
+CREATE OR REPLACE FUNCTION agg.refresh_escalation_daily_incremental()
+RETURNS INT AS $$
+DECLARE
+    v_from   BIGINT;
+    v_to     BIGINT;
+    v_events INT;
+BEGIN
+    -- Lock the watermark: serialises with other refreshes of this aggregate
+    SELECT last_source_id INTO v_from
+    FROM system.aggregate_watermarks
+    WHERE aggregate_name = 'escalation_daily'
+    FOR UPDATE;
+
+    SELECT MAX(id), COUNT(*) INTO v_to, v_events
+    FROM escalation.events
+    WHERE id > v_from;
+
+    IF v_to IS NULL THEN
+        UPDATE system.aggregate_watermarks
+        SET last_refreshed_at = NOW(), last_row_count = 0
+        WHERE aggregate_name = 'escalation_daily';
+        RETURN 0;
+    END IF;
+
+    INSERT INTO agg.escalation_daily (
+        event_date, grouping_level, event_type_code, ward_id, admitting_unit_id,
+        weekday, time_of_day_code, event_count
+    )
+    SELECT
+        event_date,
+        CASE WHEN GROUPING(ward_id) = 0 THEN 'detail' ELSE 'event_type' END,
+        event_type_code,
+        ward_id,
+        admitting_unit_id,
+        CASE WHEN GROUPING(weekday) = 0 THEN weekday ELSE TO_CHAR(event_date, 'FMDay') END,
+        time_of_day_code,
+        COUNT(*)
+    FROM escalation.events
+    WHERE id > v_from AND id <= v_to
+    GROUP BY GROUPING SETS (
+        (event_date, event_type_code, ward_id, admitting_unit_id, weekday, time_of_day_code),
+        (event_date, event_type_code)
+    )
+    ON CONFLICT (event_date, grouping_level, event_type_code,
+                 ward_id, admitting_unit_id, weekday, time_of_day_code)
+    DO UPDATE SET event_count = agg.escalation_daily.event_count + EXCLUDED.event_count;
+
+    UPDATE system.aggregate_watermarks
+    SET last_source_id = v_to, last_refreshed_at = NOW(), last_row_count = v_events
+    WHERE aggregate_name = 'escalation_daily';
+
+    RETURN v_events;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Full rebuild of escalation daily aggregates for a date range.
+-- Use for corrections; routine loads use the incremental refresh. Only
+-- events at or below the watermark are counted, so events not yet folded in
+-- are left for the next incremental run.
+CREATE OR REPLACE FUNCTION agg.refresh_escalation_daily(p_start_date DATE, p_end_date DATE)
+RETURNS VOID AS $$
+DECLARE
+    v_hwm BIGINT;
+BEGIN
+    SELECT last_source_id INTO v_hwm
+    FROM system.aggregate_watermarks
+    WHERE aggregate_name = 'escalation_daily'
+    FOR UPDATE;
+
+    DELETE FROM agg.escalation_daily
+    WHERE event_date BETWEEN p_start_date AND p_end_date;
+
+    -- By type × ward × unit × time_of_day, plus daily totals by type only
+    INSERT INTO agg.escalation_daily (
+        event_date, grouping_level, event_type_code, ward_id, admitting_unit_id,
+        weekday, time_of_day_code, event_count
+    )
+    SELECT
+        event_date,
+        CASE WHEN GROUPING(ward_id) = 0 THEN 'detail' ELSE 'event_type' END,
+        event_type_code,
+        ward_id,
+        admitting_unit_id,
+        CASE WHEN GROUPING(weekday) = 0 THEN weekday ELSE TO_CHAR(event_date, 'FMDay') END,
+        time_of_day_code,
+        COUNT(*)
+    FROM escalation.events
+    WHERE event_date BETWEEN p_start_date AND p_end_date
+      AND id <= v_hwm
+    GROUP BY GROUPING SETS (
+        (event_date, event_type_code, ward_id, admitting_unit_id, weekday, time_of_day_code),
+        (event_date, event_type_code)
+    );
+
+    RAISE NOTICE 'Refreshed escalation daily aggregates for % to %', p_start_date, p_end_date;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Start the watermark at the current last event and rebuild the dates that
+-- still have granular events, so aggregates and watermark agree.
+INSERT INTO system.aggregate_watermarks (aggregate_name, last_source_id, last_refreshed_at)
+SELECT 'escalation_daily', COALESCE(MAX(id), 0), NOW()
+FROM escalation.events;
+
+SELECT agg.refresh_escalation_daily(MIN(event_date), MAX(event_date))
+FROM escalation.events
+HAVING COUNT(*) > 0;
+
+COMMIT;
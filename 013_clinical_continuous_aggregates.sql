@@ -0,0 +1,145 @@
+-- ============================================================================
+-- Migration 013: Clinical Continuous Aggregates
+-- REdI Data Platform
+-- ============================================================================
+-- Replaces the inpatient, transfers and deaths rollups with TimescaleDB
+-- continuous aggregates. Refresh policies materialise new buckets in the
+-- background; nothing in the pipeline calls a refresh function any more.
+--
+-- Raw clinical chunks are dropped after 90 days (census, transfers) or
+-- 1 year (deaths) by 009_scheduled_jobs.sql. Each refresh policy's
+-- start_offset is well inside that window, so a refresh never reaches a
+-- bucket whose raw rows have been dropped and the materialised history is
+-- kept indefinitely.
+--
+-- The continuous aggregates are created WITH NO DATA inside the
+-- transaction; the initial refresh at the end must run outside a
+-- transaction block (psql autocommit, as run_migrations.sh does).
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- INPATIENT DAILY
+-- ============================================================================
+-- Finest grain (day × ward × unit) is materialised; ward, unit and
+-- hospital-wide rows are summed from it by the agg.inpatient_daily view.
+-- LOS is kept as sum + count so averages stay exact when rolled up.
+-- ============================================================================
+
+-- Rows written by the old agg.refresh_inpatient_daily() are kept for the
+-- dates whose raw census chunks have already been dropped.
+ALTER TABLE agg.inpatient_daily RENAME TO inpatient_daily_legacy;
+
+COMMENT ON TABLE agg.inpatient_daily_legacy IS 'Pre-013 inpatient rollups; read through agg.inpatient_daily for dates before the continuous aggregate';
+
+DROP FUNCTION IF EXISTS agg.refresh_inpatient_daily(INT);
+
+CREATE MATERIALIZED VIEW agg.inpatient_census_daily
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT
+    time_bucket(INTERVAL '1 day', census_date) AS census_date,
+    ward_id,
+    admitting_unit_id,
+    COUNT(*)            AS patient_count,
+    SUM(los_days)       AS los_days_sum,
+    COUNT(los_days)     AS los_days_count
+FROM clinical.inpatient_census
+GROUP BY time_bucket(INTERVAL '1 day', census_date), ward_id, admitting_unit_id
+WITH NO DATA;
+
+SELECT add_continuous_aggregate_policy('agg.inpatient_census_daily',
+    start_offset      => INTERVAL '30 days',
+    end_offset        => INTERVAL '1 day',
+    schedule_interval => INTERVAL '1 hour');
+
+CREATE INDEX idx_agg_icd_ward ON agg.inpatient_census_daily (ward_id, census_date DESC);
+CREATE INDEX idx_agg_icd_unit ON agg.inpatient_census_daily (admitting_unit_id, census_date DESC);
+
+COMMENT ON MATERIALIZED VIEW agg.inpatient_census_daily IS 'Continuous aggregate: daily census counts by ward × admitting unit';
+
+-- Same shape as the old agg.inpatient_daily table (minus id)
+CREATE VIEW agg.inpatient_daily AS
+SELECT
+    census_date,
+    ward_id,
+    admitting_unit_id,
+    SUM(patient_count)::INT AS patient_count,
+    ROUND(SUM(los_days_sum)::NUMERIC / NULLIF(SUM(los_days_count), 0), 1) AS avg_los_days
+FROM agg.inpatient_census_daily
+GROUP BY GROUPING SETS (
+    (census_date, ward_id),             -- By ward (admitting_unit_id NULL)
+    (census_date, admitting_unit_id),   -- By unit (ward_id NULL)
+    (census_date)                       -- Hospital total
+)
+UNION ALL
+SELECT census_date, ward_id, admitting_unit_id, patient_count, avg_los_days
+FROM agg.inpatient_daily_legacy
+WHERE census_date < COALESCE((SELECT MIN(census_date) FROM agg.inpatient_census_daily), 'infinity');
+
+COMMENT ON VIEW agg.inpatient_daily IS 'Daily census by ward, by unit and hospital-wide, rolled up from agg.inpatient_census_daily';
+
+-- ============================================================================
+-- TRANSFERS DAILY
+-- ============================================================================
+-- The agg.transfers_daily table had no writer; it is replaced by a
+-- continuous aggregate of the same name. source_hospital NULL now means
+-- "source not recorded"; sum over sources for all-source totals.
+-- ============================================================================
+DROP TABLE agg.transfers_daily;
+
+CREATE MATERIALIZED VIEW agg.transfers_daily
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT
+    time_bucket(INTERVAL '1 day', transfer_date) AS transfer_date,
+    source_hospital,
+    admitting_unit_id,
+    COUNT(*) AS transfer_count
+FROM clinical.transfers
+GROUP BY time_bucket(INTERVAL '1 day', transfer_date), source_hospital, admitting_unit_id
+WITH NO DATA;
+
+SELECT add_continuous_aggregate_policy('agg.transfers_daily',
+    start_offset      => INTERVAL '30 days',
+    end_offset        => INTERVAL '1 day',
+    schedule_interval => INTERVAL '1 hour');
+
+CREATE INDEX idx_agg_trf_source ON agg.transfers_daily (source_hospital, transfer_date DESC);
+CREATE INDEX idx_agg_trf_unit ON agg.transfers_daily (admitting_unit_id, transfer_date DESC);
+
+COMMENT ON MATERIALIZED VIEW agg.transfers_daily IS 'Continuous aggregate: daily inter-hospital transfers by source hospital × admitting unit';
+
+-- ============================================================================
+-- DEATHS MONTHLY
+-- ============================================================================
+-- Also previously unpopulated; replaced by a continuous aggregate.
+-- discharge_unit_id NULL now means "unit not recorded".
+-- ============================================================================
+DROP TABLE agg.deaths_monthly;
+
+CREATE MATERIALIZED VIEW agg.deaths_monthly
+WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+SELECT
+    time_bucket(INTERVAL '1 month', report_month) AS report_month,
+    discharge_unit_id,
+    COUNT(*)                        AS death_count,
+    ROUND(AVG(los_days), 1)         AS avg_los_days
+FROM clinical.deaths
+GROUP BY time_bucket(INTERVAL '1 month', report_month), discharge_unit_id
+WITH NO DATA;
+
+SELECT add_continuous_aggregate_policy('agg.deaths_monthly',
+    start_offset      => INTERVAL '3 months',
+    end_offset        => NULL,
+    schedule_interval => INTERVAL '1 day');
+
+COMMENT ON MATERIALIZED VIEW agg.deaths_monthly IS 'Continuous aggregate: monthly deaths by discharge unit';
+
+COMMIT;
+
+-- ============================================================================
+-- Initial materialisation (outside the transaction)
+-- ============================================================================
+CALL refresh_continuous_aggregate('agg.inpatient_census_daily', NULL, NULL);
+CALL refresh_continuous_aggregate('agg.transfers_daily', NULL, NULL);
+CALL refresh_continuous_aggregate('agg.deaths_monthly', NULL, NULL);
@@ -0,0 +1,232 @@
+-- ============================================================================
+-- Migration 014: Current Certification Status
+-- REdI Data Platform
+-- ============================================================================
+-- training.current_cert_status holds one row per staff member with their
+-- latest ALS and BLS status. training.apply_cert_snapshot() folds each
+-- loaded snapshot into it, touching only the staff in that snapshot, so
+-- v_current_cert_status and v_combined_cert_status no longer scan the
+-- snapshot history on every query.
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- CURRENT CERTIFICATION STATUS
+-- ============================================================================
+-- Last known ALS and BLS status per staff member. A staff member keeps the
+-- status from the newest snapshot they appeared in; *_snapshot_id tells
+-- whether that is the latest snapshot of the type.
+-- ============================================================================
+CREATE TABLE training.current_cert_status (
+    staff_id                INT PRIMARY KEY REFERENCES core.staff(id) ON DELETE CASCADE,
+    -- ALS
+    als_snapshot_id         INT,
+    als_snapshot_date       DATE,
+    als_status_code         VARCHAR(20) REFERENCES system.lookup_certification_status(code),
+    als_org_unit_id         BIGINT,
+    als_manager_name        VARCHAR(200),
+    -- BLS
+    bls_snapshot_id         INT,
+    bls_snapshot_date       DATE,
+    bls_status_code         VARCHAR(20) REFERENCES system.lookup_certification_status(code),
+    bls_org_unit_id         BIGINT,
+    bls_manager_name        VARCHAR(200),
+    updated_at              TIMESTAMPTZ NOT NULL DEFAULT NOW()
+)
+-- WHY: every weekly load rewrites most rows; free page space and no
+-- secondary indexes keep those updates HOT instead of bloating the table
+WITH (fillfactor = 70);
+
+COMMENT ON TABLE training.current_cert_status IS 'Latest ALS/BLS status per staff member. Maintained by training.apply_cert_snapshot() on each snapshot load.';
+COMMENT ON COLUMN training.current_cert_status.als_snapshot_id IS 'Snapshot the ALS columns came from; equals the latest ALS snapshot id if the staff member was in it';
+
+-- ============================================================================
+-- FUNCTIONS
+-- ============================================================================
+
+-- Fold one loaded snapshot into training.current_cert_status. Call after
+-- the snapshot's staff_certifications rows (including derived
+-- not_assigned rows) are loaded. A staff member's columns for the type are
+-- replaced only if the snapshot is at least as new as the one they hold,
+-- so re-loading or back-filling an older snapshot is harmless.
+-- Returns the number of staff rows written.
+CREATE OR REPLACE FUNCTION training.apply_cert_snapshot(p_snapshot_id INT)
+RETURNS INT AS $$
+DECLARE
+    v_cert_type VARCHAR(10);
+    v_snap_date DATE;
+    v_rows      INT;
+BEGIN
+    SELECT certification_type, snapshot_date
+    INTO v_cert_type, v_snap_date
+    FROM training.certification_snapshots
+    WHERE id = p_snapshot_id;
+
+    IF v_snap_date IS NULL THEN
+        RAISE EXCEPTION 'Certification snapshot % not found', p_snapshot_id;
+    END IF;
+
+    IF v_cert_type = 'ALS' THEN
+        INSERT INTO training.current_cert_status AS cur (
+            staff_id, als_snapshot_id, als_snapshot_date, als_status_code,
+            als_org_unit_id, als_manager_name
+        )
+        SELECT staff_id, p_snapshot_id, v_snap_date, status_code, org_unit_id, manager_name
+        FROM training.staff_certifications
+        WHERE snapshot_id = p_snapshot_id
+        ON CONFLICT (staff_id) DO UPDATE SET
+            als_snapshot_id   = EXCLUDED.als_snapshot_id,
+            als_snapshot_date = EXCLUDED.als_snapshot_date,
+            als_status_code   = EXCLUDED.als_status_code,
+            als_org_unit_id   = EXCLUDED.als_org_unit_id,
+            als_manager_name  = EXCLUDED.als_manager_name,
+            updated_at        = NOW()
+        WHERE cur.als_snapshot_id IS NULL
+           OR (cur.als_snapshot_date, cur.als_snapshot_id)
+              <= (EXCLUDED.als_snapshot_date, EXCLUDED.als_snapshot_id);
+    ELSE
+        INSERT INTO training.current_cert_status AS cur (
+            staff_id, bls_snapshot_id, bls_snapshot_date, bls_status_code,
+            bls_org_unit_id, bls_manager_name
+        )
+        SELECT staff_id, p_snapshot_id, v_snap_date, status_code, org_unit_id, manager_name
+        FROM training.staff_certifications
+        WHERE snapshot_id = p_snapshot_id
+        ON CONFLICT (staff_id) DO UPDATE SET
+            bls_snapshot_id   = EXCLUDED.bls_snapshot_id,
+            bls_snapshot_date = EXCLUDED.bls_snapshot_date,
+            bls_status_code   = EXCLUDED.bls_status_code,
+            bls_org_unit_id   = EXCLUDED.bls_org_unit_id,
+            bls_manager_name  = EXCLUDED.bls_manager_name,
+            updated_at        = NOW()
+        WHERE cur.bls_snapshot_id IS NULL
+           OR (cur.bls_snapshot_date, cur.bls_snapshot_id)
+              <= (EXCLUDED.bls_snapshot_date, EXCLUDED.bls_snapshot_id);
+    END IF;
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    RAISE NOTICE 'Applied % snapshot % to current_cert_status: % staff', v_cert_type, v_snap_date, v_rows;
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rebuild training.current_cert_status from the snapshot history: for each
+-- staff member and type, the row from the newest snapshot they appear in.
+-- Use after deleting or correcting snapshot rows. Returns staff rows written.
+CREATE OR REPLACE FUNCTION training.rebuild_current_cert_status()
+RETURNS INT AS $$
+DECLARE
+    v_rows INT;
+BEGIN
+    TRUNCATE training.current_cert_status;
+
+    INSERT INTO training.current_cert_status (
+        staff_id, als_snapshot_id, als_snapshot_date, als_status_code,
+        als_org_unit_id, als_manager_name
+    )
+    SELECT DISTINCT ON (sc.staff_id)
+        sc.staff_id, cs.id, cs.snapshot_date, sc.status_code, sc.org_unit_id, sc.manager_name
+    FROM training.staff_certifications sc
+    JOIN training.certification_snapshots cs ON cs.id = sc.snapshot_id
+    WHERE cs.certification_type = 'ALS'
+    ORDER BY sc.staff_id, cs.snapshot_date DESC, cs.id DESC;
+
+    INSERT INTO training.current_cert_status AS cur (
+        staff_id, bls_snapshot_id, bls_snapshot_date, bls_status_code,
+        bls_org_unit_id, bls_manager_name
+    )
+    SELECT DISTINCT ON (sc.staff_id)
+        sc.staff_id, cs.id, cs.snapshot_date, sc.status_code, sc.org_unit_id, sc.manager_name
+    FROM training.staff_certifications sc
+    JOIN training.certification_snapshots cs ON cs.id = sc.snapshot_id
+    WHERE cs.certification_type = 'BLS'
+    ORDER BY sc.staff_id, cs.snapshot_date DESC, cs.id DESC
+    ON CONFLICT (staff_id) DO UPDATE SET
+        bls_snapshot_id   = EXCLUDED.bls_snapshot_id,
+        bls_snapshot_date = EXCLUDED.bls_snapshot_date,
+        bls_status_code   = EXCLUDED.bls_status_code,
+        bls_org_unit_id   = EXCLUDED.bls_org_unit_id,
+        bls_manager_name  = EXCLUDED.bls_manager_name;
+
+    SELECT COUNT(*) INTO v_rows FROM training.current_cert_status;
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- VIEWS: Training Domain (thin selects over current_cert_status)
+-- ============================================================================
+
+-- Latest certification status per staff member (most recent snapshot)
+-- WHY: latest by (snapshot_date, id) like apply_cert_snapshot, not MAX(id):
+-- a backfilled older snapshot gets a higher id but is not the current one.
+CREATE OR REPLACE VIEW training.v_current_cert_status AS
+WITH latest_snapshots AS (
+    SELECT DISTINCT ON (certification_type)
+           certification_type,
+           id AS snapshot_id
+    FROM training.certification_snapshots
+    ORDER BY certification_type, snapshot_date DESC, id DESC
+),
+current_status AS (
+    SELECT c.staff_id, 'ALS'::VARCHAR(10) AS certification_type,
+           c.als_status_code AS status_code, c.als_org_unit_id AS org_unit_id,
+           c.als_manager_name AS manager_name, c.als_snapshot_date AS snapshot_date
+    FROM training.current_cert_status c
+    JOIN latest_snapshots ls ON ls.certification_type = 'ALS' AND ls.snapshot_id = c.als_snapshot_id
+    UNION ALL
+    SELECT c.staff_id, 'BLS'::VARCHAR(10),
+           c.bls_status_code, c.bls_org_unit_id,
+           c.bls_manager_name, c.bls_snapshot_date
+    FROM training.current_cert_status c
+    JOIN latest_snapshots ls ON ls.certification_type = 'BLS' AND ls.snapshot_id = c.bls_snapshot_id
+)
+SELECT
+    s.payroll_id,
+    s.given_name,
+    s.surname,
+    s.email,
+    s.discipline_stream_code,
+    s.job_family_code,
+    cur.org_unit_id,
+    ou.name AS org_unit_name,
+    ou.directorate,
+    ou.service_line,
+    cur.certification_type,
+    cur.status_code,
+    lcs.is_compliant,
+    cur.manager_name,
+    cur.snapshot_date
+FROM current_status cur
+JOIN core.staff s ON s.id = cur.staff_id
+LEFT JOIN core.org_units ou ON ou.id = cur.org_unit_id
+LEFT JOIN system.lookup_certification_status lcs ON lcs.code = cur.status_code;
+
+-- Combined ALS + BLS status per staff member (wide format for reporting)
+CREATE OR REPLACE VIEW training.v_combined_cert_status AS
+SELECT
+    s.payroll_id,
+    s.given_name,
+    s.surname,
+    s.email,
+    s.discipline_stream_code,
+    s.org_unit_id,
+    ou.name AS org_unit_name,
+    ou.directorate,
+    c.als_status_code AS als_status,
+    als_lk.is_compliant AS als_compliant,
+    c.bls_status_code AS bls_status,
+    bls_lk.is_compliant AS bls_compliant,
+    -- Combined compliance: TRUE only if both ALS and BLS are compliant
+    COALESCE(als_lk.is_compliant, FALSE) AND COALESCE(bls_lk.is_compliant, FALSE) AS both_compliant
+FROM training.current_cert_status c
+JOIN core.staff s ON s.id = c.staff_id
+LEFT JOIN core.org_units ou ON ou.id = s.org_unit_id
+LEFT JOIN system.lookup_certification_status als_lk ON als_lk.code = c.als_status_code
+LEFT JOIN system.lookup_certification_status bls_lk ON bls_lk.code = c.bls_status_code;
+
+-- Populate from the snapshots already loaded
+SELECT training.rebuild_current_cert_status();
+
+COMMIT;
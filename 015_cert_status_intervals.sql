@@ -0,0 +1,584 @@
+-- ============================================================================
+-- Migration 015: Certification Status Intervals (SCD)
+-- REdI Data Platform
+-- ============================================================================
+-- Weekly ALS/BLS snapshots repeat almost every staff member's status
+-- unchanged. training.staff_cert_history stores each status as an interval
+-- of snapshots [valid_from_snapshot, valid_to_snapshot) and only writes a
+-- row when status, org unit, job family or manager changes.
+--
+-- training.staff_certifications stays the landing table: the loader and
+-- derive_not_assigned write the new snapshot there, and
+-- training.apply_cert_snapshot() folds it into the history and prunes
+-- landing rows older than the last two snapshots of each type. Any snapshot
+-- is reconstructed with training.cert_snapshot_rows(), which the compliance
+-- refresh now reads.
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- STAFF CERTIFICATION HISTORY
+-- ============================================================================
+-- Snapshot ids increase with load order within a certification type, so an
+-- interval covers snapshot s when valid_from_snapshot <= s < valid_to_snapshot.
+-- fold_cert_snapshot() and the backfill below reject a snapshot dated before
+-- one loaded ahead of it, which keeps id order and snapshot_date order the
+-- same.
+-- No FK to certification_snapshots: intervals outlive the snapshot headers
+-- they start in.
+-- ============================================================================
+CREATE TABLE training.staff_cert_history (
+    id                  BIGSERIAL PRIMARY KEY,
+    staff_id            INT NOT NULL REFERENCES core.staff(id),
+    certification_type  VARCHAR(10) NOT NULL CHECK (certification_type IN ('ALS', 'BLS')),
+    status_code         VARCHAR(20) NOT NULL REFERENCES system.lookup_certification_status(code),
+    org_unit_id         BIGINT REFERENCES core.org_units(id),
+    job_family_code     VARCHAR(30),
+    manager_name        VARCHAR(200),
+    valid_from_snapshot INT NOT NULL,
+    valid_to_snapshot   INT,                -- Exclusive; NULL = still current
+    valid_from_date     DATE NOT NULL,
+    valid_to_date       DATE                -- snapshot_date of valid_to_snapshot
+);
+
+-- One open interval per staff member and type; also the fold's lookup path
+CREATE UNIQUE INDEX idx_cert_hist_open
+    ON training.staff_cert_history (staff_id, certification_type)
+    WHERE valid_to_snapshot IS NULL;
+
+CREATE INDEX idx_cert_hist_type_from
+    ON training.staff_cert_history (certification_type, valid_from_snapshot);
+-- WHY: cert_snapshot_rows() bounds both ends of the interval; a B-tree on
+-- valid_from_snapshot alone reads every closed interval that started earlier
+CREATE INDEX idx_cert_hist_range
+    ON training.staff_cert_history
+    USING GIST (int4range(valid_from_snapshot, valid_to_snapshot));
+CREATE INDEX idx_cert_hist_staff
+    ON training.staff_cert_history (staff_id, certification_type, valid_from_snapshot);
+CREATE INDEX idx_cert_hist_to_date
+    ON training.staff_cert_history (valid_to_date) WHERE valid_to_date IS NOT NULL;
+
+COMMENT ON TABLE training.staff_cert_history IS 'Change-only ALS/BLS status history: one row per unchanged run of snapshots per staff member';
+COMMENT ON COLUMN training.staff_cert_history.valid_to_snapshot IS 'First snapshot (same type) where the row no longer applies — status/org/job family/manager changed or staff absent. NULL = current.';
+
+-- ============================================================================
+-- FUNCTIONS
+-- ============================================================================
+
+-- Fold one loaded snapshot into training.staff_cert_history: close the open
+-- intervals it no longer matches and open intervals for new or changed
+-- rows. Snapshots must be folded in id order per type; a snapshot at or
+-- below the type's watermark has already been folded and is skipped, and
+-- one dated before a snapshot already folded is rejected.
+-- Afterwards landing rows older than the last p_keep snapshots of the type
+-- are deleted from training.staff_certifications.
+-- Returns the number of intervals opened.
+CREATE OR REPLACE FUNCTION training.fold_cert_snapshot(p_snapshot_id INT, p_keep INT DEFAULT 2)
+RETURNS INT AS $$
+DECLARE
+    v_cert_type VARCHAR(10);
+    v_snap_date DATE;
+    v_last      BIGINT;
+    v_last_date DATE;
+    v_closed    INT;
+    v_opened    INT;
+    v_pruned    INT;
+BEGIN
+    SELECT certification_type, snapshot_date
+    INTO v_cert_type, v_snap_date
+    FROM training.certification_snapshots
+    WHERE id = p_snapshot_id;
+
+    IF v_snap_date IS NULL THEN
+        RAISE EXCEPTION 'Certification snapshot % not found', p_snapshot_id;
+    END IF;
+
+    SELECT last_source_id INTO v_last
+    FROM system.aggregate_watermarks
+    WHERE aggregate_name = 'cert_history_' || v_cert_type
+    FOR UPDATE;
+
+    IF p_snapshot_id <= v_last THEN
+        RAISE NOTICE '% snapshot % already folded into cert history', v_cert_type, p_snapshot_id;
+        RETURN 0;
+    END IF;
+
+    -- WHY: intervals are ranges of snapshot ids, so id order has to be date
+    -- order. A late-loaded older export would be folded as the newest state.
+    SELECT MAX(snapshot_date) INTO v_last_date
+    FROM training.certification_snapshots
+    WHERE certification_type = v_cert_type
+      AND id <= v_last;
+
+    IF v_snap_date < v_last_date THEN
+        RAISE EXCEPTION '% snapshot % (%) is older than the last folded snapshot (%); load snapshots in date order',
+            v_cert_type, p_snapshot_id, v_snap_date, v_last_date;
+    END IF;
+
+    -- Close open intervals the snapshot does not repeat unchanged
+    UPDATE training.staff_cert_history h
+    SET valid_to_snapshot = p_snapshot_id,
+        valid_to_date = v_snap_date
+    WHERE h.certification_type = v_cert_type
+      AND h.valid_to_snapshot IS NULL
+      AND NOT EXISTS (
+          SELECT 1 FROM training.staff_certifications sc
+          WHERE sc.snapshot_id = p_snapshot_id
+            AND sc.staff_id = h.staff_id
+            AND sc.status_code = h.status_code
+            AND sc.org_unit_id IS NOT DISTINCT FROM h.org_unit_id
+            AND sc.job_family_code IS NOT DISTINCT FROM h.job_family_code
+            AND sc.manager_name IS NOT DISTINCT FROM h.manager_name
+      );
+    GET DIAGNOSTICS v_closed = ROW_COUNT;
+
+    -- Open intervals for rows with no matching open interval
+    INSERT INTO training.staff_cert_history (
+        staff_id, certification_type, status_code, org_unit_id,
+        job_family_code, manager_name,
+        valid_from_snapshot, valid_from_date
+    )
+    SELECT sc.staff_id, v_cert_type, sc.status_code, sc.org_unit_id,
+           sc.job_family_code, sc.manager_name,
+           p_snapshot_id, v_snap_date
+    FROM training.staff_certifications sc
+    WHERE sc.snapshot_id = p_snapshot_id
+      AND NOT EXISTS (
+          SELECT 1 FROM training.staff_cert_history h
+          WHERE h.staff_id = sc.staff_id
+            AND h.certification_type = v_cert_type
+            AND h.valid_to_snapshot IS NULL
+      );
+    GET DIAGNOSTICS v_opened = ROW_COUNT;
+
+    UPDATE system.aggregate_watermarks
+    SET last_source_id = p_snapshot_id, last_refreshed_at = NOW(), last_row_count = v_opened
+    WHERE aggregate_name = 'cert_history_' || v_cert_type;
+
+    -- Prune landing rows of snapshots older than the last p_keep of this type
+    DELETE FROM training.staff_certifications sc
+    USING training.certification_snapshots cs
+    WHERE cs.id = sc.snapshot_id
+      AND cs.certification_type = v_cert_type
+      AND cs.id <= v_last
+      AND cs.id NOT IN (
+          SELECT id FROM training.certification_snapshots
+          WHERE certification_type = v_cert_type
+          ORDER BY snapshot_date DESC, id DESC
+          LIMIT p_keep
+      );
+    GET DIAGNOSTICS v_pruned = ROW_COUNT;
+
+    RAISE NOTICE 'Folded % snapshot % into cert history: % closed, % opened, % landing rows pruned',
+        v_cert_type, v_snap_date, v_closed, v_opened, v_pruned;
+    RETURN v_opened;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Reconstruct the staff certification rows of any snapshot from the history
+CREATE OR REPLACE FUNCTION training.cert_snapshot_rows(p_snapshot_id INT)
+RETURNS TABLE (
+    staff_id            INT,
+    certification_type  VARCHAR(10),
+    status_code         VARCHAR(20),
+    org_unit_id         BIGINT,
+    job_family_code     VARCHAR(30),
+    manager_name        VARCHAR(200)
+) AS $$
+    SELECT h.staff_id, h.certification_type, h.status_code, h.org_unit_id,
+           h.job_family_code, h.manager_name
+    FROM training.staff_cert_history h
+    JOIN training.certification_snapshots cs ON cs.id = p_snapshot_id
+    WHERE h.certification_type = cs.certification_type
+      AND int4range(h.valid_from_snapshot, h.valid_to_snapshot) @> p_snapshot_id;
+$$ LANGUAGE sql STABLE;
+
+-- Staff whose status changed at least p_min_changes times since p_since
+-- (the "> 2 status changes in 4 weeks" quality check). Only intervals
+-- overlapping the window are read; changes of org unit, job family or
+-- manager alone are not counted.
+CREATE OR REPLACE FUNCTION training.frequent_status_changes(
+    p_since DATE,
+    p_min_changes INT DEFAULT 3
+)
+RETURNS TABLE (
+    staff_id            INT,
+    certification_type  VARCHAR(10),
+    change_count        INT,
+    statuses            VARCHAR(20)[]
+) AS $$
+    WITH recent AS (
+        SELECT h.staff_id, h.certification_type, h.status_code, h.valid_from_date,
+               LAG(h.status_code) OVER (
+                   PARTITION BY h.staff_id, h.certification_type
+                   ORDER BY h.valid_from_date, h.valid_from_snapshot
+               ) AS prev_status
+        FROM training.staff_cert_history h
+        WHERE h.valid_to_date IS NULL OR h.valid_to_date >= p_since
+    )
+    SELECT staff_id, certification_type,
+           COUNT(*)::INT,
+           ARRAY_AGG(status_code ORDER BY valid_from_date)
+    FROM recent
+    WHERE valid_from_date >= p_since
+      AND prev_status IS NOT NULL
+      AND status_code <> prev_status
+    GROUP BY staff_id, certification_type
+    HAVING COUNT(*) >= p_min_changes;
+$$ LANGUAGE sql STABLE;
+
+-- Unchanged from 014 except that the snapshot is also folded into
+-- training.staff_cert_history.
+CREATE OR REPLACE FUNCTION training.apply_cert_snapshot(p_snapshot_id INT)
+RETURNS INT AS $$
+DECLARE
+    v_cert_type VARCHAR(10);
+    v_snap_date DATE;
+    v_rows      INT;
+BEGIN
+    SELECT certification_type, snapshot_date
+    INTO v_cert_type, v_snap_date
+    FROM training.certification_snapshots
+    WHERE id = p_snapshot_id;
+
+    IF v_snap_date IS NULL THEN
+        RAISE EXCEPTION 'Certification snapshot % not found', p_snapshot_id;
+    END IF;
+
+    IF v_cert_type = 'ALS' THEN
+        INSERT INTO training.current_cert_status AS cur (
+            staff_id, als_snapshot_id, als_snapshot_date, als_status_code,
+            als_org_unit_id, als_manager_name
+        )
+        SELECT staff_id, p_snapshot_id, v_snap_date, status_code, org_unit_id, manager_name
+        FROM training.staff_certifications
+        WHERE snapshot_id = p_snapshot_id
+        ON CONFLICT (staff_id) DO UPDATE SET
+            als_snapshot_id   = EXCLUDED.als_snapshot_id,
+            als_snapshot_date = EXCLUDED.als_snapshot_date,
+            als_status_code   = EXCLUDED.als_status_code,
+            als_org_unit_id   = EXCLUDED.als_org_unit_id,
+            als_manager_name  = EXCLUDED.als_manager_name,
+            updated_at        = NOW()
+        WHERE cur.als_snapshot_id IS NULL
+           OR (cur.als_snapshot_date, cur.als_snapshot_id)
+              <= (EXCLUDED.als_snapshot_date, EXCLUDED.als_snapshot_id);
+    ELSE
+        INSERT INTO training.current_cert_status AS cur (
+            staff_id, bls_snapshot_id, bls_snapshot_date, bls_status_code,
+            bls_org_unit_id, bls_manager_name
+        )
+        SELECT staff_id, p_snapshot_id, v_snap_date, status_code, org_unit_id, manager_name
+        FROM training.staff_certifications
+        WHERE snapshot_id = p_snapshot_id
+        ON CONFLICT (staff_id) DO UPDATE SET
+            bls_snapshot_id   = EXCLUDED.bls_snapshot_id,
+            bls_snapshot_date = EXCLUDED.bls_snapshot_date,
+            bls_status_code   = EXCLUDED.bls_status_code,
+            bls_org_unit_id   = EXCLUDED.bls_org_unit_id,
+            bls_manager_name  = EXCLUDED.bls_manager_name,
+            updated_at        = NOW()
+        WHERE cur.bls_snapshot_id IS NULL
+           OR (cur.bls_snapshot_date, cur.bls_snapshot_id)
+              <= (EXCLUDED.bls_snapshot_date, EXCLUDED.bls_snapshot_id);
+    END IF;
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    RAISE NOTICE 'Applied % snapshot % to current_cert_status: % staff', v_cert_type, v_snap_date, v_rows;
+
+    PERFORM training.fold_cert_snapshot(p_snapshot_id);
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rebuild training.current_cert_status from the history: for each staff
+-- member and type, their latest interval, dated by the last snapshot it
+-- covers (the latest folded snapshot for an open interval).
+CREATE OR REPLACE FUNCTION training.rebuild_current_cert_status()
+RETURNS INT AS $$
+DECLARE
+    v_rows INT;
+BEGIN
+    TRUNCATE training.current_cert_status;
+
+    INSERT INTO training.current_cert_status (
+        staff_id, als_snapshot_id, als_snapshot_date, als_status_code,
+        als_org_unit_id, als_manager_name
+    )
+    SELECT DISTINCT ON (h.staff_id)
+        h.staff_id, ls.id, ls.snapshot_date, h.status_code, h.org_unit_id, h.manager_name
+    FROM training.staff_cert_history h
+    JOIN system.aggregate_watermarks w ON w.aggregate_name = 'cert_history_ALS'
+    CROSS JOIN LATERAL (
+        SELECT cs.id, cs.snapshot_date
+        FROM training.certification_snapshots cs
+        WHERE cs.certification_type = 'ALS'
+          AND cs.id < COALESCE(h.valid_to_snapshot, w.last_source_id + 1)
+        ORDER BY cs.snapshot_date DESC, cs.id DESC
+        LIMIT 1
+    ) ls
+    WHERE h.certification_type = 'ALS'
+    ORDER BY h.staff_id, h.valid_from_date DESC, h.valid_from_snapshot DESC;
+
+    INSERT INTO training.current_cert_status AS cur (
+        staff_id, bls_snapshot_id, bls_snapshot_date, bls_status_code,
+        bls_org_unit_id, bls_manager_name
+    )
+    SELECT DISTINCT ON (h.staff_id)
+        h.staff_id, ls.id, ls.snapshot_date, h.status_code, h.org_unit_id, h.manager_name
+    FROM training.staff_cert_history h
+    JOIN system.aggregate_watermarks w ON w.aggregate_name = 'cert_history_BLS'
+    CROSS JOIN LATERAL (
+        SELECT cs.id, cs.snapshot_date
+        FROM training.certification_snapshots cs
+        WHERE cs.certification_type = 'BLS'
+          AND cs.id < COALESCE(h.valid_to_snapshot, w.last_source_id + 1)
+        ORDER BY cs.snapshot_date DESC, cs.id DESC
+        LIMIT 1
+    ) ls
+    WHERE h.certification_type = 'BLS'
+    ORDER BY h.staff_id, h.valid_from_date DESC, h.valid_from_snapshot DESC
+    ON CONFLICT (staff_id) DO UPDATE SET
+        bls_snapshot_id   = EXCLUDED.bls_snapshot_id,
+        bls_snapshot_date = EXCLUDED.bls_snapshot_date,
+        bls_status_code   = EXCLUDED.bls_status_code,
+        bls_org_unit_id   = EXCLUDED.bls_org_unit_id,
+        bls_manager_name  = EXCLUDED.bls_manager_name;
+
+    SELECT COUNT(*) INTO v_rows FROM training.current_cert_status;
+    RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Refresh training compliance aggregates for a given snapshot.
+-- Unchanged from 011 except that the snapshot is read from the history, so
+-- snapshots whose landing rows have been pruned can still be re-aggregated.
+CREATE OR REPLACE FUNCTION agg.refresh_training_compliance(p_snapshot_id INT)
+RETURNS VOID AS $$
+DECLARE
+    v_cert_type VARCHAR(10);
+    v_snap_date DATE;
+    v_rows      INT;
+    v_tg_rows   INT;
+BEGIN
+    -- Get snapshot metadata
+    SELECT certification_type, snapshot_date
+    INTO v_cert_type, v_snap_date
+    FROM training.certification_snapshots
+    WHERE id = p_snapshot_id;
+
+    IF v_snap_date IS NULL THEN
+        RAISE EXCEPTION 'Certification snapshot % not found', p_snapshot_id;
+    END IF;
+
+    IF p_snapshot_id > (SELECT last_source_id FROM system.aggregate_watermarks
+                        WHERE aggregate_name = 'cert_history_' || v_cert_type) THEN
+        RAISE EXCEPTION '% snapshot % not yet in cert history; call training.apply_cert_snapshot() first',
+            v_cert_type, p_snapshot_id;
+    END IF;
+
+    -- Delete existing aggregates for this snapshot date + type
+    DELETE FROM agg.training_compliance
+    WHERE snapshot_date = v_snap_date AND certification_type = v_cert_type;
+
+    DELETE FROM agg.training_compliance_tracking_group
+    WHERE snapshot_date = v_snap_date AND certification_type = v_cert_type;
+
+    WITH certs AS MATERIALIZED (
+        -- MATERIALIZED as in 011
+        SELECT
+            sc.org_unit_id,
+            ou.directorate,
+            COALESCE(s.discipline_stream_code, 'other') AS discipline_stream_code,
+            sc.job_family_code,
+            sc.status_code,
+            lcs.is_compliant
+        FROM training.cert_snapshot_rows(p_snapshot_id) sc
+        JOIN core.staff s ON s.id = sc.staff_id
+        LEFT JOIN core.org_units ou ON ou.id = sc.org_unit_id
+        LEFT JOIN system.lookup_certification_status lcs ON lcs.code = sc.status_code
+    ),
+    tracking_group_rows AS (
+        INSERT INTO agg.training_compliance_tracking_group (
+            snapshot_date, certification_type, tracking_group_id,
+            discipline_stream_code,
+            total_staff, compliant_count, non_compliant_count, compliance_pct
+        )
+        SELECT
+            v_snap_date,
+            v_cert_type,
+            tgm.tracking_group_id,
+            c.discipline_stream_code,
+            COUNT(*),
+            COUNT(*) FILTER (WHERE c.is_compliant),
+            COUNT(*) FILTER (WHERE NOT c.is_compliant),
+            ROUND(100.0 * COUNT(*) FILTER (WHERE c.is_compliant) / NULLIF(COUNT(*), 0), 2)
+        FROM certs c
+        JOIN core.tracking_group_members tgm ON tgm.org_unit_id = c.org_unit_id
+        JOIN core.tracking_groups tg ON tg.id = tgm.tracking_group_id AND tg.is_active
+        GROUP BY tgm.tracking_group_id, ROLLUP (c.discipline_stream_code)
+        RETURNING 1
+    )
+    INSERT INTO agg.training_compliance (
+        snapshot_date, certification_type, grouping_level,
+        org_unit_id, directorate, discipline_stream_code, job_family_code,
+        total_staff, compliant_count, non_compliant_count, compliance_pct,
+        status_acquired, status_overdue, status_assigned,
+        status_expired, status_in_progress, status_not_assigned
+    )
+    SELECT
+        v_snap_date,
+        v_cert_type,
+        CASE
+            WHEN GROUPING(org_unit_id) = 0 THEN 'org_unit'
+            WHEN GROUPING(directorate) = 0 THEN 'directorate'
+            WHEN GROUPING(job_family_code) = 0 THEN 'job_family'
+            ELSE 'facility'
+        END,
+        org_unit_id,
+        directorate,
+        discipline_stream_code,
+        job_family_code,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE is_compliant),
+        COUNT(*) FILTER (WHERE NOT is_compliant),
+        ROUND(100.0 * COUNT(*) FILTER (WHERE is_compliant) / NULLIF(COUNT(*), 0), 2),
+        COUNT(*) FILTER (WHERE status_code = 'acquired'),
+        COUNT(*) FILTER (WHERE status_code = 'overdue'),
+        COUNT(*) FILTER (WHERE status_code = 'assigned'),
+        COUNT(*) FILTER (WHERE status_code = 'expired'),
+        COUNT(*) FILTER (WHERE status_code = 'in_progress'),
+        COUNT(*) FILTER (WHERE status_code = 'not_assigned')
+    FROM certs
+    GROUP BY GROUPING SETS (
+        (org_unit_id, directorate, discipline_stream_code),
+        (directorate, discipline_stream_code),
+        (job_family_code, discipline_stream_code),
+        (discipline_stream_code),
+        ()
+    );
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    SELECT COUNT(*) INTO v_tg_rows
+    FROM agg.training_compliance_tracking_group
+    WHERE snapshot_date = v_snap_date AND certification_type = v_cert_type;
+
+    RAISE NOTICE 'Refreshed training compliance aggregates for % snapshot %: % rows, % tracking group rows',
+        v_cert_type, v_snap_date, v_rows, v_tg_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================================
+-- Backfill: history from the loaded snapshots, then prune landing rows
+-- ============================================================================
+-- Intervals are ranges of snapshot ids, so, as in fold_cert_snapshot(), a
+-- snapshot loaded after a newer one of its type cannot be placed in them
+DO $$
+DECLARE
+    v_bad RECORD;
+BEGIN
+    SELECT certification_type, id, snapshot_date, prev_date INTO v_bad
+    FROM (
+        SELECT certification_type, id, snapshot_date,
+               MAX(snapshot_date) OVER (
+                   PARTITION BY certification_type ORDER BY id
+                   ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+               ) AS prev_date
+        FROM training.certification_snapshots
+    ) s
+    WHERE snapshot_date < prev_date
+    ORDER BY id
+    LIMIT 1;
+
+    IF FOUND THEN
+        RAISE EXCEPTION '% snapshot % (%) was loaded after a snapshot dated %; remove or reload the out-of-order snapshots in date order before applying 015',
+            v_bad.certification_type, v_bad.id, v_bad.snapshot_date, v_bad.prev_date;
+    END IF;
+END $$;
+
+-- WHY: one gaps-and-islands pass instead of calling fold_cert_snapshot()
+-- per snapshot. A run of consecutive snapshots (per type) with the same
+-- values is one interval; a value change or a missed snapshot starts a new one.
+INSERT INTO training.staff_cert_history (
+    staff_id, certification_type, status_code, org_unit_id,
+    job_family_code, manager_name,
+    valid_from_snapshot, valid_to_snapshot, valid_from_date, valid_to_date
+)
+WITH snaps AS (
+    SELECT id, certification_type, snapshot_date,
+           ROW_NUMBER() OVER (PARTITION BY certification_type ORDER BY snapshot_date, id) AS seq
+    FROM training.certification_snapshots
+),
+marked AS (
+    SELECT sc.staff_id, sn.certification_type, sc.status_code, sc.org_unit_id,
+           sc.job_family_code, sc.manager_name, sn.seq,
+           CASE WHEN LAG(sn.seq) OVER w = sn.seq - 1
+                 AND LAG(sc.status_code) OVER w = sc.status_code
+                 AND LAG(sc.org_unit_id) OVER w IS NOT DISTINCT FROM sc.org_unit_id
+                 AND LAG(sc.job_family_code) OVER w IS NOT DISTINCT FROM sc.job_family_code
+                 AND LAG(sc.manager_name) OVER w IS NOT DISTINCT FROM sc.manager_name
+                THEN 0 ELSE 1 END AS is_start
+    FROM training.staff_certifications sc
+    JOIN snaps sn ON sn.id = sc.snapshot_id
+    WINDOW w AS (PARTITION BY sc.staff_id, sn.certification_type ORDER BY sn.seq)
+),
+islands AS (
+    SELECT staff_id, certification_type, status_code, org_unit_id,
+           job_family_code, manager_name,
+           MIN(seq) AS from_seq, MAX(seq) AS to_seq
+    FROM (
+        SELECT m.*, SUM(is_start) OVER (
+                   PARTITION BY staff_id, certification_type ORDER BY seq
+               ) AS island
+        FROM marked m
+    ) x
+    GROUP BY staff_id, certification_type, island, status_code, org_unit_id,
+             job_family_code, manager_name
+)
+SELECT i.staff_id, i.certification_type, i.status_code, i.org_unit_id,
+       i.job_family_code, i.manager_name,
+       f.id, t.id, f.snapshot_date, t.snapshot_date
+FROM islands i
+JOIN snaps f ON f.certification_type = i.certification_type AND f.seq = i.from_seq
+LEFT JOIN snaps t ON t.certification_type = i.certification_type AND t.seq = i.to_seq + 1;
+
+INSERT INTO system.aggregate_watermarks (aggregate_name, last_source_id, last_refreshed_at)
+SELECT 'cert_history_' || t.certification_type, COALESCE(MAX(cs.id), 0), NOW()
+FROM (VALUES ('ALS'), ('BLS')) t (certification_type)
+LEFT JOIN training.certification_snapshots cs ON cs.certification_type = t.certification_type
+GROUP BY t.certification_type;
+
+DELETE FROM training.staff_certifications sc
+WHERE sc.snapshot_id NOT IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+                   PARTITION BY certification_type ORDER BY snapshot_date DESC, id DESC
+               ) AS rn
+        FROM training.certification_snapshots
+    ) s
+    WHERE rn <= 2
+);
+
+COMMIT;
+
+-- ============================================================================
+-- RETENTION: replace the per-snapshot DELETE with interval retention
+-- ============================================================================
+-- Same job name, so cron.schedule() replaces the 009 job. If pg_cron lives
+-- in another database (see 009_scheduled_jobs.sql), update the job there.
+DO $$
+BEGIN
+    IF to_regnamespace('cron') IS NULL THEN
+        RAISE NOTICE 'pg_cron not installed in this database; update job retention-staff-certs manually';
+        RETURN;
+    END IF;
+
+    PERFORM cron.schedule(
+        'retention-staff-certs',
+        '0 4 * * 0',   -- Weekly on Sunday at 04:00
+        $job$DELETE FROM training.staff_cert_history
+             WHERE valid_to_date < CURRENT_DATE - INTERVAL '2 years'$job$
+    );
+END;
+$$;
@@ -0,0 +1,230 @@
+-- ============================================================================
+-- Migration 016: Inpatient Admission Episodes
+-- REdI Data Platform
+-- ============================================================================
+-- clinical.inpatient_census repeats every inpatient every day; a 30-day stay
+-- is 30 near-identical rows. clinical.inpatient_episodes compacts the census
+-- into one row per patient admission (first/last census day, wards visited,
+-- LOS), maintained by clinical.apply_census_day() on each census load.
+--
+-- Episodes are an ordinary table, so they outlive the 90-day drop_chunks()
+-- retention on the census hypertable. Long-range LOS, bed-day and
+-- readmission queries read episodes instead of daily rows.
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- INPATIENT EPISODES
+-- ============================================================================
+-- One row per patient_hash × admission. An episode is open while the
+-- patient appears in each census load; it is closed by the first load the
+-- patient is missing from (discharged_by_date) or that shows them under a
+-- different admission date (discharge and readmission between censuses).
+-- ============================================================================
+CREATE TABLE clinical.inpatient_episodes (
+    id                      BIGSERIAL PRIMARY KEY,
+    patient_hash            VARCHAR(64) NOT NULL,
+    admission_date          DATE,
+    first_seen_date         DATE NOT NULL,
+    last_seen_date          DATE NOT NULL,
+    discharged_by_date      DATE,           -- First census without the patient; NULL = still inpatient
+    census_days             INT NOT NULL DEFAULT 1,
+    first_ward_id           INT REFERENCES core.wards(id),
+    last_ward_id            INT REFERENCES core.wards(id),
+    ward_ids                INT[] NOT NULL DEFAULT '{}',
+    admitting_unit_id       INT REFERENCES core.admitting_units(id),
+    last_admitting_unit_id  INT REFERENCES core.admitting_units(id),
+    sex                     CHAR(1) CHECK (sex IN ('M', 'F', 'U')),
+    age_band                VARCHAR(20),
+    expected_discharge      DATE,
+    los_days                INT,            -- LOS on last_seen_date
+    updated_at              TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- One open episode per patient; also the daily load's lookup path
+CREATE UNIQUE INDEX idx_episodes_open
+    ON clinical.inpatient_episodes (patient_hash)
+    WHERE discharged_by_date IS NULL;
+
+CREATE INDEX idx_episodes_patient ON clinical.inpatient_episodes (patient_hash, first_seen_date);
+CREATE INDEX idx_episodes_discharged ON clinical.inpatient_episodes (discharged_by_date)
+    WHERE discharged_by_date IS NOT NULL;
+CREATE INDEX idx_episodes_first_seen ON clinical.inpatient_episodes (first_seen_date);
+
+COMMENT ON TABLE clinical.inpatient_episodes IS 'One row per inpatient admission, compacted from clinical.inpatient_census. Kept beyond census retention.';
+COMMENT ON COLUMN clinical.inpatient_episodes.ward_ids IS 'Wards the patient was censused on, in order of first appearance';
+COMMENT ON COLUMN clinical.inpatient_episodes.census_days IS 'Census loads the patient appeared in (bed-days)';
+COMMENT ON COLUMN clinical.inpatient_episodes.los_days IS 'LOS on last_seen_date — the final LOS once the episode is closed';
+
+-- ============================================================================
+-- FUNCTIONS
+-- ============================================================================
+
+-- One row per patient in a day's census (the latest if a patient was loaded
+-- twice). A row without an admission date falls back to
+-- census_date - los_days.
+CREATE OR REPLACE FUNCTION clinical.census_day_rows(p_census_date DATE)
+RETURNS TABLE (
+    patient_hash        VARCHAR(64),
+    admission_date      DATE,
+    ward_id             INT,
+    admitting_unit_id   INT,
+    sex                 CHAR(1),
+    age_band            VARCHAR(20),
+    expected_discharge  DATE,
+    los_days            INT
+) AS $$
+    SELECT DISTINCT ON (c.patient_hash)
+        c.patient_hash,
+        COALESCE(c.admission_date, c.census_date - c.los_days),
+        c.ward_id, c.admitting_unit_id, c.sex, c.age_band,
+        c.expected_discharge, c.los_days
+    FROM clinical.inpatient_census c
+    WHERE c.census_date = p_census_date
+    ORDER BY c.patient_hash, c.id DESC;
+$$ LANGUAGE sql STABLE;
+
+-- Fold one day's census into clinical.inpatient_episodes. Census dates must
+-- be applied in order; a date not after the latest last_seen_date has
+-- already been applied and is skipped.
+-- Returns the number of episodes opened.
+CREATE OR REPLACE FUNCTION clinical.apply_census_day(p_census_date DATE)
+RETURNS INT AS $$
+DECLARE
+    v_last        DATE;
+    v_closed      INT;
+    v_reopened    INT;
+    v_continued   INT;
+    v_opened      INT;
+BEGIN
+    -- WHY: an empty load would otherwise close every open episode
+    IF NOT EXISTS (SELECT 1 FROM clinical.inpatient_census WHERE census_date = p_census_date) THEN
+        RAISE EXCEPTION 'No census rows for %', p_census_date;
+    END IF;
+
+    SELECT MAX(last_seen_date) INTO v_last FROM clinical.inpatient_episodes;
+
+    IF p_census_date <= v_last THEN
+        RAISE NOTICE 'Census % already applied to inpatient episodes', p_census_date;
+        RETURN 0;
+    END IF;
+
+    -- Close open episodes whose patient is absent or has a new admission
+    UPDATE clinical.inpatient_episodes e
+    SET discharged_by_date = p_census_date,
+        updated_at = NOW()
+    WHERE e.discharged_by_date IS NULL
+      AND NOT EXISTS (
+          SELECT 1 FROM clinical.census_day_rows(p_census_date) c
+          WHERE c.patient_hash = e.patient_hash
+            AND (c.admission_date IS NULL OR e.admission_date IS NULL
+                 OR c.admission_date = e.admission_date)
+      );
+    GET DIAGNOSTICS v_closed = ROW_COUNT;
+
+    -- Reopen the patient's latest episode if they reappear under the same
+    -- admission (dropped from one census, e.g. on leave, but not discharged).
+    -- An open episode is always the patient's latest.
+    UPDATE clinical.inpatient_episodes e
+    SET discharged_by_date = NULL,
+        updated_at = NOW()
+    FROM (
+        SELECT DISTINCT ON (l.patient_hash)
+            l.id, l.discharged_by_date, l.admission_date = c.admission_date AS same_admission
+        FROM clinical.census_day_rows(p_census_date) c
+        JOIN clinical.inpatient_episodes l ON l.patient_hash = c.patient_hash
+        ORDER BY l.patient_hash, l.id DESC
+    ) latest
+    WHERE e.id = latest.id
+      AND latest.discharged_by_date IS NOT NULL
+      AND latest.same_admission;
+    GET DIAGNOSTICS v_reopened = ROW_COUNT;
+
+    -- Extend the open episodes with today's row
+    UPDATE clinical.inpatient_episodes e
+    SET last_seen_date         = p_census_date,
+        census_days            = e.census_days + 1,
+        admission_date         = COALESCE(e.admission_date, c.admission_date),
+        last_ward_id           = c.ward_id,
+        ward_ids               = CASE WHEN c.ward_id IS NULL OR c.ward_id = ANY (e.ward_ids)
+                                      THEN e.ward_ids ELSE e.ward_ids || c.ward_id END,
+        last_admitting_unit_id = c.admitting_unit_id,
+        expected_discharge     = c.expected_discharge,
+        los_days               = COALESCE(c.los_days, p_census_date - COALESCE(e.admission_date, c.admission_date)),
+        updated_at             = NOW()
+    FROM clinical.census_day_rows(p_census_date) c
+    WHERE c.patient_hash = e.patient_hash
+      AND e.discharged_by_date IS NULL;
+    GET DIAGNOSTICS v_continued = ROW_COUNT;
+
+    -- Open episodes for patients without one
+    INSERT INTO clinical.inpatient_episodes (
+        patient_hash, admission_date, first_seen_date, last_seen_date,
+        first_ward_id, last_ward_id, ward_ids,
+        admitting_unit_id, last_admitting_unit_id,
+        sex, age_band, expected_discharge, los_days
+    )
+    SELECT
+        c.patient_hash, c.admission_date, p_census_date, p_census_date,
+        c.ward_id, c.ward_id, CASE WHEN c.ward_id IS NULL THEN '{}' ELSE ARRAY[c.ward_id] END,
+        c.admitting_unit_id, c.admitting_unit_id,
+        c.sex, c.age_band, c.expected_discharge,
+        COALESCE(c.los_days, p_census_date - c.admission_date)
+    FROM clinical.census_day_rows(p_census_date) c
+    WHERE NOT EXISTS (
+        SELECT 1 FROM clinical.inpatient_episodes e
+        WHERE e.patient_hash = c.patient_hash
+          AND e.discharged_by_date IS NULL
+    );
+    GET DIAGNOSTICS v_opened = ROW_COUNT;
+
+    RAISE NOTICE 'Applied census % to inpatient episodes: % closed, % reopened, % continued, % opened',
+        p_census_date, v_closed, v_reopened, v_continued - v_reopened, v_opened;
+    RETURN v_opened;
+END;
+$$ LANGUAGE plpgsql
+-- WHY: the generic plan for a parameterised census_date scans the whole
+-- hypertable; a custom plan per call prunes to the day's chunk and rows
+SET plan_cache_mode = force_custom_plan;
+
+-- ============================================================================
+-- VIEWS
+-- ============================================================================
+
+-- Closed episodes with readmission flags: the patient's next episode
+-- starting within 28 days of this one's discharge
+CREATE OR REPLACE VIEW clinical.v_episode_readmissions AS
+SELECT
+    e.id AS episode_id,
+    e.patient_hash,
+    e.admission_date,
+    e.first_seen_date,
+    e.discharged_by_date,
+    e.admitting_unit_id,
+    e.last_ward_id,
+    e.los_days,
+    e.census_days,
+    nxt.first_seen_date - e.discharged_by_date AS days_to_next_admission,
+    COALESCE(nxt.first_seen_date - e.discharged_by_date <= 28, FALSE) AS readmitted_28d
+FROM clinical.inpatient_episodes e
+LEFT JOIN LATERAL (
+    SELECT n.first_seen_date
+    FROM clinical.inpatient_episodes n
+    WHERE n.patient_hash = e.patient_hash
+      AND n.first_seen_date >= e.discharged_by_date
+    ORDER BY n.first_seen_date
+    LIMIT 1
+) nxt ON TRUE
+WHERE e.discharged_by_date IS NOT NULL;
+
+COMMENT ON VIEW clinical.v_episode_readmissions IS 'Closed inpatient episodes with days to the next admission and a 28-day readmission flag';
+
+-- ============================================================================
+-- Backfill from the census still held (earlier days were dropped by
+-- retention, so episodes already open on the first day start there)
+-- ============================================================================
+SELECT COUNT(clinical.apply_census_day(census_date))
+FROM (SELECT DISTINCT census_date FROM clinical.inpatient_census ORDER BY census_date) d;
+
+COMMIT;
@@ -0,0 +1,51 @@
+-- ============================================================================
+-- Migration 017: Alert Rule Evaluation
+-- REdI Data Platform
+-- ============================================================================
+-- lib/alert_engine.py evaluates every active system.alert_rules row after
+-- each aggregate refresh and writes firings to system.alert_history in one
+-- statement. The pager pipeline re-evaluates every 15 minutes, so a firing
+-- is keyed by rule × period × group: re-evaluating the same day updates the
+-- existing firing instead of adding another one.
+--
+-- The two seeded compliance-slope rules gain certification-specific metrics
+-- (als_compliance_pct / bls_compliance_pct); compliance_pct alone evaluates
+-- both types.
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- ALERT HISTORY: firing key
+-- ============================================================================
+ALTER TABLE system.alert_history
+    ADD COLUMN period_date  DATE,           -- Day or snapshot the firing is for
+    ADD COLUMN group_key    VARCHAR(50);    -- e.g. "ward:12", "ALS:org_unit:3", "all"
+
+-- WHY: partial so rows written before this migration (no key) never clash
+CREATE UNIQUE INDEX idx_alert_hist_firing
+    ON system.alert_history (alert_rule_id, period_date, group_key)
+    WHERE period_date IS NOT NULL;
+
+CREATE INDEX idx_alert_hist_unsent
+    ON system.alert_history (fired_at)
+    WHERE NOT notification_sent;
+
+COMMENT ON COLUMN system.alert_history.period_date IS 'Period evaluated: event_date for escalation rules, snapshot_date for training rules';
+COMMENT ON COLUMN system.alert_history.group_key IS 'Group the rule fired for ("ward:<id>", "unit:<id>", "<cert>:org_unit:<id>", "all"); unique per rule and period';
+
+-- ============================================================================
+-- ALERT RULES: certification-specific compliance metrics
+-- ============================================================================
+UPDATE system.alert_rules
+SET metric = 'als_compliance_pct', updated_at = NOW()
+WHERE domain = 'training' AND metric = 'compliance_pct' AND name = 'Falling ALS Compliance';
+
+UPDATE system.alert_rules
+SET metric = 'bls_compliance_pct', updated_at = NOW()
+WHERE domain = 'training' AND metric = 'compliance_pct' AND name = 'Falling BLS Compliance';
+
+COMMENT ON COLUMN system.alert_rules.metric IS
+    'escalation: daily_escalation_count | daily_critical_count; training: compliance_pct | als_compliance_pct | bls_compliance_pct';
+
+COMMIT;
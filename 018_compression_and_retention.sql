@@ -0,0 +1,280 @@
+-- ============================================================================
+-- Migration 018: Hypertable Compression and Retention Policies
+-- REdI Data Platform
+-- ============================================================================
+-- On the B2s server, storage and I/O are the bottleneck. This migration:
+--   * enables native compression on the hypertables and continuous
+--     aggregates that hold more than a few thousand rows a year, with a
+--     compression policy per table;
+--   * sets chunk intervals to the actual daily volumes (§17);
+--   * replaces the 009 pg_cron drop_chunks, DELETE and weekly ANALYZE jobs
+--     with TimescaleDB retention policies and background jobs, so all
+--     housekeeping runs in the application database and shows up in
+--     timescaledb_information.jobs / job_stats.
+--
+-- Chunk interval changes only apply to chunks created from now on.
+-- Existing chunks are compressed by the policies on their first run.
+--
+-- benchmarks/bench_compression.py reports before/after sizes and scan times
+-- on a synthetic year of data.
+--
+-- Requires TimescaleDB 2.11+: the aggregate refreshes insert, upsert and
+-- delete into chunks that may already be compressed, and earlier versions
+-- reject DML on compressed chunks.
+-- ============================================================================
+
+BEGIN;
+
+DO $$
+DECLARE
+    v_version TEXT;
+BEGIN
+    SELECT extversion INTO v_version FROM pg_extension WHERE extname = 'timescaledb';
+    IF v_version IS NULL OR string_to_array(split_part(v_version, '-', 1), '.')::INT[] < ARRAY[2, 11] THEN
+        RAISE EXCEPTION 'Migration 018 needs TimescaleDB 2.11 or later (installed: %)', v_version;
+    END IF;
+END $$;
+
+-- ============================================================================
+-- CHUNK INTERVALS
+-- ============================================================================
+-- Daily volumes: census ~500, transfers ~50, pager raw ~1,000, events ~50,
+-- escalation_daily ~60, training_compliance ~10K per weekly snapshot.
+--
+-- Raw tables with 90-day retention keep short chunks so drop_chunks()
+-- follows the window closely (census and transfers monthly, pager raw
+-- weekly). Escalation events (1-year retention) and escalation_daily
+-- (indefinite) moved from monthly to quarterly chunks: a month is only
+-- ~1,500 rows, too few for compression to pay off and one more chunk for
+-- every query to plan. training_compliance stays quarterly (~130K rows).
+-- ============================================================================
+SELECT set_chunk_time_interval('escalation.events', INTERVAL '3 months');
+SELECT set_chunk_time_interval('agg.escalation_daily', INTERVAL '3 months');
+
+-- ============================================================================
+-- COMPRESSION
+-- ============================================================================
+-- segmentby: the column dashboards filter on, with enough rows per chunk
+-- and segment to fill compressed batches. orderby: time descending, as
+-- queries read the most recent days first.
+--
+-- Tables the refreshes write into (agg.escalation_daily,
+-- agg.training_compliance*) carry every unique-key column in segmentby or
+-- orderby. Otherwise each conflict check on a compressed chunk, for a late
+-- event or an older snapshot rebuilt, decompresses whole batches.
+--
+-- compress_after: past the window in which rows are still written or
+-- corrected (census reloads within a week, manual event re-classification
+-- within a month, late events folded into escalation_daily, compliance
+-- rebuilds), and for continuous aggregates past the refresh start_offset.
+--
+-- Not compressed: clinical.deaths, agg.course_activity,
+-- agg.faculty_activity and agg.deaths_monthly (a few hundred to a few
+-- thousand rows a year).
+-- ============================================================================
+
+-- Inpatient census: ~100 wards → ~150 rows per ward per monthly chunk
+ALTER TABLE clinical.inpatient_census SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = 'ward_id',
+    timescaledb.compress_orderby = 'census_date DESC, patient_hash'
+);
+SELECT add_compression_policy('clinical.inpatient_census', compress_after => INTERVAL '7 days');
+
+-- Transfers: ~1,500 rows a month, too few to segment
+ALTER TABLE clinical.transfers SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = '',
+    timescaledb.compress_orderby = 'transfer_date DESC, admitting_unit_id'
+);
+SELECT add_compression_policy('clinical.transfers', compress_after => INTERVAL '7 days');
+
+-- Raw pager messages: ~95% noise; segmenting on is_relevant lets
+-- relevant-message reads skip the noise batches entirely
+ALTER TABLE escalation.pager_messages_raw SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = 'is_relevant',
+    timescaledb.compress_orderby = 'message_time DESC'
+);
+SELECT add_compression_policy('escalation.pager_messages_raw', compress_after => INTERVAL '7 days');
+
+-- Escalation events: ~9 types → ~500 rows per type per quarterly chunk
+ALTER TABLE escalation.events SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = 'event_type_code',
+    timescaledb.compress_orderby = 'event_time DESC'
+);
+SELECT add_compression_policy('escalation.events', compress_after => INTERVAL '30 days');
+
+-- WHY: agg.refresh_escalation_daily_incremental() upserts late events into
+-- their event_date; 90 days keeps that path on uncompressed chunks
+ALTER TABLE agg.escalation_daily SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = 'grouping_level, event_type_code',
+    timescaledb.compress_orderby = 'event_date DESC, ward_id, admitting_unit_id, weekday, time_of_day_code'
+);
+SELECT add_compression_policy('agg.escalation_daily', compress_after => INTERVAL '90 days');
+
+ALTER TABLE agg.training_compliance SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = 'certification_type, grouping_level',
+    timescaledb.compress_orderby = 'snapshot_date DESC, org_unit_id, directorate, discipline_stream_code, job_family_code'
+);
+SELECT add_compression_policy('agg.training_compliance', compress_after => INTERVAL '90 days');
+
+ALTER TABLE agg.training_compliance_tracking_group SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = 'certification_type',
+    timescaledb.compress_orderby = 'snapshot_date DESC, tracking_group_id, discipline_stream_code'
+);
+SELECT add_compression_policy('agg.training_compliance_tracking_group', compress_after => INTERVAL '90 days');
+
+-- Read-only since 013
+ALTER TABLE agg.inpatient_daily_legacy SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = '',
+    timescaledb.compress_orderby = 'census_date DESC, ward_id, admitting_unit_id'
+);
+SELECT add_compression_policy('agg.inpatient_daily_legacy', compress_after => INTERVAL '90 days');
+
+-- Continuous aggregates: compress_after must exceed the refresh policy's
+-- start_offset (30 days, 013) so a refresh never rewrites compressed buckets
+ALTER MATERIALIZED VIEW agg.inpatient_census_daily SET (
+    timescaledb.compress = true,
+    timescaledb.compress_segmentby = 'ward_id',
+    timescaledb.compress_orderby = 'census_date DESC, admitting_unit_id'
+);
+SELECT add_compression_policy('agg.inpatient_census_daily', compress_after => INTERVAL '60 days');
+
+ALTER MATERIALIZED VIEW agg.transfers_daily SET (
+    timescaledb.compress = true,
+    timescaledb.compress_segmentby = '',
+    timescaledb.compress_orderby = 'transfer_date DESC, admitting_unit_id'
+);
+SELECT add_compression_policy('agg.transfers_daily', compress_after => INTERVAL '60 days');
+
+-- ============================================================================
+-- RETENTION POLICIES (replace the 009 drop_chunks cron jobs)
+-- ============================================================================
+-- Same windows as before. Each continuous aggregate's start_offset is still
+-- inside its raw table's window (013).
+SELECT add_retention_policy('clinical.inpatient_census', drop_after => INTERVAL '90 days');
+SELECT add_retention_policy('clinical.transfers', drop_after => INTERVAL '90 days');
+SELECT add_retention_policy('clinical.deaths', drop_after => INTERVAL '1 year');
+SELECT add_retention_policy('escalation.pager_messages_raw', drop_after => INTERVAL '90 days');
+SELECT add_retention_policy('escalation.events', drop_after => INTERVAL '1 year');
+
+-- ============================================================================
+-- BACKGROUND JOBS (replace the 009/015 DELETE and ANALYZE cron jobs)
+-- ============================================================================
+
+-- Row-level retention for ordinary tables. Windows come from the job config.
+CREATE OR REPLACE PROCEDURE system.purge_expired_rows(job_id INT, config JSONB)
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_cert_history  INTERVAL := COALESCE(config->>'cert_history', '2 years')::INTERVAL;
+    v_dq_flags      INTERVAL := COALESCE(config->>'data_quality_flags', '6 months')::INTERVAL;
+    v_import_log    INTERVAL := COALESCE(config->>'import_log_metadata', '1 year')::INTERVAL;
+    v_history       INT;
+    v_snapshots     INT;
+    v_flags         INT;
+    v_imports       INT;
+BEGIN
+    DELETE FROM training.staff_cert_history
+    WHERE valid_to_date < CURRENT_DATE - v_cert_history;
+    GET DIAGNOSTICS v_history = ROW_COUNT;
+
+    -- Snapshot headers once no landing rows reference them
+    DELETE FROM training.certification_snapshots cs
+    WHERE cs.snapshot_date < CURRENT_DATE - v_cert_history
+      AND NOT EXISTS (
+          SELECT 1 FROM training.staff_certifications sc
+          WHERE sc.snapshot_id = cs.id
+      );
+    GET DIAGNOSTICS v_snapshots = ROW_COUNT;
+
+    DELETE FROM system.data_quality_flags
+    WHERE created_at < CURRENT_TIMESTAMP - v_dq_flags;
+    GET DIAGNOSTICS v_flags = ROW_COUNT;
+
+    -- Keep the import_log rows, drop their bulky detail
+    UPDATE system.import_log
+    SET error_message = NULL, metadata = '{}'::jsonb
+    WHERE import_started_at < CURRENT_TIMESTAMP - v_import_log
+      AND (error_message IS NOT NULL OR metadata <> '{}'::jsonb);
+    GET DIAGNOSTICS v_imports = ROW_COUNT;
+
+    RAISE NOTICE 'purge_expired_rows: % cert history, % snapshot headers, % quality flags, % import logs',
+        v_history, v_snapshots, v_flags, v_imports;
+END;
+$$;
+
+COMMENT ON PROCEDURE system.purge_expired_rows(INT, JSONB) IS 'TimescaleDB job: row-level retention for staff_cert_history, certification_snapshots, data_quality_flags and import_log detail';
+
+-- ANALYZE the tables whose statistics drift between autovacuum runs. A
+-- table that does not exist (yet) is skipped.
+CREATE OR REPLACE PROCEDURE system.analyze_tables(job_id INT, config JSONB)
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_name  TEXT;
+    v_table REGCLASS;
+BEGIN
+    FOR v_name IN SELECT jsonb_array_elements_text(config->'tables') LOOP
+        v_table := to_regclass(v_name);
+        IF v_table IS NULL THEN
+            RAISE NOTICE 'analyze_tables: % not found, skipped', v_name;
+            CONTINUE;
+        END IF;
+        EXECUTE format('ANALYZE %s', v_table);
+    END LOOP;
+END;
+$$;
+
+COMMENT ON PROCEDURE system.analyze_tables(INT, JSONB) IS 'TimescaleDB job: ANALYZE the tables listed in config->tables';
+
+-- Sunday 04:00 and 05:00 AEST, as the cron jobs ran
+SELECT add_job(
+    'system.purge_expired_rows',
+    INTERVAL '1 week',
+    config => '{"cert_history": "2 years", "data_quality_flags": "6 months", "import_log_metadata": "1 year"}',
+    initial_start => (date_trunc('week', NOW() AT TIME ZONE 'Australia/Brisbane')
+                      + INTERVAL '6 days 4 hours') AT TIME ZONE 'Australia/Brisbane'
+);
+
+-- WHY: agg.inpatient_daily became a view in 013, which the old job's
+-- ANALYZE list still named
+SELECT add_job(
+    'system.analyze_tables',
+    INTERVAL '1 week',
+    config => '{"tables": ["training.staff_certifications", "training.staff_cert_history",
+                           "training.current_cert_status", "clinical.inpatient_census",
+                           "clinical.inpatient_episodes", "escalation.events",
+                           "agg.training_compliance", "agg.escalation_daily"]}',
+    initial_start => (date_trunc('week', NOW() AT TIME ZONE 'Australia/Brisbane')
+                      + INTERVAL '6 days 5 hours') AT TIME ZONE 'Australia/Brisbane'
+);
+
+COMMIT;
+
+-- ============================================================================
+-- Remove the superseded pg_cron jobs (stale-import-cleanup stays in pg_cron)
+-- ============================================================================
+-- If pg_cron lives in another database (see 009_scheduled_jobs.sql), remove
+-- the jobs there.
+DO $$
+BEGIN
+    IF to_regnamespace('cron') IS NULL THEN
+        RAISE NOTICE 'pg_cron not installed in this database; unschedule the 009 retention and weekly-analyze jobs manually';
+        RETURN;
+    END IF;
+
+    PERFORM cron.unschedule(jobname)
+    FROM cron.job
+    WHERE jobname IN (
+        'retention-inpatient-census', 'retention-transfers', 'retention-deaths',
+        'retention-pager-raw', 'retention-escalation-events',
+        'retention-staff-certs', 'retention-cert-snapshots',
+        'retention-dq-flags', 'retention-import-log', 'weekly-analyze'
+    );
+END;
+$$;
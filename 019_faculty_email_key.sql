@@ -0,0 +1,54 @@
+-- ============================================================================
+-- Migration 019: Faculty Member Upsert Key
+-- REdI Data Platform
+-- ============================================================================
+-- training.faculty_members had no unique key, so the seed loader's
+-- ON CONFLICT DO NOTHING never conflicted: every --load re-run added another
+-- copy of each member. source_id cannot be the key: FacultyList exports
+-- carry no item id, and source_id is the row's position in the list, which
+-- shifts whenever a row is added or removed. Members are matched by e-mail
+-- instead (idx_fm_email_key, created by 004 in new databases).
+--
+-- Databases created before that index have the duplicates already loaded:
+-- each is folded into the first row with the same e-mail (or, without one,
+-- the same name), and roster and rollup rows that point at a duplicate are
+-- moved to that row first.
+-- ============================================================================
+
+BEGIN;
+
+-- ============================================================================
+-- FOLD DUPLICATES
+-- ============================================================================
+CREATE TEMP TABLE faculty_duplicates ON COMMIT DROP AS
+SELECT id,
+       MIN(id) OVER (
+           PARTITION BY LOWER(email),
+                        CASE WHEN email IS NULL THEN given_name END,
+                        CASE WHEN email IS NULL THEN surname END
+       ) AS keep_id
+FROM training.faculty_members;
+
+DELETE FROM faculty_duplicates WHERE id = keep_id;
+
+UPDATE training.faculty_roster r
+SET faculty_member_id = d.keep_id
+FROM faculty_duplicates d
+WHERE r.faculty_member_id = d.id;
+
+UPDATE agg.faculty_activity a
+SET faculty_member_id = d.keep_id
+FROM faculty_duplicates d
+WHERE a.faculty_member_id = d.id;
+
+DELETE FROM training.faculty_members m
+USING faculty_duplicates d
+WHERE m.id = d.id;
+
+-- ============================================================================
+-- UPSERT KEY
+-- ============================================================================
+-- Same definition as 004; NULL e-mails do not clash
+CREATE UNIQUE INDEX IF NOT EXISTS idx_fm_email_key ON training.faculty_members (LOWER(email));
+
+COMMIT;
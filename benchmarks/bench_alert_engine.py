@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+REdI Data Platform — Alert Rule Evaluation Benchmark
+====================================================
+Cost of evaluating the alert rules over loaded series before and after
+lib/alert_engine.py:
+
+  legacy    per rule and group: slice the group's values in Python and
+            compute mean/stdev, quartiles and the slope with the statistics
+            module
+  numpy     alert_engine.evaluate(): every group of a rule at once on the
+            groups × periods matrix
+
+Series are synthetic: --wards ward rows, --units unit rows and one
+facility row of Poisson daily escalation counts over --days days, and
+--org-units org units × 2 certification types of weekly compliance %.
+Database loading is not included (see evaluate_rules()).
+
+Usage:
+    python3 benchmarks/bench_alert_engine.py
+    python3 benchmarks/bench_alert_engine.py --wards 2000 --org-units 5000
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from lib import alert_engine  # noqa: E402
+from lib.alert_engine import AlertRule, Series  # noqa: E402
+
+AS_OF = date(2026, 10, 17)
+
+RULES = [
+    AlertRule(1, "High Escalation Rate - Ward", "escalation", "daily_escalation_count", "ward", "z_score", 2.0, 30),
+    AlertRule(2, "High Escalation Rate - Unit", "escalation", "daily_escalation_count", "unit", "z_score", 2.0, 30),
+    AlertRule(3, "Escalation IQR - Ward", "escalation", "daily_escalation_count", "ward", "iqr", 1.5, 30),
+    AlertRule(4, "Falling Compliance", "training", "compliance_pct", "org_unit", "trend_slope", -0.5, 8),
+    AlertRule(5, "Critical Escalation Spike", "escalation", "daily_critical_count", None, "threshold", 10, 1),
+]
+
+
+def synthetic_series(wards, units, days, org_units, seed=1):
+    rng = np.random.default_rng(seed)
+    periods = [AS_OF - timedelta(days=n) for n in range(days - 1, -1, -1)]
+    groups = ([("ward", i) for i in range(wards)] + [("unit", i) for i in range(units)]
+              + [(None, None)])
+    counts = rng.poisson(4, (len(groups), days)).astype(np.float64)
+    series = [
+        Series("daily_escalation_count", periods, groups, counts),
+        Series("daily_critical_count", periods, groups, np.floor(counts / 2)),
+    ]
+    snapshots = [AS_OF - timedelta(weeks=n) for n in range(7, -1, -1)]
+    for cert_type in ("ALS", "BLS"):
+        declining = rng.random((org_units, 1)) < 0.05
+        pct = 80 + rng.normal(0, 1, (org_units, 8)) - declining * np.arange(8)
+        pct[rng.random(pct.shape) < 0.02] = np.nan
+        series.append(Series(f"{cert_type.lower()}_compliance_pct", snapshots,
+                             [("org_unit", i) for i in range(org_units)], pct,
+                             {"certification_type": cert_type}))
+    return series
+
+
+def legacy_evaluate(rules, series):
+    """(rule id, group key) pairs fired, one group at a time."""
+    fired = []
+    for rule in rules:
+        metrics = alert_engine.METRICS[rule.domain][rule.metric]
+        t = rule.threshold_value
+        for s in series:
+            if s.metric not in metrics:
+                continue
+            for i, (group_by, _) in enumerate(s.groups):
+                if group_by != rule.group_by:
+                    continue
+                row = s.values[i].tolist()
+                current = row[-1]
+                if current != current:
+                    continue
+                if rule.method == "threshold":
+                    hit = current > t if t >= 0 else current < t
+                elif rule.method == "trend_slope":
+                    pts = [(x, y) for x, y in enumerate(row[-rule.lookback_periods:]) if y == y]
+                    if len(pts) < alert_engine.MIN_TREND_PERIODS:
+                        continue
+                    slope = statistics.linear_regression(*zip(*pts)).slope
+                    hit = slope > t if t >= 0 else slope < t
+                else:
+                    base = [y for y in row[-rule.lookback_periods - 1:-1] if y == y]
+                    if len(base) < alert_engine.MIN_BASELINE_PERIODS:
+                        continue
+                    if rule.method == "z_score":
+                        spread = statistics.stdev(base)
+                        bound = statistics.mean(base) + t * spread
+                    else:
+                        q1, _, q3 = statistics.quantiles(base, n=4, method="inclusive")
+                        spread = q3 - q1
+                        bound = (q3 if t >= 0 else q1) + t * spread
+                    hit = spread > 0 and (current > bound if t >= 0 else current < bound)
+                if hit:
+                    fired.append((rule.id, s.group_key(i)))
+    return fired
+
+
+def timed(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    p.add_argument("--wards", type=int, default=150, help="Ward rows (default: 150)")
+    p.add_argument("--units", type=int, default=60, help="Admitting unit rows (default: 60)")
+    p.add_argument("--days", type=int, default=31, help="Days of escalation history (default: 31)")
+    p.add_argument("--org-units", type=int, default=400, help="Org units per certification type (default: 400)")
+    args = p.parse_args(argv)
+
+    series = synthetic_series(args.wards, args.units, args.days, args.org_units)
+    groups = sum(len(s.groups) for s in series)
+
+    legacy_s, legacy = timed(lambda: legacy_evaluate(RULES, series))
+    numpy_s, firings = timed(lambda: alert_engine.evaluate(RULES, series))
+    if sorted(legacy) != sorted((f.rule_id, f.group_key) for f in firings):
+        raise SystemExit("numpy: firings differ from legacy")
+
+    print(f"{len(RULES)} rules, {len(series)} series, {groups} group rows, {len(firings)} firings")
+    print(f"{'variant':<8} {'total ms':>9} {'speed-up':>9}")
+    print(f"{'legacy':<8} {legacy_s * 1000:>9.1f} {1:>8.1f}x")
+    print(f"{'numpy':<8} {numpy_s * 1000:>9.1f} {legacy_s / numpy_s:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
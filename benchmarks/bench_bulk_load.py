@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+REdI Data Platform — Bulk Load Benchmark
+========================================
+Cost of loading a census-shaped batch before and after lib/db.py
+bulk_load():
+
+  legacy    the reference batch_insert(): cur.executemany() of a
+            parameterised INSERT … ON CONFLICT over 500-row slices
+  bulk      bulk_load(): COPY into a staging table, then one
+            INSERT … SELECT … ON CONFLICT (pipelined INSERTs for batches
+            of PIPELINE_MAX_ROWS or fewer)
+
+Each variant loads --rows fresh rows (all inserted), then reloads them
+with a tenth changed (upsert: updated + skipped). --small repeats the
+same with batches of 50 rows, the size of a 15-minute pager load.
+
+Rows go to a temporary copy of clinical.inpatient_census with the
+(patient_hash, census_date) upsert key, inside a transaction that is
+rolled back, so the target database is left untouched.
+
+Usage:
+    python3 benchmarks/bench_bulk_load.py --dsn "host=... dbname=redi_platform"
+    python3 benchmarks/bench_bulk_load.py --dsn "..." --rows 200000
+"""
+
+import argparse
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import psycopg
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from lib.db import bulk_load  # noqa: E402
+
+TABLE = "bench_census"
+COLUMNS = ["import_id", "census_date", "patient_hash", "ward_id", "admitting_unit_id",
+           "bed", "sex", "age_band", "admission_date", "los_days"]
+KEY = ["patient_hash", "census_date"]
+UPDATE = ["ward_id", "admitting_unit_id", "bed", "los_days"]
+
+
+def census_rows(count, changed=0.0, start=0):
+    day = date(2026, 10, 17)
+    rows = []
+    for i in range(start, start + count):
+        moved = i % 100 < changed * 100
+        rows.append((1, day, f"{i:064x}", 1 + i % 100 + moved, 1 + i % 60,
+                     f"B{i % 30}", "MFU"[i % 3], "40-64", day - timedelta(days=i % 9),
+                     i % 9))
+    return rows
+
+
+def legacy_batch_insert(cur, records, batch_size=500):
+    """The reference implementation from redi-functions-spec.md §5.3."""
+    cols = ", ".join(COLUMNS)
+    placeholders = ", ".join(["%s"] * len(COLUMNS))
+    sets = ", ".join(f"{c} = EXCLUDED.{c}" for c in UPDATE)
+    sql = (f"INSERT INTO {TABLE} ({cols}) VALUES ({placeholders}) "
+           f"ON CONFLICT ({', '.join(KEY)}) DO UPDATE SET {sets}")
+    total = 0
+    for i in range(0, len(records), batch_size):
+        batch = records[i:i + batch_size]
+        cur.executemany(sql, batch)
+        total += len(batch)
+    return total
+
+
+def bulk(cur, records):
+    return bulk_load(cur, TABLE, COLUMNS, records, conflict=KEY, update=UPDATE)
+
+
+def run(cur, loader, fresh, reload, batch):
+    """Seconds to load `fresh` then `reload` in `batch`-row calls."""
+    cur.execute(f"TRUNCATE {TABLE}")
+    timings = []
+    for records in (fresh, reload):
+        start = time.perf_counter()
+        for i in range(0, len(records), batch):
+            loader(cur, records[i:i + batch])
+        timings.append(time.perf_counter() - start)
+    cur.execute(f"SELECT md5(string_agg(t::text, '' ORDER BY patient_hash)) FROM "
+                f"(SELECT {', '.join(COLUMNS)} FROM {TABLE}) t")
+    return timings, cur.fetchone()[0]
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    p.add_argument("--dsn", required=True, help="Database to run against (rolled back)")
+    p.add_argument("--rows", type=int, default=50000, help="Rows per load (default: 50000)")
+    p.add_argument("--small", type=int, default=5000,
+                   help="Rows loaded in 50-row batches (default: 5000)")
+    args = p.parse_args(argv)
+
+    with psycopg.connect(args.dsn) as conn, conn.cursor() as cur:
+        cur.execute(f"CREATE TEMP TABLE {TABLE} (LIKE clinical.inpatient_census INCLUDING DEFAULTS)")
+        cur.execute(f"CREATE UNIQUE INDEX ON {TABLE} ({', '.join(KEY)})")
+
+        print(f"{'load':<14} {'variant':<8} {'fresh s':>8} {'reload s':>9} {'speed-up':>9}")
+        for label, rows, batch in (("large batch", args.rows, args.rows),
+                                   ("50-row batches", args.small, 50)):
+            fresh = census_rows(rows)
+            reload = census_rows(rows, changed=0.1)
+            base, expected = run(cur, legacy_batch_insert, fresh, reload, batch)
+            for name, loader in (("legacy", legacy_batch_insert), ("bulk", bulk)):
+                timings, digest = (base, expected) if name == "legacy" else run(
+                    cur, loader, fresh, reload, batch)
+                if digest != expected:
+                    raise SystemExit(f"{name}: table contents differ from legacy")
+                print(f"{label:<14} {name:<8} {timings[0]:>8.3f} {timings[1]:>9.3f} "
+                      f"{sum(base) / sum(timings):>8.1f}x")
+
+        cur.execute(f"TRUNCATE {TABLE}")
+        bulk(cur, census_rows(args.rows // 2))
+        result = bulk(cur, census_rows(args.rows, changed=0.1))
+        print(f"Half new, a tenth of the rest changed: {result!r}")
+        conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
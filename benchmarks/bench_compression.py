@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+REdI Data Platform — Hypertable Compression Benchmark
+=====================================================
+Storage and scan cost of the hypertables before and after the
+018_compression_and_retention.sql compression policies:
+
+  before    every chunk uncompressed, as on a 001–017 database
+  after     each compression policy run once (CALL run_job), so every
+            chunk older than its compress_after is compressed
+
+A synthetic --days of data at the §17 daily volumes is generated
+server-side (census, transfers, deaths, raw pager messages, escalation
+events, weekly training_compliance rows), the escalation_daily rollup and
+the continuous aggregates are refreshed, and the report lists total size
+per hypertable and the median time of the dashboard-style queries below.
+
+Run against a scratch database migrated through 018: the synthetic rows
+are not removed. Compression, retention and refresh jobs are paused while
+the benchmark runs and restored afterwards.
+
+Usage:
+    python3 benchmarks/bench_compression.py --dsn "host=... dbname=redi_bench"
+    python3 benchmarks/bench_compression.py --dsn "..." --days 730 --repeat 9
+"""
+
+import argparse
+import statistics
+import time
+
+import psycopg
+
+HYPERTABLES = [
+    "clinical.inpatient_census",
+    "clinical.transfers",
+    "clinical.deaths",
+    "escalation.pager_messages_raw",
+    "escalation.events",
+    "agg.escalation_daily",
+    "agg.training_compliance",
+    "agg.inpatient_census_daily",
+    "agg.transfers_daily",
+]
+
+QUERIES = [
+    ("census by ward, 60 days",
+     "SELECT ward_id, COUNT(*) FROM clinical.inpatient_census "
+     "WHERE census_date >= CURRENT_DATE - 60 GROUP BY ward_id"),
+    ("census_daily by ward, 60 days",
+     "SELECT ward_id, SUM(patient_count) FROM agg.inpatient_census_daily "
+     "WHERE census_date >= CURRENT_DATE - 60 GROUP BY ward_id"),
+    ("relevant pager messages, 60 days",
+     "SELECT COUNT(*) FROM escalation.pager_messages_raw "
+     "WHERE is_relevant AND message_time >= NOW() - INTERVAL '60 days'"),
+    ("events by type, 1 year",
+     "SELECT event_type_code, COUNT(*) FROM escalation.events "
+     "WHERE event_date >= CURRENT_DATE - 365 GROUP BY event_type_code"),
+    ("escalation_daily trend, 1 year",
+     "SELECT event_date, event_type_code, event_count FROM agg.escalation_daily "
+     "WHERE grouping_level = 'event_type' AND event_date >= CURRENT_DATE - 365"),
+    ("ALS facility compliance trend",
+     "SELECT snapshot_date, compliance_pct FROM agg.training_compliance "
+     "WHERE grouping_level = 'facility' AND certification_type = 'ALS' "
+     "ORDER BY snapshot_date"),
+]
+
+BENCH_PREFIX = "BENCH-"
+ORG_UNIT_BASE = 990000000
+
+
+# ---------------------------------------------------------------------------
+# Synthetic data
+# ---------------------------------------------------------------------------
+def seed_reference(cur, wards, units, org_units):
+    cur.execute(
+        "INSERT INTO core.wards (code, name) "
+        "SELECT %s || 'W' || n, 'Bench ward ' || n FROM generate_series(1, %s) n "
+        "ON CONFLICT (code) DO NOTHING",
+        (BENCH_PREFIX, wards),
+    )
+    cur.execute(
+        "INSERT INTO core.admitting_units (code, name) "
+        "SELECT %s || 'U' || n, 'Bench unit ' || n FROM generate_series(1, %s) n "
+        "ON CONFLICT (code) DO NOTHING",
+        (BENCH_PREFIX, units),
+    )
+    cur.execute(
+        "INSERT INTO core.org_units (id, name, directorate) "
+        "SELECT %s + n, 'Bench org unit ' || n, 'D' || (n %% 8) "
+        "FROM generate_series(1, %s) n ON CONFLICT (id) DO NOTHING",
+        (ORG_UNIT_BASE, org_units),
+    )
+    cur.execute(
+        "INSERT INTO system.import_log (source_type, source_filename, status) "
+        "VALUES ('benchmark', 'bench_compression.py', 'completed') RETURNING id"
+    )
+    return cur.fetchone()[0]
+
+
+def generate(cur, import_id, days):
+    """Insert --days of synthetic rows ending today; return {table: rows}."""
+    params = {"import_id": import_id, "days": days, "prefix": BENCH_PREFIX + "%"}
+    ids = (
+        "WITH w AS (SELECT array_agg(id) AS a FROM core.wards WHERE code LIKE %(prefix)s), "
+        "u AS (SELECT array_agg(id) AS a FROM core.admitting_units WHERE code LIKE %(prefix)s), "
+        "d AS (SELECT (CURRENT_DATE - g)::date AS day FROM generate_series(0, %(days)s - 1) g) "
+    )
+    statements = {
+        "clinical.inpatient_census": ids + """
+            INSERT INTO clinical.inpatient_census (
+                import_id, census_date, patient_hash, ward_id, admitting_unit_id,
+                bed, sex, age_band, admission_date, los_days)
+            SELECT %(import_id)s, d.day, md5(((d.day - (n %% 7)) || ':' || n)::text),
+                   w.a[1 + n %% cardinality(w.a)], u.a[1 + (n * 7) %% cardinality(u.a)],
+                   'B' || (n %% 30), (ARRAY['M', 'F', 'U'])[1 + n %% 3],
+                   (ARRAY['18-39', '40-64', '65-79', '80+'])[1 + n %% 4],
+                   d.day - (n %% 7), n %% 7
+            FROM d, w, u, generate_series(1, 500) n""",
+        "clinical.transfers": ids + """
+            INSERT INTO clinical.transfers (
+                import_id, transfer_date, patient_hash, sex, source_hospital,
+                admitting_unit_id, admission_ward_id, current_ward_id, weekday)
+            SELECT %(import_id)s, d.day, md5('t:' || d.day || ':' || n),
+                   (ARRAY['M', 'F'])[1 + n %% 2], 'Hospital ' || (n %% 12),
+                   u.a[1 + n %% cardinality(u.a)], w.a[1 + n %% cardinality(w.a)],
+                   w.a[1 + (n * 3) %% cardinality(w.a)], to_char(d.day, 'FMDay')
+            FROM d, w, u, generate_series(1, 50) n""",
+        "clinical.deaths": ids + """
+            INSERT INTO clinical.deaths (
+                import_id, report_month, patient_hash, admitting_unit_id,
+                discharge_unit_id, admission_date, discharge_date, los_days)
+            SELECT %(import_id)s, date_trunc('month', d.day)::date, md5('d:' || d.day),
+                   u.a[1 + extract(doy FROM d.day)::int %% cardinality(u.a)],
+                   u.a[1 + extract(doy FROM d.day)::int %% cardinality(u.a)],
+                   d.day - 5, d.day, 5
+            FROM d, u""",
+        "escalation.pager_messages_raw": ids + """
+            INSERT INTO escalation.pager_messages_raw (
+                import_id, source_id, message_time, pager_address, message_text,
+                source, is_relevant, processing_status)
+            SELECT %(import_id)s, n, d.day + make_interval(secs => n * 86.4),
+                   (1234500 + n %% 150)::text,
+                   CASE WHEN n %% 20 = 0 THEN 'MET CALL WARD ' || (n %% 40) || ' BED ' || (n %% 30)
+                        ELSE 'Periodical paging system test ' || n END,
+                   'UNK', n %% 20 = 0, 'processed'
+            FROM d, generate_series(1, 1000) n""",
+        "escalation.events": ids + """
+            , t AS (SELECT array_agg(code ORDER BY code) AS a FROM system.lookup_escalation_type)
+            INSERT INTO escalation.events (
+                event_time, event_date, event_type_code, ward_id, ward_confidence,
+                admitting_unit_id, reason, weekday, parsing_method)
+            SELECT d.day + make_interval(mins => n * 28), d.day,
+                   t.a[1 + n %% cardinality(t.a)], w.a[1 + n %% cardinality(w.a)], 'known',
+                   u.a[1 + n %% cardinality(u.a)], 'SBP below 100', to_char(d.day, 'FMDay'),
+                   'regex'
+            FROM d, w, u, t, generate_series(1, 50) n""",
+        "agg.training_compliance": """
+            INSERT INTO agg.training_compliance (
+                snapshot_date, certification_type, grouping_level, org_unit_id, directorate,
+                total_staff, compliant_count, non_compliant_count, compliance_pct)
+            SELECT s.day, c.cert, CASE WHEN o.n = 0 THEN 'facility' ELSE 'org_unit' END,
+                   NULLIF(%(org_base)s + o.n, %(org_base)s),
+                   CASE WHEN o.n = 0 THEN NULL ELSE 'D' || (o.n %% 8) END,
+                   100, 80 + o.n %% 20, 20 - o.n %% 20, 80 + o.n %% 20
+            FROM (SELECT (CURRENT_DATE - 7 * g)::date AS day
+                  FROM generate_series(0, %(days)s / 7) g) s,
+                 (VALUES ('ALS'), ('BLS')) c (cert),
+                 (SELECT 0 AS n UNION ALL SELECT id - %(org_base)s FROM core.org_units
+                  WHERE id > %(org_base)s) o""",
+    }
+    params["org_base"] = ORG_UNIT_BASE
+    rows = {}
+    cur.execute("SELECT escalation.lock_event_load()")
+    for table, sql in statements.items():
+        cur.execute(sql, params)
+        rows[table] = cur.rowcount
+    cur.execute("SELECT agg.refresh_escalation_daily_incremental()")
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Jobs
+# ---------------------------------------------------------------------------
+def pause_jobs(cur):
+    """Unschedule the policy jobs; return [(job_id, scheduled)] to restore."""
+    cur.execute(
+        "SELECT job_id, scheduled FROM timescaledb_information.jobs "
+        "WHERE proc_name IN ('policy_compression', 'policy_retention', "
+        "'policy_refresh_continuous_aggregate')"
+    )
+    jobs = cur.fetchall()
+    for job_id, _ in jobs:
+        cur.execute("SELECT alter_job(%s, scheduled => false)", (job_id,))
+    return jobs
+
+
+def restore_jobs(cur, jobs):
+    for job_id, scheduled in jobs:
+        cur.execute("SELECT alter_job(%s, scheduled => %s)", (job_id, scheduled))
+
+
+def compress_all(cur):
+    """Run every compression policy once; return the number of jobs run."""
+    cur.execute(
+        "SELECT job_id FROM timescaledb_information.jobs "
+        "WHERE proc_name = 'policy_compression' ORDER BY job_id"
+    )
+    jobs = [r[0] for r in cur.fetchall()]
+    for job_id in jobs:
+        cur.execute("CALL run_job(%s)", (job_id,))
+    return len(jobs)
+
+
+# ---------------------------------------------------------------------------
+# Measurements
+# ---------------------------------------------------------------------------
+def table_sizes(cur):
+    """Total bytes per hypertable; a continuous aggregate is measured on its
+    materialization hypertable."""
+    cur.execute(
+        "SELECT view_schema || '.' || view_name, "
+        "materialization_hypertable_schema || '.' || materialization_hypertable_name "
+        "FROM timescaledb_information.continuous_aggregates"
+    )
+    storage = dict(cur.fetchall())
+    sizes = {}
+    for name in HYPERTABLES:
+        cur.execute("SELECT total_bytes FROM hypertable_detailed_size(%s)",
+                    (storage.get(name, name),))
+        sizes[name] = cur.fetchone()[0] or 0
+    return sizes
+
+
+def query_times(cur, repeat):
+    """Median milliseconds per query over `repeat` runs (after one warm-up)."""
+    times = {}
+    for label, sql in QUERIES:
+        cur.execute(sql)
+        cur.fetchall()
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            cur.execute(sql)
+            cur.fetchall()
+            runs.append(time.perf_counter() - start)
+        times[label] = statistics.median(runs) * 1000
+    return times
+
+
+def analyze(cur):
+    for name in HYPERTABLES:
+        cur.execute(f"ANALYZE {name}")
+
+
+def mb(n):
+    return n / (1024 * 1024)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    p.add_argument("--dsn", required=True, help="Scratch database migrated through 018")
+    p.add_argument("--days", type=int, default=365, help="Days of synthetic data (default: 365)")
+    p.add_argument("--wards", type=int, default=100, help="Synthetic wards (default: 100)")
+    p.add_argument("--units", type=int, default=60, help="Synthetic admitting units (default: 60)")
+    p.add_argument("--org-units", type=int, default=2000,
+                   help="Synthetic org units per compliance snapshot (default: 2000)")
+    p.add_argument("--repeat", type=int, default=5, help="Runs per query (default: 5)")
+    args = p.parse_args(argv)
+
+    with psycopg.connect(args.dsn, autocommit=True) as conn, conn.cursor() as cur:
+        cur.execute("SELECT EXISTS (SELECT 1 FROM clinical.inpatient_census)")
+        if cur.fetchone()[0]:
+            raise SystemExit("clinical.inpatient_census is not empty; use a scratch database")
+
+        jobs = pause_jobs(cur)
+        try:
+            start = time.perf_counter()
+            import_id = seed_reference(cur, args.wards, args.units, args.org_units)
+            rows = generate(cur, import_id, args.days)
+            for view in ("agg.inpatient_census_daily", "agg.transfers_daily"):
+                cur.execute("CALL refresh_continuous_aggregate(%s, NULL, NULL)", (view,))
+            analyze(cur)
+            print(f"Generated {sum(rows.values())} rows over {args.days} days "
+                  f"in {time.perf_counter() - start:.1f} s")
+
+            size_before = table_sizes(cur)
+            time_before = query_times(cur, args.repeat)
+
+            start = time.perf_counter()
+            ran = compress_all(cur)
+            analyze(cur)
+            print(f"Ran {ran} compression policies in {time.perf_counter() - start:.1f} s")
+
+            size_after = table_sizes(cur)
+            time_after = query_times(cur, args.repeat)
+        finally:
+            restore_jobs(cur, jobs)
+
+    print()
+    print(f"| {'hypertable':<32} | {'before MB':>9} | {'after MB':>8} | {'ratio':>6} |")
+    print(f"|{'-' * 34}|{'-' * 11}|{'-' * 10}|{'-' * 8}|")
+    for name in HYPERTABLES:
+        before, after = size_before[name], size_after[name]
+        ratio = f"{before / after:.1f}x" if after else "-"
+        print(f"| {name:<32} | {mb(before):>9.2f} | {mb(after):>8.2f} | {ratio:>6} |")
+    total_before, total_after = sum(size_before.values()), sum(size_after.values())
+    print(f"| {'total':<32} | {mb(total_before):>9.2f} | {mb(total_after):>8.2f} | "
+          f"{total_before / total_after:>5.1f}x |")
+
+    print()
+    print(f"| {'query':<34} | {'before ms':>9} | {'after ms':>8} | {'speed-up':>8} |")
+    print(f"|{'-' * 36}|{'-' * 11}|{'-' * 10}|{'-' * 10}|")
+    for label, _ in QUERIES:
+        before, after = time_before[label], time_after[label]
+        print(f"| {label:<34} | {before:>9.1f} | {after:>8.1f} | {before / after:>7.1f}x |")
+
+
+if __name__ == "__main__":
+    main()
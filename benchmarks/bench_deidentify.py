@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+REdI Data Platform — Patient Hashing Benchmark
+===============================================
+Cost of patient de-identification hashing before and after lib/deidentify.py:
+
+  legacy    hashlib.sha256(f"{salt}:{urn}") from scratch on every call
+  prefix    PatientHasher with the cache disabled (salt prefix copied)
+  cached    PatientHasher.hash() with the bounded LRU
+  batch     PatientHasher.hash_many(), in-process and on --workers processes
+
+The daily case replays a census of --census patients for --days days with
+--turnover of patients replaced each day. The backfill case hashes --rows
+distinct identifiers, as after a salt rotation.
+
+Usage:
+    python3 benchmarks/bench_deidentify.py
+    python3 benchmarks/bench_deidentify.py --rows 2000000 --workers 4
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from lib import deidentify  # noqa: E402
+from lib.deidentify import PatientHasher  # noqa: E402
+
+SALT = "benchmark-salt-not-a-secret"
+
+
+def legacy_hash(identifier):
+    if not identifier or str(identifier).strip() == "":
+        return None
+    return hashlib.sha256(f"{SALT}:{identifier}".encode()).hexdigest()
+
+
+def census_days(patients, days, turnover, seed=1):
+    """Daily URN lists: each day keeps (1 - turnover) of yesterday's patients."""
+    rng = random.Random(seed)
+    next_urn = 1000000
+    current = []
+    for _ in range(patients):
+        current.append(str(next_urn))
+        next_urn += 1
+    out = []
+    for _ in range(days):
+        out.append(list(current))
+        for i in rng.sample(range(patients), int(patients * turnover)):
+            current[i] = str(next_urn)
+            next_urn += 1
+    return out
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    p.add_argument("--census", type=int, default=500, help="Patients per census day (default: 500)")
+    p.add_argument("--days", type=int, default=365, help="Census days replayed (default: 365)")
+    p.add_argument("--turnover", type=float, default=0.2, help="Daily fraction of new patients")
+    p.add_argument("--rows", type=int, default=1000000, help="Backfill identifiers (default: 1000000)")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                   help="Worker processes for the parallel backfill")
+    args = p.parse_args(argv)
+
+    print(f"CPUs: {os.cpu_count()}")
+    print(f"{'case':<9} {'variant':<12} {'total s':>8} {'ns/hash':>8} {'speed-up':>9}")
+
+    def report(case, rows, results):
+        baseline = expected = None
+        for name, (elapsed, result) in results:
+            if expected is None:
+                baseline, expected = elapsed, result
+            elif result != expected:
+                raise SystemExit(f"{case}/{name}: hashes differ from legacy")
+            print(f"{case:<9} {name:<12} {elapsed:>8.3f} {elapsed / rows * 1e9:>8.0f} "
+                  f"{baseline / elapsed:>8.1f}x")
+
+    # --- Daily census -------------------------------------------------------
+    days = census_days(args.census, args.days, args.turnover)
+    rows = sum(len(d) for d in days)
+    uncached = PatientHasher(SALT, cache_size=0)
+    cached = PatientHasher(SALT)
+    report("daily", rows, [
+        ("legacy", timed(lambda: [[legacy_hash(u) for u in d] for d in days])),
+        ("prefix", timed(lambda: [[uncached.hash(u) for u in d] for d in days])),
+        ("cached", timed(lambda: [[cached.hash(u) for u in d] for d in days])),
+        ("batch", timed(lambda: [cached.hash_many(d) for d in days])),
+    ])
+    info = cached.cache_info()
+    print(f"          LRU hits {info.hits}, misses {info.misses}, size {info.currsize}/{info.maxsize}")
+
+    # --- Salt-rotation backfill ---------------------------------------------
+    urns = [str(10000000 + i) for i in range(args.rows)]
+    hasher = PatientHasher(SALT)
+    variants = [
+        ("legacy", timed(lambda: [legacy_hash(u) for u in urns])),
+        ("batch", timed(lambda: hasher.hash_many(urns))),
+    ]
+    if args.workers > 1 and args.rows >= deidentify.PARALLEL_MIN_ROWS:
+        variants.append((f"batch x{args.workers}",
+                         timed(lambda: hasher.hash_many(urns, workers=args.workers))))
+    report("backfill", args.rows, variants)
+
+
+if __name__ == "__main__":
+    main()
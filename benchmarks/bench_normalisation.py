@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+REdI Data Platform — Normalisation Micro-benchmark
+===================================================
+Per-row cost of the label mappers and date/time parsing used by the seed
+generator and the parse activities, before and after lib/mapping.py:
+
+  legacy  mapping dict rebuilt on every call; datetime.strptime per cell
+  cached  lib.mapping per-value API (tables built once, LRU-cached parsing)
+  batch   lib.mapping column API (map_many, parse_dates, parse_times)
+
+Columns are synthetic but shaped like the exports: a handful of distinct
+labels and a few hundred distinct dates repeated across every row.
+
+Usage:
+    python3 benchmarks/bench_normalisation.py
+    python3 benchmarks/bench_normalisation.py --rows 500000 --repeat 5
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from lib import mapping  # noqa: E402
+
+
+# ---------------------------------------------------------------------------
+# Legacy implementations (as in generate_seed_data.py before lib/mapping.py)
+# ---------------------------------------------------------------------------
+def legacy_map_job_family(source_label):
+    mapping = {
+        "Medical": "medical",
+        "Visiting Medical Staff": "visiting_medical",
+        "Registered / Clinical Nurse - Grades 5-6": "rn_cn_5_6",
+        "Enrolled Nurses - Grades 3-4": "en_3_4",
+        "Assistant In Nursing - Grades 1-2": "ain_1_2",
+        "Nurse Manager - Grade 7-8": "nm_7_8",
+        "Nurse Executive - Grade 9-13": "ne_9_13",
+        "Health Practitioners": "health_prac",
+        "Health Clinical Assistants": "health_clin_asst",
+        "Managerial and Clerical": "admin_clerical",
+    }
+    return mapping.get(source_label)
+
+
+def legacy_to_date(val, fmt="%d/%m/%Y"):
+    if val is None or (isinstance(val, str) and val.strip() == ""):
+        return None
+    try:
+        return datetime.strptime(val.strip(), fmt).date()
+    except (ValueError, TypeError):
+        return None
+
+
+def legacy_duration(start, end):
+    if start and end:
+        try:
+            s = datetime.strptime(start, "%H:%M")
+            e = datetime.strptime(end, "%H:%M")
+            return round((e - s).seconds / 3600, 2)
+        except ValueError:
+            pass
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Synthetic columns
+# ---------------------------------------------------------------------------
+def make_columns(rows, seed=1):
+    rng = random.Random(seed)
+    labels = list(mapping.map_job_family.table) + ["", "Unknown Family"]
+    day0 = datetime(2024, 1, 1)
+    dates = [(day0 + timedelta(days=i)).strftime("%d/%m/%Y") for i in range(400)] + [""]
+    times = [f"{h:02d}:{m:02d}" for h in range(7, 18) for m in (0, 30)]
+    return (
+        [rng.choice(labels) for _ in range(rows)],
+        [rng.choice(dates) for _ in range(rows)],
+        [rng.choice(times) for _ in range(rows)],
+        [rng.choice(times) for _ in range(rows)],
+    )
+
+
+def best(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        mapping.clear_parse_cache()
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    p.add_argument("--rows", type=int, default=200000, help="Rows per column (default: 200000)")
+    p.add_argument("--repeat", type=int, default=3, help="Timed runs per case (best is reported)")
+    args = p.parse_args(argv)
+
+    families, dates, starts, ends = make_columns(args.rows)
+    parse_time = mapping.parse_time
+    cases = [
+        ("job family", [
+            ("legacy", lambda: [legacy_map_job_family(v) for v in families]),
+            ("cached", lambda: [mapping.map_job_family(v) for v in families]),
+            ("batch", lambda: mapping.map_job_family.map_many(families)),
+        ]),
+        ("date dd/mm/yyyy", [
+            ("legacy", lambda: [legacy_to_date(v) for v in dates]),
+            ("cached", lambda: [mapping.parse_date(v) for v in dates]),
+            ("batch", lambda: mapping.parse_dates(dates)),
+        ]),
+        ("course duration", [
+            ("legacy", lambda: [legacy_duration(s, e) for s, e in zip(starts, ends)]),
+            ("cached", lambda: [mapping.duration_hours(parse_time(s), parse_time(e))
+                                for s, e in zip(starts, ends)]),
+            ("batch", lambda: list(map(mapping.duration_hours,
+                                       mapping.parse_times(starts), mapping.parse_times(ends)))),
+        ]),
+    ]
+
+    print(f"{args.rows} rows, best of {args.repeat}")
+    print(f"{'column':<17} {'variant':<7} {'total s':>8} {'ns/row':>8} {'speed-up':>9}")
+    for column, variants in cases:
+        baseline = None
+        expected = None
+        for name, fn in variants:
+            elapsed, result = best(fn, args.repeat)
+            if expected is None:
+                baseline, expected = elapsed, result
+            elif result != expected:
+                raise SystemExit(f"{column}/{name}: results differ from legacy")
+            print(f"{column:<17} {name:<7} {elapsed:>8.3f} {elapsed / args.rows * 1e9:>8.0f} "
+                  f"{baseline / elapsed:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+REdI Data Platform — Pager Prefilter Benchmark
+==============================================
+Cost of the load_raw_messages relevance filter before and after
+lib/pager_filter.py:
+
+  legacy    per message: parse the capcode, scan every allowlist range and
+            alias, then run each noise regex in turn
+  single    PagerPrefilter.classify() per message (interval index, memo,
+            fused regex)
+  batch     PagerPrefilter.classify_many() over the whole backfill
+
+Messages are synthetic Pagermon history: --relevant of them go to allowed
+capcodes, a share of those are "Periodical paging system" test pages, and
+the rest go to --capcodes other capcodes spread over the POCSAG address
+space (a feed repeats the same capcodes). --ranges allowlist
+ranges and --aliases pager_aliases rows make the index realistic.
+
+Usage:
+    python3 benchmarks/bench_pager_filter.py
+    python3 benchmarks/bench_pager_filter.py --messages 5000000 --ranges 200
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from lib import pager_filter  # noqa: E402
+from lib.pager_filter import (  # noqa: E402
+    ADDRESS_DENIED, ADDRESS_NOT_ALLOWED, NOISE, RELEVANT, CapcodeIndex, PagerPrefilter,
+)
+
+CAPCODE_MAX = 2097151          # 21-bit POCSAG address space
+SYSTEM_TEST = [(42463, 42463), (1999999, 1999999)]
+
+CLINICAL_TEXT = [
+    "MET CALL WARD 7A BED 12 RESP DISTRESS",
+    "CODE BLUE ICU BED 4",
+    "RAPID RESPONSE 9B HYPOTENSION SBP 80",
+    "MET 5C BED 21 ?SEPSIS HR 140",
+]
+NOISE_TEXT = [
+    "Periodical paging system test 0600",
+    "TEST",
+    "   ",
+    "CALL EXT 4455 RE DELIVERY",
+]
+
+
+def allowlist(ranges, seed=1):
+    """--ranges disjoint 50-capcode ranges, starting with the spec's two."""
+    rng = random.Random(seed)
+    out = [(1234500, 1234599), (1234600, 1234649)]
+    while len(out) < ranges:
+        lo = rng.randrange(0, CAPCODE_MAX - 50)
+        if all(hi < lo or lo + 49 < l for l, hi in out):
+            out.append((lo, lo + 49))
+    return out
+
+
+def alias_rows(allow, count, seed=2):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        lo, hi = allow[i % len(allow)]
+        rows.append({
+            "pager_address": str(rng.randint(lo, hi)),
+            "alias_name": f"Alias {i}",
+            "team_or_group": None,
+            "is_broadcast": False,
+            "is_active": rng.random() > 0.05,
+        })
+    return rows
+
+
+def messages(count, allow, relevant, capcodes, seed=3):
+    rng = random.Random(seed)
+    others = [str(rng.randint(0, CAPCODE_MAX)) for _ in range(capcodes)]
+    out = []
+    for _ in range(count):
+        if rng.random() < relevant:
+            lo, hi = rng.choice(allow)
+            address = str(rng.randint(lo, hi))
+            text = rng.choice(NOISE_TEXT if rng.random() < 0.2 else CLINICAL_TEXT)
+        else:
+            address = rng.choice(others)
+            text = rng.choice(NOISE_TEXT + CLINICAL_TEXT)
+        out.append({"pager_address": address, "message_text": text})
+    return out
+
+
+def legacy_classifier(allow, deny, aliases):
+    """Per-message range scan and one regex per noise pattern."""
+    noise = [re.compile(p, re.IGNORECASE | re.DOTALL) for p in pager_filter.NOISE_PATTERNS]
+    inactive = [int(a["pager_address"]) for a in aliases if not a["is_active"]]
+
+    def classify(msg):
+        address = msg["pager_address"].strip()
+        if not address.isdigit():
+            return ADDRESS_NOT_ALLOWED
+        code = int(address)
+        for lo, hi in deny:
+            if lo <= code <= hi:
+                return ADDRESS_DENIED
+        if not any(lo <= code <= hi for lo, hi in allow):
+            return ADDRESS_NOT_ALLOWED
+        if code in inactive:
+            return ADDRESS_DENIED
+        text = msg["message_text"]
+        if text is None or any(p.match(text) for p in noise):
+            return NOISE
+        return RELEVANT
+
+    return classify
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    p.add_argument("--messages", type=int, default=2000000, help="Messages classified (default: 2000000)")
+    p.add_argument("--ranges", type=int, default=40, help="Allowlist ranges (default: 40)")
+    p.add_argument("--aliases", type=int, default=500, help="pager_aliases rows (default: 500)")
+    p.add_argument("--relevant", type=float, default=0.05,
+                   help="Fraction of messages to allowed capcodes (default: 0.05)")
+    p.add_argument("--capcodes", type=int, default=5000,
+                   help="Distinct capcodes the other messages go to (default: 5000)")
+    args = p.parse_args(argv)
+
+    allow = allowlist(args.ranges)
+    aliases = alias_rows(allow, args.aliases)
+    batch = messages(args.messages, allow, args.relevant, args.capcodes)
+
+    elapsed, index = timed(lambda: CapcodeIndex(allow, SYSTEM_TEST, aliases))
+    print(f"Index: {len(index)} intervals from {len(allow)} ranges + {len(aliases)} aliases "
+          f"in {elapsed * 1000:.1f} ms")
+
+    legacy = legacy_classifier(allow, SYSTEM_TEST, aliases)
+    single = PagerPrefilter(index)
+    fused = PagerPrefilter(index)
+    results = [
+        ("legacy", timed(lambda: [legacy(m) for m in batch])),
+        ("single", timed(lambda: [single.classify(m["pager_address"], m["message_text"])
+                                  for m in batch])),
+        ("batch", timed(lambda: fused.classify_many(batch))),
+    ]
+
+    print(f"{'variant':<8} {'total s':>8} {'ns/msg':>8} {'speed-up':>9}")
+    baseline, expected = results[0][1]
+    for name, (elapsed, verdicts) in results:
+        if verdicts != expected:
+            raise SystemExit(f"{name}: verdicts differ from legacy")
+        print(f"{name:<8} {elapsed:>8.3f} {elapsed / len(batch) * 1e9:>8.0f} "
+              f"{baseline / elapsed:>8.1f}x")
+
+    counts = Counter(expected)
+    print("Verdicts: " + ", ".join(f"{v} {counts[v]}" for v in
+                                   (RELEVANT, NOISE, ADDRESS_DENIED, ADDRESS_NOT_ALLOWED)))
+
+
+if __name__ == "__main__":
+    main()
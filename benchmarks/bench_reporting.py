@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+REdI Data Platform — Reporting and Aggregate Refresh Benchmark
+==============================================================
+Times every aggregate refresh, retention job and reporting view against a
+database loaded by generate_seed_data.py --synthetic, and appends the
+results to a JSON-lines history so regressions show up between runs:
+
+  refresh   agg.refresh_* and the other maintenance functions: wall time of
+            the call
+  job       the retention jobs: system.purge_expired_rows() and, with
+            TimescaleDB, drop_chunks() for each retention policy
+  view      every view in the training, clinical, escalation and agg
+            schemas (continuous aggregates included), the reporting
+            functions and, with TimescaleDB, each continuous aggregate's
+            full materialisation query: server execution time of the query
+            under EXPLAIN ANALYZE, so client-side row decoding is not counted
+  alerts    lib/alert_engine.evaluate_rules() over the loaded aggregates
+
+Refreshes, jobs and alert evaluation run in transactions that are rolled
+back, so the data set is the same for every case and every run. Each case
+runs --repeat times and the median is recorded.
+
+A run is compared with the latest earlier run on the same data set (the
+--synthetic parameters recorded in system.import_log); cases more than
+--tolerance slower (and at least --min-ms slower) are flagged, and with
+--check any regression exits with status 1.
+
+Usage:
+    python3 generate_seed_data.py --synthetic --years 10 --end 2026-10-17 --dsn "dbname=redi_bench"
+    python3 benchmarks/bench_reporting.py --dsn "host=... dbname=redi_bench"
+    python3 benchmarks/bench_reporting.py --dsn "..." --check --tolerance 0.25
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import psycopg
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from lib import alert_engine  # noqa: E402
+
+RESULTS = ROOT / "benchmarks" / "results" / "reporting.jsonl"
+VIEW_SCHEMAS = ("training", "clinical", "escalation", "agg")
+
+# (name, SQL, setup SQL run untimed first). Parameters come from params().
+REFRESHES = [
+    ("agg.refresh_training_compliance (latest ALS)",
+     "SELECT agg.refresh_training_compliance(%(als_snapshot)s)", None),
+    ("agg.refresh_training_compliance (latest BLS)",
+     "SELECT agg.refresh_training_compliance(%(bls_snapshot)s)", None),
+    ("training.rebuild_current_cert_status",
+     "SELECT training.rebuild_current_cert_status()", None),
+    ("agg.refresh_escalation_daily (last 30 days)",
+     "SELECT agg.refresh_escalation_daily(%(last_event)s - 29, %(last_event)s)", None),
+    ("agg.refresh_escalation_daily (full history)",
+     "SELECT agg.refresh_escalation_daily(%(first_event)s, %(last_event)s)", None),
+    # The 15-minute pager path: fold one day of events into the aggregate
+    ("agg.refresh_escalation_daily_incremental (last day)",
+     "SELECT agg.refresh_escalation_daily_incremental()",
+     "UPDATE system.aggregate_watermarks SET last_source_id = ("
+     " SELECT COALESCE(MAX(id), 0) FROM escalation.events WHERE event_date < %(last_event)s)"
+     " WHERE aggregate_name = 'escalation_daily'"),
+]
+
+JOBS = [
+    # Default config: the same windows as the 018 job
+    ("system.purge_expired_rows", "CALL system.purge_expired_rows(NULL, '{}')", None),
+]
+
+REPORTS = [
+    ("training.frequent_status_changes (4 weeks)",
+     "SELECT * FROM training.frequent_status_changes(%(last_snapshot_date)s - 28)"),
+]
+
+
+class Case:
+    __slots__ = ("kind", "name", "sql", "setup", "params")
+
+    def __init__(self, kind, name, sql, setup=None, params=None):
+        self.kind = kind
+        self.name = name
+        self.sql = sql
+        self.setup = setup
+        self.params = params
+
+
+def params(cur):
+    """Snapshot ids and date bounds of the loaded data set."""
+    cur.execute("""
+        SELECT (SELECT MAX(id) FROM training.certification_snapshots WHERE certification_type = 'ALS'),
+               (SELECT MAX(id) FROM training.certification_snapshots WHERE certification_type = 'BLS'),
+               (SELECT MAX(snapshot_date) FROM training.certification_snapshots),
+               (SELECT MIN(event_date) FROM escalation.events),
+               (SELECT MAX(event_date) FROM escalation.events)
+    """)
+    names = ("als_snapshot", "bls_snapshot", "last_snapshot_date", "first_event", "last_event")
+    return dict(zip(names, cur.fetchone()))
+
+
+def dataset(cur):
+    """Label of the loaded data set, from the --synthetic import_log row."""
+    cur.execute("""
+        SELECT metadata FROM system.import_log
+        WHERE source_type = 'synthetic' AND status = 'completed'
+        ORDER BY id DESC LIMIT 1
+    """)
+    row = cur.fetchone()
+    if row is None:
+        return "unlabelled"
+    m = row[0]
+    return f"synthetic years={m['years']} scale={m['scale']} seed={m['seed']} end={m['end']}"
+
+
+def row_counts(cur):
+    tables = ["core.staff", "training.staff_cert_history", "agg.training_compliance",
+              "clinical.inpatient_census", "clinical.inpatient_episodes", "clinical.transfers",
+              "clinical.deaths", "escalation.pager_messages_raw", "escalation.events",
+              "agg.escalation_daily"]
+    counts = {}
+    for table in tables:
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+        if cur.fetchone()[0]:
+            cur.execute(f"SELECT COUNT(*) FROM {table}")
+            counts[table] = cur.fetchone()[0]
+    return counts
+
+
+def cases(cur, values):
+    """Every case whose function, procedure or view exists in this database."""
+    def exists(sql):
+        name = sql.split("(")[0].split()[-1]
+        cur.execute("SELECT to_regproc(%s) IS NOT NULL", (name,))
+        return cur.fetchone()[0]
+
+    found = []
+    for kind, specs in (("refresh", REFRESHES), ("job", JOBS)):
+        for name, sql, setup in specs:
+            if exists(sql):
+                found.append(Case(kind, name, sql, setup, values))
+
+    cur.execute("SELECT extname FROM pg_extension WHERE extname = 'timescaledb'")
+    if cur.fetchone():
+        cur.execute("""
+            SELECT format('%I.%I', hypertable_schema, hypertable_name), config->>'drop_after'
+            FROM timescaledb_information.jobs
+            WHERE proc_name = 'policy_retention'
+            ORDER BY 1
+        """)
+        for table, drop_after in cur.fetchall():
+            found.append(Case("job", f"drop_chunks {table} (older than {drop_after})",
+                              "SELECT drop_chunks(%s::regclass, older_than => %s::interval)",
+                              params=(table, drop_after)))
+        cur.execute("""
+            SELECT format('%I.%I', view_schema, view_name), view_definition
+            FROM timescaledb_information.continuous_aggregates
+            ORDER BY 1
+        """)
+        for view, definition in cur.fetchall():
+            found.append(Case("view", f"{view} (full materialisation query)",
+                              definition.strip().rstrip(";")))
+
+    cur.execute("SELECT format('%%I.%%I', schemaname, viewname) FROM pg_views"
+                " WHERE schemaname = ANY(%s) ORDER BY 1", (list(VIEW_SCHEMAS),))
+    for (view,) in cur.fetchall():
+        found.append(Case("view", view, f"SELECT * FROM {view}"))
+    for name, sql in REPORTS:
+        if exists(sql):
+            found.append(Case("view", name, sql, params=values))
+
+    found.append(Case("alerts", "alert_engine.evaluate_rules", None, params=values))
+    return found
+
+
+def run_once(conn, case):
+    """Milliseconds for one run of `case`; nothing it writes is kept."""
+    with conn.transaction(force_rollback=True), conn.cursor() as cur:
+        if case.setup:
+            cur.execute(case.setup, case.params)
+        if case.kind == "view":
+            cur.execute(f"EXPLAIN (ANALYZE, TIMING OFF, FORMAT JSON) {case.sql}", case.params)
+            return cur.fetchone()[0][0]["Execution Time"]
+        start = time.perf_counter()
+        if case.kind == "alerts":
+            alert_engine.evaluate_rules(conn, as_of=case.params["last_event"])
+        else:
+            cur.execute(case.sql, case.params)
+        return (time.perf_counter() - start) * 1000
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT,
+                             capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def previous_run(path, label):
+    """The latest stored run on data set `label`, or None."""
+    if not path.exists():
+        return None
+    latest = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                run = json.loads(line)
+                if run["dataset"] == label:
+                    latest = run
+    return latest
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    p.add_argument("--dsn", required=True, help="Database loaded with generate_seed_data.py --synthetic")
+    p.add_argument("--repeat", type=int, default=3, help="Runs per case; the median is kept (default: 3)")
+    p.add_argument("--match", default="", help="Only run cases whose name contains this text")
+    p.add_argument("--results", type=Path, default=RESULTS,
+                   help=f"JSON-lines run history (default: {RESULTS.relative_to(ROOT)})")
+    p.add_argument("--no-save", action="store_true", help="Compare only; do not append this run")
+    p.add_argument("--tolerance", type=float, default=0.2,
+                   help="Relative slow-down flagged as a regression (default: 0.2)")
+    p.add_argument("--min-ms", type=float, default=5.0,
+                   help="Ignore slow-downs smaller than this many ms (default: 5)")
+    p.add_argument("--check", action="store_true", help="Exit with status 1 on any regression")
+    args = p.parse_args(argv)
+
+    with psycopg.connect(args.dsn, autocommit=True) as conn, conn.cursor() as cur:
+        label = dataset(cur)
+        values = params(cur)
+        counts = row_counts(cur)
+        selected = [c for c in cases(cur, values) if args.match in c.name]
+        timings = {}
+        for case in selected:
+            ms = statistics.median(run_once(conn, case) for _ in range(args.repeat))
+            timings[case.name] = {"kind": case.kind, "ms": round(ms, 2)}
+
+    baseline = previous_run(args.results, label)
+    base_cases = baseline["cases"] if baseline else {}
+    print(f"Data set: {label}")
+    print(", ".join(f"{table} {n:,}" for table, n in counts.items()))
+    if baseline:
+        print(f"Baseline: {baseline['commit']} at {baseline['run_at']}")
+    print(f"\n{'kind':<8} {'case':<62} {'ms':>10} {'baseline':>10} {'change':>8}")
+    regressions = []
+    for name, t in timings.items():
+        base = base_cases.get(name, {}).get("ms")
+        change = flag = ""
+        if base:
+            change = f"{(t['ms'] - base) / base:+.0%}"
+            if t["ms"] > base * (1 + args.tolerance) and t["ms"] - base >= args.min_ms:
+                flag = "  REGRESSION"
+                regressions.append(name)
+        base_text = f"{base:.1f}" if base else "-"
+        print(f"{t['kind']:<8} {name:<62} {t['ms']:>10.1f} {base_text:>10} {change:>8}{flag}")
+
+    if not args.no_save:
+        args.results.parent.mkdir(parents=True, exist_ok=True)
+        run = {"run_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+               "commit": git_commit(), "dataset": label, "repeat": args.repeat,
+               "rows": counts, "cases": timings}
+        with open(args.results, "a", encoding="utf-8") as f:
+            f.write(json.dumps(run) + "\n")
+        print(f"\nRun appended to {args.results}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.tolerance:.0%}: {', '.join(regressions)}")
+        if args.check:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
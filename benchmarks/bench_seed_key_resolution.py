@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+REdI Data Platform — Seed Key Resolution Benchmark
+====================================================
+Compares the two ways generate_seed_data.py has resolved surrogate ids in
+the seed SQL for core.ward_unit_map and training.faculty_members:
+
+  legacy  one VALUES row per record with a scalar subquery per foreign key
+          ((SELECT id FROM core.wards WHERE code = ...), ...)
+  joined  natural keys in a VALUES list, resolved with one join per table
+          (INSERT ... SELECT ... FROM (VALUES ...) JOIN ...)
+
+A synthetic dataset is built inside a single transaction against a
+migrated database (001–008), both variants are executed under savepoints,
+and the transaction is rolled back, so the target database is left
+untouched.
+
+Usage:
+    python3 benchmarks/bench_seed_key_resolution.py --dsn "host=... dbname=redi_platform"
+    python3 benchmarks/bench_seed_key_resolution.py --rows 50000 --repeat 3
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import psycopg
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generate_seed_data import (  # noqa: E402
+    SqlWriter, sql_bool, sql_date, sql_str, ward_unit_sql, faculty_sql,
+)
+
+WARD_UNIT_HEADER = "INSERT INTO core.ward_unit_map (ward_id, admitting_unit_id)"
+WARD_UNIT_CONFLICT = "ON CONFLICT (ward_id, admitting_unit_id) DO NOTHING;"
+FACULTY_COLUMNS = (
+    "source_id, given_name, surname, email, mobile, payroll_id, discipline, "
+    "discipline_stream_code, certification_date, is_inactive"
+)
+FACULTY_HEADER = f"INSERT INTO training.faculty_members ({FACULTY_COLUMNS}, staff_id)"
+
+
+# ---------------------------------------------------------------------------
+# Synthetic data
+# ---------------------------------------------------------------------------
+def synthetic_pairs(rows):
+    """Return `rows` distinct (ward_code, unit_code) pairs and the code lists."""
+    n_units = 200
+    n_wards = -(-rows // n_units)
+    wards = [f"BW{i:04d}" for i in range(n_wards)]
+    units = [f"BU{i:04d}" for i in range(n_units)]
+    pairs = [(w, u) for w in wards for u in units][:rows]
+    return wards, units, pairs
+
+
+def synthetic_faculty(rows):
+    """Return `rows` faculty tuples shaped like faculty_records() output.
+
+    One in ten payroll ids has no matching staff row, as happens when the
+    faculty list references someone missing from the training exports.
+    """
+    recs = []
+    for i in range(1, rows + 1):
+        pid = f"BP{i:07d}" if i % 10 else f"BX{i:07d}"
+        recs.append((
+            i, f"Given{i}", f"Surname{i}", f"f{i}@example.org", None, pid,
+            "Emergency", "medical", None, False,
+        ))
+    return recs
+
+
+# ---------------------------------------------------------------------------
+# SQL variants
+# ---------------------------------------------------------------------------
+def legacy_ward_unit_sql(rec):
+    return (
+        f"  ((SELECT id FROM core.wards WHERE code = {sql_str(rec[0])}), "
+        f"(SELECT id FROM core.admitting_units WHERE code = {sql_str(rec[1])}))"
+    )
+
+
+def legacy_faculty_sql(rec):
+    return (
+        f"  ({rec[0]}, {sql_str(rec[1])}, {sql_str(rec[2])}, "
+        f"{sql_str(rec[3])}, {sql_str(rec[4])}, {sql_str(rec[5])}, "
+        f"{sql_str(rec[6])}, {sql_str(rec[7])}, "
+        f"{sql_date(rec[8])}, "
+        f"{sql_bool(rec[9])}, "
+        f"(SELECT id FROM core.staff WHERE payroll_id = {sql_str(rec[5])}))"
+    )
+
+
+class StatementCollector:
+    """File-like sink that splits SqlWriter output into whole statements."""
+
+    def __init__(self):
+        self.statements = []
+        self._buf = []
+
+    def write(self, text):
+        self._buf.append(text)
+        if text.rstrip().endswith(";"):
+            self.statements.append("".join(self._buf))
+            self._buf = []
+
+
+def render(build, chunk_rows):
+    sink = StatementCollector()
+    build(SqlWriter(sink, chunk_rows))
+    return sink.statements
+
+
+def ward_unit_variants(pairs, chunk_rows):
+    legacy = render(lambda w: w.insert(
+        WARD_UNIT_HEADER, map(legacy_ward_unit_sql, pairs), WARD_UNIT_CONFLICT), chunk_rows)
+    joined = render(lambda w: w.insert_select(
+        WARD_UNIT_HEADER, "SELECT w.id, au.id", map(ward_unit_sql, pairs),
+        ") AS v (ward_code, unit_code)\n"
+        "JOIN core.wards w ON w.code = v.ward_code\n"
+        "JOIN core.admitting_units au ON au.code = v.unit_code\n"
+        + WARD_UNIT_CONFLICT), chunk_rows)
+    return legacy, joined
+
+
+def faculty_variants(recs, chunk_rows):
+    legacy = render(lambda w: w.insert(
+        FACULTY_HEADER, map(legacy_faculty_sql, recs), "ON CONFLICT DO NOTHING;"), chunk_rows)
+    joined = render(lambda w: w.insert_select(
+        FACULTY_HEADER,
+        "SELECT v.source_id, v.given_name, v.surname, v.email, v.mobile, v.payroll_id, "
+        "v.discipline, v.discipline_stream_code, v.certification_date::date, v.is_inactive, s.id",
+        map(faculty_sql, recs),
+        f") AS v ({FACULTY_COLUMNS})\n"
+        "LEFT JOIN core.staff s ON s.payroll_id = v.payroll_id\n"
+        "ON CONFLICT DO NOTHING;"), chunk_rows)
+    return legacy, joined
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+def setup(cur, wards, units, staff_ids):
+    """Insert the reference rows both variants resolve against."""
+    with cur.copy("COPY core.wards (code) FROM STDIN") as copy:
+        for code in wards:
+            copy.write_row((code,))
+    with cur.copy("COPY core.admitting_units (code) FROM STDIN") as copy:
+        for code in units:
+            copy.write_row((code,))
+    with cur.copy("COPY core.staff (payroll_id) FROM STDIN") as copy:
+        for pid in staff_ids:
+            copy.write_row((pid,))
+    cur.execute("ANALYZE core.wards, core.admitting_units, core.staff")
+
+
+def timed(conn, statements, count_sql):
+    """Execute `statements` under a savepoint; return (seconds, rows inserted)."""
+    cur = conn.cursor()
+    cur.execute("SAVEPOINT bench")
+    start = time.perf_counter()
+    for stmt in statements:
+        cur.execute(stmt)
+    elapsed = time.perf_counter() - start
+    inserted = cur.execute(count_sql).fetchone()[0]
+    cur.execute("ROLLBACK TO SAVEPOINT bench")
+    return elapsed, inserted
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    p.add_argument("--dsn", default="", help="libpq connection string of a migrated database")
+    p.add_argument("--rows", type=int, default=50000, help="Rows per table (default: 50000)")
+    p.add_argument("--chunk-size", type=int, default=1000, help="VALUES rows per INSERT (default: 1000)")
+    p.add_argument("--repeat", type=int, default=3, help="Timed runs per variant (best is reported)")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    wards, units, pairs = synthetic_pairs(args.rows)
+    faculty = synthetic_faculty(args.rows)
+    staff_ids = [f"BP{i:07d}" for i in range(1, args.rows + 1) if i % 10]
+
+    cases = [
+        ("ward_unit_map", ward_unit_variants(pairs, args.chunk_size),
+         "SELECT COUNT(*) FROM core.ward_unit_map"),
+        ("faculty_members", faculty_variants(faculty, args.chunk_size),
+         "SELECT COUNT(*) FROM training.faculty_members WHERE staff_id IS NOT NULL"),
+    ]
+
+    with psycopg.connect(args.dsn) as conn:
+        setup(conn.cursor(), wards, units, staff_ids)
+        print(f"{'table':<17} {'variant':<8} {'rows':>8} {'resolved':>9} {'best s':>8} {'rows/s':>10}")
+        for table, variants, count_sql in cases:
+            for name, statements in zip(("legacy", "joined"), variants):
+                runs = [timed(conn, statements, count_sql) for _ in range(args.repeat)]
+                best = min(r[0] for r in runs)
+                print(f"{table:<17} {name:<8} {args.rows:>8} {runs[0][1]:>9} "
+                      f"{best:>8.3f} {args.rows / best:>10.0f}")
+        conn.rollback()
+
+
+if __name__ == "__main__":
+    main()
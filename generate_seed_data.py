@@ -5,29 +5,91 @@ REdI Data Platform — Seed Data Generator
 Reads sample data files and generates SQL INSERT statements for initial
 database population. Outputs to seed_data.sql.
 
+SQL is streamed to the output file as each section is read: rows are
+produced by generators and flushed as bounded multi-row INSERT statements,
+so memory use does not grow with the size of the source exports. Workbooks
+are read with openpyxl's read-only streaming reader. With --jobs > 1 the
+independent upload files are instead parsed in full, concurrently, in a
+process pool (faster, but each file is held in memory); sections are still
+written in a fixed order, so the output is identical either way.
+The grouped ALS and BLS certification exports are reverse-pivoted by
+lib/csv_parser.py: person rows inherit org unit and manager from their
+group rows, and group totals that do not match their people are logged.
+
+With --load the same rows are streamed straight into PostgreSQL instead:
+each section is binary-COPYed into a temp staging table and merged with a
+set-based INSERT ... SELECT ... ON CONFLICT, all in a single transaction.
+
+Every run also writes a manifest of SHA-256 fingerprints (each upload file
+and each normalised row) next to the output. With --delta, sections whose
+files are unchanged are skipped and only new or changed rows are emitted,
+to 010_seed_data_delta.sql (or loaded directly with --load --delta).
+
+With --synthetic, a generated data set at production volume over --years
+(lib/synthetic.py) is loaded into a freshly migrated database instead, one
+import at a time with each load's refresh function, for benchmarking the
+views and aggregates at scale (benchmarks/bench_reporting.py).
+
+Each section runs as a lib/instrumentation.py stage: wall time, rows in
+and out, peak RSS and database time per stage go to --report (JSON) and,
+for --synthetic, into the run's system.import_log metadata.
+REDI_PROFILE=cprofile,tracemalloc adds per-stage profiles.
+
 Usage:
     python3 generate_seed_data.py
+    python3 generate_seed_data.py --chunk-size 5000
+    python3 generate_seed_data.py --jobs 4
+    python3 generate_seed_data.py --load [--dsn "host=... dbname=redi_platform"]
+    python3 generate_seed_data.py --delta [--load]
+    python3 generate_seed_data.py --synthetic --years 10 [--scale 1.0] [--seed 1] --dsn "..."
+    REDI_PROFILE=cprofile python3 generate_seed_data.py --report timings.json
 
 Reads from: /mnt/user-data/uploads/ (or ./sample_data/ if running locally)
 Outputs to: ./seed_data.sql
 """
 
+import argparse
 import csv
 import json
 import hashlib
 import logging
 import os
 import sys
-from collections import OrderedDict
+from collections import Counter, OrderedDict
+from collections.abc import Iterator
+from itertools import chain
 from datetime import datetime, date
 from pathlib import Path
 
+from lib import csv_parser, mapping, synthetic
+from lib.mapping import (
+    duration_hours, map_course_status, map_course_type, map_job_family,
+    map_stream, parse_date, parse_time,
+)
+from lib.deidentify import PatientHasher, age_band
+from lib.instrumentation import Instrumentation, current_run, db_query, stage
+from lib.staff_merge import StaffMerger, split_full_name
+
 # ---------------------------------------------------------------------------
 # Configuration
 # ---------------------------------------------------------------------------
 UPLOAD_DIR = Path("/mnt/user-data/uploads")
 OUTPUT_FILE = Path("/home/claude/migrations/010_seed_data.sql")
 HASH_SALT = "redi_platform_2026"  # Application salt for patient de-identification
+PATIENT_HASHER = PatientHasher(HASH_SALT)
+INSERT_CHUNK_ROWS = 1000          # Max VALUES rows per INSERT statement
+
+# Upload file read by each parsed source (see SOURCES)
+SOURCE_FILES = {
+    "org_units": "orgunits.xlsx",
+    "census": "PF_Current_RBWH_Inpatients.xlsx",
+    "transfers": "RBWH_PrevDay_Transfers_from_Other_Hospitals_to_Facility-2026-02-03.xlsx",
+    "als_csv": "ALS_Cert.csv",
+    "bls_csv": "_Grouped__Certification_Completion_Summary_003A_Organisation_003EPerson_003ECompletion_Status.csv",
+    "participants_csv": "Participants.csv",
+    "courses": "Events.csv",
+    "faculty": "FacultyList.csv",
+}
 
 logging.basicConfig(
     level=logging.INFO,
@@ -76,438 +138,646 @@ def sql_bool(val):
     return "TRUE" if str(val).lower() in ("true", "1", "yes") else "FALSE"
 
 def sql_date(val, fmt="%d/%m/%Y"):
-    """Parse a date string and return SQL date literal."""
+    """Parse a date string (or pass through a date) and return SQL date literal."""
     if val is None or (isinstance(val, str) and val.strip() == ""):
         return "NULL"
+    d = parse_date(val, fmt)
+    return f"'{d.strftime('%Y-%m-%d')}'" if d else "NULL"
+
+def to_text(val):
+    """Normalise a cell to a string, or None for empty/None."""
+    if val is None or (isinstance(val, str) and val.strip() == ""):
+        return None
+    return str(val)
+
+def stripped(val):
+    """Strip a CSV cell, or None for empty/None."""
+    return (val or "").strip() or None
+
+def to_int(val):
+    """Normalise a cell to an int, or None if empty/unparseable."""
+    if val is None or (isinstance(val, str) and val.strip() == ""):
+        return None
     try:
-        d = datetime.strptime(val.strip(), fmt)
-        return f"'{d.strftime('%Y-%m-%d')}'"
+        return int(float(val))
     except (ValueError, TypeError):
-        return "NULL"
+        return None
+
+def to_date(val, fmt="%d/%m/%Y"):
+    """Parse a date string to a date, or None if empty/unparseable."""
+    return parse_date(val, fmt)
 
 def hash_patient(identifier):
     """SHA-256 hash of patient identifier with salt."""
-    if not identifier or str(identifier).strip() == "":
-        return "NULL"
-    h = hashlib.sha256(f"{HASH_SALT}:{identifier}".encode()).hexdigest()
-    return f"'{h}'"
+    return sql_str(PATIENT_HASHER.hash(identifier))
 
 def age_to_band(age):
     """Convert numeric age to banded string."""
-    if age is None:
-        return "NULL"
-    try:
-        a = int(float(age))
-        if a >= 90:
-            return "'90+'"
-        band_start = (a // 10) * 10
-        return f"'{band_start}-{band_start + 9}'"
-    except (ValueError, TypeError):
-        return "NULL"
+    return sql_str(age_band(age))
+
+class CsvRow:
+    """One CSV record: the raw values plus the header index shared by the file.
+
+    Much smaller than a per-row dict, and read the same way via get().
+    """
+    __slots__ = ("_index", "_values")
+
+    def __init__(self, index, values):
+        self._index = index
+        self._values = values
+
+    def get(self, key, default=None):
+        i = self._index.get(key)
+        if i is None or i >= len(self._values):
+            return default
+        return self._values[i]
+
+    def __getitem__(self, key):
+        return self._values[self._index[key]]
+
 
-def read_csv_skipping_blanks(path):
-    """Read CSV, skipping BOM and blank header lines."""
-    rows = []
+def iter_csv_rows(path):
+    """Yield CsvRow records from a CSV in a single pass.
+
+    The BOM and any blank lines before the header are skipped as the file is
+    read, so nothing but the current row is held in memory.
+    """
     with open(path, 'r', encoding='utf-8-sig') as f:
-        lines = f.readlines()
-        # Find the first non-empty line (header)
-        header_idx = 0
-        for i, line in enumerate(lines):
-            stripped = line.strip().strip('\r\n')
-            if stripped:
-                header_idx = i
+        for line in f:
+            if line.strip():
                 break
-        reader = csv.DictReader(lines[header_idx:])
-        for row in reader:
-            rows.append(row)
-    return rows
-
-def map_stream(source_value):
-    """Map source discipline/stream string to normalised code."""
-    mapping = {
-        "Medical": "medical",
-        "Nursing & Midwifery": "nursing",
-        "Nursing or Midwifery": "nursing",
-        "Nursing": "nursing",
-        "Health Practitioner": "allied_health",
-        "Allied Health": "allied_health",
-        "Health Practitioners": "allied_health",
-        "Managerial and Clerical": "admin",
-        "none": "other",
-        "": "other",
-    }
-    return mapping.get(source_value, "other")
-
-def map_job_family(source_label):
-    """Map source job family label to normalised code."""
-    mapping = {
-        "Medical": "medical",
-        "Visiting Medical Staff": "visiting_medical",
-        "Registered / Clinical Nurse - Grades 5-6": "rn_cn_5_6",
-        "Enrolled Nurses - Grades 3-4": "en_3_4",
-        "Assistant In Nursing - Grades 1-2": "ain_1_2",
-        "Nurse Manager - Grade 7-8": "nm_7_8",
-        "Nurse Executive - Grade 9-13": "ne_9_13",
-        "Health Practitioners": "health_prac",
-        "Health Clinical Assistants": "health_clin_asst",
-        "Managerial and Clerical": "admin_clerical",
-    }
-    return mapping.get(source_label)
-
-def map_booking_status(source_value):
-    """Map source booking status to normalised code."""
-    mapping = {
-        "Finalised": "finalised",
-        "Attended": "attended",
-        "Completed": "completed",
-        "Enrolled": "enrolled",
-        "Booked": "booked",
-        "Did Not Attend": "did_not_attend",
-        "Further Assessment Required": "further_assessment",
-        "Cancel Request": "cancel_request",
-        "Rejected": "rejected",
-    }
-    return mapping.get(source_value, "enrolled")
-
-def map_course_type(source_value):
-    """Map source course type to normalised code."""
-    mapping = {
-        "Full Course": "full_course",
-        "Assessment": "assessment",
-        "Refresher": "refresher",
-        "ANZCA Refresher": "anzca_refresher",
-        "Sim Workshop": "sim_workshop",
-    }
-    return mapping.get(source_value)
-
-def map_course_status(source_value):
-    """Map source course status to normalised code."""
-    mapping = {
-        "Open": "open",
-        "Closed": "closed",
-        "Cancelled": "cancelled",
-    }
-    return mapping.get(source_value, "closed")
-
-def map_cert_status(source_value):
-    """Map certification status to normalised code."""
-    mapping = {
-        "Acquired": "acquired",
-        "Overdue": "overdue",
-        "Assigned": "assigned",
-        "Expired": "expired",
-        "In Progress": "in_progress",
-    }
-    return mapping.get(source_value, "assigned")
+        else:
+            return
+        reader = csv.reader(chain((line,), f))
+        header = next(reader)
+        # Later duplicate column names win, as they did with csv.DictReader
+        index = {name: i for i, name in enumerate(header)}
+        for values in reader:
+            if values:
+                yield CsvRow(index, values)
+
+def read_xlsx_rows(path, min_row=1, width=0):
+    """Yield value tuples from the active sheet of an .xlsx, streamed read-only.
+
+    Rows are padded to `width` columns: read-only sheets return short rows
+    when the file's dimension record is missing or stale.
+    """
+    import openpyxl
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        for row in wb.active.iter_rows(min_row=min_row, values_only=True):
+            if len(row) < width:
+                row += (None,) * (width - len(row))
+            yield row
+    finally:
+        wb.close()
 
 # ---------------------------------------------------------------------------
-# Main generation
+# Streaming SQL writer
 # ---------------------------------------------------------------------------
-def main():
-    out_lines = []
-    out = out_lines.append
-
-    out("-- ============================================================================")
-    out("-- Migration 010: Seed Data (generated from sample files)")
-    out("-- REdI Data Platform")
-    out(f"-- Generated: {datetime.now().isoformat()}")
-    out("-- ============================================================================")
-    out("")
-    out("BEGIN;")
-    out("")
+class SqlWriter:
+    """Writes SQL to the output file as it is generated.
 
-    # ========================================================================
-    # 1. ORG UNITS
-    # ========================================================================
-    log.info("Processing org units...")
-    try:
-        import openpyxl
-        wb = openpyxl.load_workbook(UPLOAD_DIR / "orgunits.xlsx")
-        ws = wb.active
-        ou_rows = []
-        for row in ws.iter_rows(min_row=2, values_only=True):
-            if row[0] is not None:
-                ou_rows.append(row)
-        log.info(f"  Found {len(ou_rows)} org units")
-
-        out("-- ========================================================================")
-        out("-- ORG UNITS")
-        out("-- ========================================================================")
-        out("INSERT INTO core.org_units (id, name, directorate, service_line) VALUES")
-        values = []
-        for row in ou_rows:
-            values.append(
-                f"  ({sql_int(row[0])}, {sql_str(row[1])}, {sql_str(row[2])}, {sql_str(row[3])})"
-            )
-        out(",\n".join(values))
-        out("ON CONFLICT (id) DO UPDATE SET")
-        out("  name = EXCLUDED.name,")
-        out("  directorate = EXCLUDED.directorate,")
-        out("  service_line = EXCLUDED.service_line,")
-        out("  updated_at = NOW();")
-        out("")
-    except Exception as e:
-        log.error(f"  Error processing org units: {e}")
+    Multi-row INSERTs are flushed in chunks of at most `chunk_rows` rows, so
+    only one chunk of VALUES tuples is ever held in memory regardless of how
+    large the source exports are.
+    """
 
-    # ========================================================================
-    # 2. WARDS (extracted from inpatient census)
-    # ========================================================================
-    log.info("Processing wards from inpatient census...")
+    def __init__(self, f, chunk_rows=INSERT_CHUNK_ROWS):
+        self.f = f
+        self.chunk_rows = chunk_rows
+        self.lines = 0
+
+    def line(self, text=""):
+        self.f.write(text)
+        self.f.write("\n")
+        self.lines += text.count("\n") + 1
+
+    def banner(self, title):
+        self.line("-- ========================================================================")
+        self.line(f"-- {title}")
+        self.line("-- ========================================================================")
+
+    def insert(self, header, rows, conflict):
+        """Write `rows` (VALUES tuple strings) as chunked INSERT statements.
+
+        `header` is the INSERT INTO ... (cols) clause and `conflict` the
+        ON CONFLICT clause repeated on every chunk. Returns the number of
+        rows written.
+        """
+        return self._chunks(f"{header} VALUES", rows, conflict)
+
+    def insert_select(self, header, select, rows, join):
+        """Write `rows` as chunked INSERT ... SELECT ... FROM (VALUES ...) statements.
+
+        The VALUES list carries natural keys only; `join` (the alias clause,
+        the joins that resolve surrogate ids and the ON CONFLICT clause) turns
+        them into ids with one join per table instead of a scalar subquery
+        per row. Returns the number of rows written.
+        """
+        return self._chunks(f"{header}\n{select}\nFROM (VALUES", rows, join)
+
+    def _chunks(self, prefix, rows, suffix):
+        # Each chunk is built in full before it is written, so a failure
+        # part-way through a section never leaves a truncated statement.
+        total = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if self.chunk_rows and len(chunk) >= self.chunk_rows:
+                self._flush(prefix, chunk, suffix)
+                total += len(chunk)
+                chunk = []
+        if chunk:
+            self._flush(prefix, chunk, suffix)
+            total += len(chunk)
+        return total
+
+    def _flush(self, prefix, chunk, suffix):
+        self.line(prefix)
+        self.line(",\n".join(chunk))
+        self.line(suffix)
+
+
+# ---------------------------------------------------------------------------
+# Sections
+# ---------------------------------------------------------------------------
+# Each *_records() generator yields normalised tuples in the column order of
+# its target table. The same records feed both the SQL file (via the *_sql()
+# formatters) and the --load COPY path, so both outputs always agree.
+# ---------------------------------------------------------------------------
+def org_unit_records():
+    """Yield (id, name, directorate, service_line) from orgunits.xlsx."""
+    for row in read_xlsx_rows(UPLOAD_DIR / SOURCE_FILES["org_units"], min_row=2, width=4):
+        if row[0] is not None:
+            yield (to_int(row[0]), to_text(row[1]), to_text(row[2]), to_text(row[3]))
+
+
+def org_unit_sql(rec):
+    return f"  ({sql_int(rec[0])}, {sql_str(rec[1])}, {sql_str(rec[2])}, {sql_str(rec[3])})"
+
+
+def census_ward_units():
+    """Yield (ward, unit) from the inpatient census; either may be None."""
+    for row in read_xlsx_rows(UPLOAD_DIR / SOURCE_FILES["census"], min_row=2, width=8):
+        yield (str(row[0]) if row[0] else None, str(row[7]) if row[7] else None)
+
+
+def transfer_unit_divisions():
+    """Yield (unit, division, subdivision) from the transfers workbook."""
+    for row in read_xlsx_rows(UPLOAD_DIR / SOURCE_FILES["transfers"], min_row=6, width=8):
+        if row[5]:  # AdmUnit
+            yield (str(row[5]), str(row[6]) if row[6] else None, str(row[7]) if row[7] else None)
+
+
+def read_census_locations(src):
+    """Collect wards, admitting units and observed ward → unit pairs.
+
+    Returns (wards, units, ward_units_map, unit_divisions). These are small
+    distinct sets, so they are gathered in full before being written.
+    """
+    wards = set()
+    ward_units_map = {}
+    units = set()
+    for ward, unit in src("census"):
+        if ward:
+            wards.add(ward)
+        if unit:
+            units.add(unit)
+        if ward and unit:
+            if ward not in ward_units_map:
+                ward_units_map[ward] = set()
+            ward_units_map[ward].add(unit)
+
+    # Also pull units from transfers for division/subdivision data
     try:
-        wb2 = openpyxl.load_workbook(UPLOAD_DIR / "PF_Current_RBWH_Inpatients.xlsx")
-        ws2 = wb2.active
-        wards = set()
-        ward_units_map = {}
-        units = set()
-        for row in ws2.iter_rows(min_row=2, values_only=True):
-            ward = str(row[0]) if row[0] else None
-            unit = str(row[7]) if row[7] else None
-            if ward:
-                wards.add(ward)
-            if unit:
-                units.add(unit)
-            if ward and unit:
-                if ward not in ward_units_map:
-                    ward_units_map[ward] = set()
-                ward_units_map[ward].add(unit)
-        log.info(f"  Found {len(wards)} wards, {len(units)} admitting units")
-
-        out("-- ========================================================================")
-        out("-- WARDS")
-        out("-- ========================================================================")
-        out("INSERT INTO core.wards (code) VALUES")
-        ward_values = [f"  ({sql_str(w)})" for w in sorted(wards)]
-        out(",\n".join(ward_values))
-        out("ON CONFLICT (code) DO NOTHING;")
-        out("")
-
-        # 3. ADMITTING UNITS
-        out("-- ========================================================================")
-        out("-- ADMITTING UNITS")
-        out("-- ========================================================================")
-        # Also pull units from transfers for division/subdivision data
-        try:
-            wb_tx = openpyxl.load_workbook(
-                UPLOAD_DIR / "RBWH_PrevDay_Transfers_from_Other_Hospitals_to_Facility-2026-02-03.xlsx"
-            )
-            ws_tx = wb_tx.active
-            unit_divisions = {}
-            for row in ws_tx.iter_rows(min_row=6, values_only=True):
-                if row[5]:  # AdmUnit
-                    code = str(row[5])
-                    units.add(code)
-                    unit_divisions[code] = {
-                        "division": str(row[6]) if row[6] else None,
-                        "subdivision": str(row[7]) if row[7] else None,
-                    }
-        except Exception:
-            unit_divisions = {}
-
-        out("INSERT INTO core.admitting_units (code, division, subdivision) VALUES")
-        unit_values = []
-        for u in sorted(units):
-            div_info = unit_divisions.get(u, {})
-            unit_values.append(
-                f"  ({sql_str(u)}, {sql_str(div_info.get('division'))}, {sql_str(div_info.get('subdivision'))})"
-            )
-        out(",\n".join(unit_values))
-        out("ON CONFLICT (code) DO UPDATE SET")
-        out("  division = COALESCE(EXCLUDED.division, core.admitting_units.division),")
-        out("  subdivision = COALESCE(EXCLUDED.subdivision, core.admitting_units.subdivision);")
-        out("")
-
-        # 4. WARD-UNIT MAP
-        out("-- ========================================================================")
-        out("-- WARD ↔ UNIT MAP")
-        out("-- ========================================================================")
-        out("INSERT INTO core.ward_unit_map (ward_id, admitting_unit_id)")
-        wum_values = []
-        for ward_code, unit_codes in sorted(ward_units_map.items()):
-            for unit_code in sorted(unit_codes):
-                wum_values.append(
-                    f"  ((SELECT id FROM core.wards WHERE code = {sql_str(ward_code)}), "
-                    f"(SELECT id FROM core.admitting_units WHERE code = {sql_str(unit_code)}))"
-                )
-        out(",\n".join(wum_values))
-        out("ON CONFLICT (ward_id, admitting_unit_id) DO NOTHING;")
-        out("")
+        unit_divisions = {}
+        for code, division, subdivision in src("transfers"):
+            units.add(code)
+            unit_divisions[code] = {"division": division, "subdivision": subdivision}
+    except Exception:
+        unit_divisions = {}
 
-    except Exception as e:
-        log.error(f"  Error processing wards/units: {e}")
+    return wards, units, ward_units_map, unit_divisions
 
-    # ========================================================================
-    # 5. STAFF (from all sources)
-    # ========================================================================
-    log.info("Collecting staff from all sources...")
-    staff_map = OrderedDict()  # payroll_id -> {fields}
-
-    # From ALS cert
-    als_rows = read_csv_skipping_blanks(UPLOAD_DIR / "ALS_Cert.csv")
-    for r in als_rows:
-        pid = r.get("Person Person No.", "").strip()
-        if pid:
-            jf = r.get("Job Family Name", "").strip()
-            staff_map.setdefault(pid, {})
-            staff_map[pid].update({
-                "given_name": r.get("Person Full Name", "").split()[-1] if r.get("Person Full Name") else None,
-                "surname": r.get("Person Full Name", "").split()[0].rstrip(",") if r.get("Person Full Name") else None,
-                "job_family_code": map_job_family(jf),
-                "discipline_stream_code": map_stream(jf) if jf else staff_map[pid].get("discipline_stream_code"),
-                "org_unit_id": r.get("Person Organisation Number", "").strip() or None,
-                "manager_name": r.get("Manager Full Name", "").strip() or None,
-            })
-
-    # From BLS cert
-    bls_rows = read_csv_skipping_blanks(
-        UPLOAD_DIR / "_Grouped__Certification_Completion_Summary_003A_Organisation_003EPerson_003ECompletion_Status.csv"
-    )
-    for r in bls_rows:
-        pid = r.get("Person Person No.", "").strip()
-        if pid:
-            jf = r.get("Job Family Name", "").strip()
-            staff_map.setdefault(pid, {})
-            if not staff_map[pid].get("job_family_code"):
-                staff_map[pid]["job_family_code"] = map_job_family(jf)
-            if not staff_map[pid].get("discipline_stream_code") and jf:
-                staff_map[pid]["discipline_stream_code"] = map_stream(jf)
-            if not staff_map[pid].get("org_unit_id"):
-                staff_map[pid]["org_unit_id"] = r.get("Person Organisation Number", "").strip() or None
-            if not staff_map[pid].get("manager_name"):
-                staff_map[pid]["manager_name"] = r.get("Manager Full Name", "").strip() or None
-
-    # From participants
-    parts_rows = read_csv_skipping_blanks(UPLOAD_DIR / "Participants.csv")
-    for r in parts_rows:
-        pid = r.get("QHPayroll", "").strip()
-        if pid:
-            staff_map.setdefault(pid, {})
-            staff_map[pid].update({
-                "given_name": r.get("GivenName", "").strip() or staff_map[pid].get("given_name"),
-                "surname": r.get("Surname", "").strip() or staff_map[pid].get("surname"),
-                "email": r.get("Mail", "").strip() or staff_map[pid].get("email"),
-                "discipline_stream_code": map_stream(r.get("Stream", "")) or staff_map[pid].get("discipline_stream_code"),
-                "facility": r.get("Facility", "").strip() or staff_map[pid].get("facility"),
-            })
-
-    # From faculty
-    fac_rows = read_csv_skipping_blanks(UPLOAD_DIR / "FacultyList.csv")
-    for r in fac_rows:
-        pid = r.get("Payroll", "").strip()
-        if pid:
-            staff_map.setdefault(pid, {})
-            staff_map[pid].update({
-                "given_name": r.get("GivenName", "").strip() or staff_map[pid].get("given_name"),
-                "surname": r.get("Surname", "").strip() or staff_map[pid].get("surname"),
-                "email": r.get("Mail", "").strip() or staff_map[pid].get("email"),
-                "discipline_stream_code": map_stream(r.get("Stream", "")) or staff_map[pid].get("discipline_stream_code"),
-            })
-
-    log.info(f"  Total unique staff: {len(staff_map)}")
-
-    out("-- ========================================================================")
-    out("-- STAFF")
-    out("-- ========================================================================")
-    out("INSERT INTO core.staff (payroll_id, given_name, surname, email, discipline_stream_code, job_family_code, org_unit_id, facility, manager_name) VALUES")
-    staff_values = []
-    for pid, info in staff_map.items():
-        org_id = info.get("org_unit_id")
-        org_sql = sql_int(org_id) if org_id else "NULL"
-        staff_values.append(
-            f"  ({sql_str(pid)}, {sql_str(info.get('given_name'))}, {sql_str(info.get('surname'))}, "
-            f"{sql_str(info.get('email'))}, {sql_str(info.get('discipline_stream_code', 'other'))}, "
-            f"{sql_str(info.get('job_family_code'))}, {org_sql}, "
-            f"{sql_str(info.get('facility'))}, {sql_str(info.get('manager_name'))})"
+
+def ward_records(wards):
+    """Yield (code,) for each ward in sorted order."""
+    for ward in sorted(wards):
+        yield (ward,)
+
+
+def ward_sql(rec):
+    return f"  ({sql_str(rec[0])})"
+
+
+def admitting_unit_records(units, unit_divisions):
+    """Yield (code, division, subdivision) for each unit in sorted order."""
+    for u in sorted(units):
+        div_info = unit_divisions.get(u, {})
+        yield (u, to_text(div_info.get("division")), to_text(div_info.get("subdivision")))
+
+
+def admitting_unit_sql(rec):
+    return f"  ({sql_str(rec[0])}, {sql_str(rec[1])}, {sql_str(rec[2])})"
+
+
+def ward_unit_records(ward_units_map):
+    """Yield (ward_code, unit_code) pairs in sorted order."""
+    for ward_code, unit_codes in sorted(ward_units_map.items()):
+        for unit_code in sorted(unit_codes):
+            yield (ward_code, unit_code)
+
+
+def ward_unit_sql(rec):
+    return f"  ({sql_str(rec[0])}, {sql_str(rec[1])})"
+
+
+def als_staff_rows(records):
+    """Yield ALS staff tuples in ALS_STAFF_FIELDS order, keyed by payroll id.
+
+    `records` are csv_parser.CertificationRecords: person rows only, with
+    org unit and manager filled in from their enclosing groups.
+    """
+    for r in records:
+        jf = r.job_family or ""
+        given, surname = split_full_name(r.full_name)
+        yield (
+            r.payroll_id, given, surname, map_job_family(jf), map_stream(jf) if jf else None,
+            r.org_unit_id, r.manager_name,
         )
-    out(",\n".join(staff_values))
-    out("ON CONFLICT (payroll_id) DO UPDATE SET")
-    out("  given_name = COALESCE(EXCLUDED.given_name, core.staff.given_name),")
-    out("  surname = COALESCE(EXCLUDED.surname, core.staff.surname),")
-    out("  email = COALESCE(EXCLUDED.email, core.staff.email),")
-    out("  discipline_stream_code = COALESCE(EXCLUDED.discipline_stream_code, core.staff.discipline_stream_code),")
-    out("  job_family_code = COALESCE(EXCLUDED.job_family_code, core.staff.job_family_code),")
-    out("  org_unit_id = COALESCE(EXCLUDED.org_unit_id, core.staff.org_unit_id),")
-    out("  facility = COALESCE(EXCLUDED.facility, core.staff.facility),")
-    out("  manager_name = COALESCE(EXCLUDED.manager_name, core.staff.manager_name),")
-    out("  last_seen_at = NOW(),")
-    out("  updated_at = NOW();")
-    out("")
 
-    # ========================================================================
-    # 6. COURSES
-    # ========================================================================
-    log.info("Processing courses...")
-    events = read_csv_skipping_blanks(UPLOAD_DIR / "Events.csv")
-    out("-- ========================================================================")
-    out("-- COURSES")
-    out("-- ========================================================================")
-    out("INSERT INTO training.courses (source_id, title, course_type_code, course_date, start_time, end_time, duration_hours, venue, capacity, status_code, outlook_id) VALUES")
-    course_values = []
-    for r in events:
+
+def bls_staff_rows(records):
+    """Yield BLS staff tuples in BLS_STAFF_FIELDS order, keyed by payroll id."""
+    for r in records:
+        jf = r.job_family or ""
+        yield (
+            r.payroll_id, map_job_family(jf), map_stream(jf) if jf else None,
+            r.org_unit_id, r.manager_name,
+        )
+
+
+def participant_staff_rows(rows):
+    """Yield Participants.csv staff tuples in PARTICIPANT_STAFF_FIELDS order."""
+    for r in rows:
+        yield (
+            r.get("QHPayroll", "").strip(), stripped(r.get("GivenName")), stripped(r.get("Surname")),
+            stripped(r.get("Mail")), map_stream(r.get("Stream", "")), stripped(r.get("Facility")),
+        )
+
+
+def faculty_staff_rows(records):
+    """Yield FacultyList.csv staff tuples in FACULTY_STAFF_FIELDS order.
+
+    `records` are faculty_records() tuples, so FacultyList.csv is parsed once
+    for both the staff and the faculty_members sections.
+    """
+    for rec in records:
+        yield rec[5], stripped(rec[1]), stripped(rec[2]), stripped(rec[3]), rec[7]
+
+
+# (precedence source, upload source, fields after payroll id, row extractor)
+# Field precedence between sources is defined in lib.staff_merge.STAFF_PRECEDENCE.
+STAFF_SOURCES = (
+    ("als", "als_csv",
+     ("given_name", "surname", "job_family_code", "discipline_stream_code", "org_unit_id", "manager_name"),
+     als_staff_rows),
+    ("bls", "bls_csv",
+     ("job_family_code", "discipline_stream_code", "org_unit_id", "manager_name"),
+     bls_staff_rows),
+    ("participants", "participants_csv",
+     ("given_name", "surname", "email", "discipline_stream_code", "facility"),
+     participant_staff_rows),
+    ("faculty", "faculty",
+     ("given_name", "surname", "email", "discipline_stream_code"),
+     faculty_staff_rows),
+)
+
+STAFF_FIELDS = (
+    "given_name", "surname", "email", "discipline_stream_code",
+    "job_family_code", "org_unit_id", "facility", "manager_name",
+)
+
+
+def collect_staff(src):
+    """Merge staff from ALS, BLS, Participants and FacultyList by payroll id."""
+    merger = StaffMerger()
+    for source, upload, fields, extract in STAFF_SOURCES:
+        merger.merge(source, fields, extract(src(upload)))
+    return merger
+
+
+def staff_records(merger):
+    """Yield core.staff tuples from the merged staff store."""
+    for pid, given, surname, email, stream, jf, org_id, facility, manager in merger.rows(STAFF_FIELDS):
+        yield (
+            pid, given, surname, email, stream or "other", jf,
+            to_int(org_id) if org_id else None, facility, manager,
+        )
+
+
+def staff_sql(rec):
+    return (
+        f"  ({sql_str(rec[0])}, {sql_str(rec[1])}, {sql_str(rec[2])}, "
+        f"{sql_str(rec[3])}, {sql_str(rec[4])}, "
+        f"{sql_str(rec[5])}, {sql_int(rec[6])}, "
+        f"{sql_str(rec[7])}, {sql_str(rec[8])})"
+    )
+
+
+def course_records():
+    """Yield training.courses tuples from Events.csv.
+
+    start_time/end_time are kept as the source "HH:MM" strings and cast by
+    the database.
+    """
+    for r in iter_csv_rows(UPLOAD_DIR / SOURCE_FILES["courses"]):
         sid = r.get("ID", "").strip()
         if not sid:
             continue
         start = r.get("CourseStart", "").strip()
         end = r.get("CourseEnd", "").strip()
-        # Calculate duration
-        dur = "NULL"
-        if start and end:
-            try:
-                s = datetime.strptime(start, "%H:%M")
-                e = datetime.strptime(end, "%H:%M")
-                dur = str(round((e - s).seconds / 3600, 2))
-            except ValueError:
-                pass
-        course_values.append(
-            f"  ({sql_int(sid)}, {sql_str(r.get('CourseTitle'))}, "
-            f"{sql_str(map_course_type(r.get('CourseType', '')))}, "
-            f"{sql_date(r.get('CourseDate', ''), '%d-%b-%Y')}, "
-            f"{sql_str(start) if start else 'NULL'}, {sql_str(end) if end else 'NULL'}, "
-            f"{dur}, {sql_str(r.get('CourseVenue'))}, {sql_int(r.get('CourseCap'))}, "
-            f"{sql_str(map_course_status(r.get('CourseStatus', '')))}, "
-            f"{sql_str(r.get('OutlookID'))})"
+        dur = duration_hours(parse_time(start), parse_time(end))
+        yield (
+            to_int(sid), to_text(r.get("CourseTitle")),
+            map_course_type(r.get("CourseType", "")),
+            to_date(r.get("CourseDate", ""), "%d-%b-%Y"),
+            start or None, end or None,
+            dur, to_text(r.get("CourseVenue")), to_int(r.get("CourseCap")),
+            map_course_status(r.get("CourseStatus", "")),
+            to_text(r.get("OutlookID")),
         )
-    out(",\n".join(course_values))
-    out("ON CONFLICT (source_id) DO UPDATE SET")
-    out("  title = EXCLUDED.title,")
-    out("  course_type_code = EXCLUDED.course_type_code,")
-    out("  status_code = EXCLUDED.status_code,")
-    out("  updated_at = NOW();")
-    out("")
 
-    # ========================================================================
-    # 7. FACULTY MEMBERS
-    # ========================================================================
-    log.info("Processing faculty...")
-    out("-- ========================================================================")
-    out("-- FACULTY MEMBERS")
-    out("-- ========================================================================")
-    out("INSERT INTO training.faculty_members (source_id, given_name, surname, email, mobile, payroll_id, discipline, discipline_stream_code, certification_date, is_inactive, staff_id) VALUES")
-    fac_values = []
-    for i, r in enumerate(fac_rows, 1):
+
+def course_sql(rec):
+    return (
+        f"  ({sql_int(rec[0])}, {sql_str(rec[1])}, "
+        f"{sql_str(rec[2])}, "
+        f"{sql_date(rec[3])}, "
+        f"{sql_str(rec[4])}, {sql_str(rec[5])}, "
+        f"{sql_num(rec[6])}, {sql_str(rec[7])}, {sql_int(rec[8])}, "
+        f"{sql_str(rec[9])}, "
+        f"{sql_str(rec[10])})"
+    )
+
+
+def faculty_records():
+    """Yield training.faculty_members tuples (without staff_id) from FacultyList.csv.
+
+    The export has no item id: source_id is the row's position, and members
+    are matched by e-mail (idx_fm_email_key); members without one are
+    inserted once, matched by name. staff_id is resolved from payroll_id by
+    the database.
+    """
+    for i, r in enumerate(iter_csv_rows(UPLOAD_DIR / SOURCE_FILES["faculty"]), 1):
         pid = r.get("Payroll", "").strip()
         stream = map_stream(r.get("Stream", ""))
         inactive = r.get("Inactive", "").strip().lower() == "true"
-        fac_values.append(
-            f"  ({i}, {sql_str(r.get('GivenName'))}, {sql_str(r.get('Surname'))}, "
-            f"{sql_str(r.get('Mail'))}, {sql_str(r.get('Mobile'))}, {sql_str(pid)}, "
-            f"{sql_str(r.get('Discipline'))}, {sql_str(stream)}, "
-            f"{sql_date(r.get('CertificationDate', ''), '%d/%m/%Y')}, "
-            f"{sql_bool(inactive)}, "
-            f"(SELECT id FROM core.staff WHERE payroll_id = {sql_str(pid)}))"
+        yield (
+            i, to_text(r.get("GivenName")), to_text(r.get("Surname")),
+            stripped(r.get("Mail")), to_text(r.get("Mobile")), to_text(pid),
+            to_text(r.get("Discipline")), to_text(stream),
+            to_date(r.get("CertificationDate", ""), "%d/%m/%Y"),
+            inactive,
         )
-    out(",\n".join(fac_values))
-    out("ON CONFLICT DO NOTHING;")
-    out("")
 
-    # ========================================================================
-    # 8. SAMPLE ALERT RULES
-    # ========================================================================
-    log.info("Generating sample alert rules...")
-    out("-- ========================================================================")
-    out("-- SAMPLE ALERT RULES")
-    out("-- ========================================================================")
-    out("""
-INSERT INTO system.alert_rules (name, description, domain, metric, group_by, method, threshold_value, lookback_periods) VALUES
+
+def faculty_sql(rec):
+    return (
+        f"  ({rec[0]}, {sql_str(rec[1])}, {sql_str(rec[2])}, "
+        f"{sql_str(rec[3])}, {sql_str(rec[4])}, {sql_str(rec[5])}, "
+        f"{sql_str(rec[6])}, {sql_str(rec[7])}, "
+        f"{sql_date(rec[8])}, "
+        f"{sql_bool(rec[9])})"
+    )
+
+
+# ---------------------------------------------------------------------------
+# Source parsing
+# ---------------------------------------------------------------------------
+# Every upload file is parsed independently of the others, so with --jobs > 1
+# they are all parsed up front in a process pool. Sections still consume the
+# results in their fixed order, so the output is identical either way.
+# ---------------------------------------------------------------------------
+def _csv_reader(source):
+    return lambda: iter_csv_rows(UPLOAD_DIR / SOURCE_FILES[source])
+
+
+def _grouped_reader(source, cert_type):
+    # Reverse-pivoted person records; group checksum mismatches are logged
+    return lambda: csv_parser.parse_grouped_csv(UPLOAD_DIR / SOURCE_FILES[source], cert_type)
+
+
+SOURCES = OrderedDict([
+    # Largest first so the long parses start before the pool fills up
+    ("bls_csv", _grouped_reader("bls_csv", "BLS")),
+    ("participants_csv", _csv_reader("participants_csv")),
+    ("courses", course_records),
+    ("als_csv", _grouped_reader("als_csv", "ALS")),
+    ("census", census_ward_units),
+    ("org_units", org_unit_records),
+    ("transfers", transfer_unit_divisions),
+    ("faculty", faculty_records),
+])
+
+
+def parse_source(name):
+    """Parse one upload source in full (process pool entry point)."""
+    rows = SOURCES[name]()
+    # Grouped CSV results are already complete lists
+    return rows if isinstance(rows, csv_parser.GroupedCsvResult) else list(rows)
+
+
+def _init_worker(upload_dir, lookups):
+    global UPLOAD_DIR
+    UPLOAD_DIR = upload_dir
+    if lookups:
+        mapping.install_lookups(lookups)
+
+
+class SourceReader:
+    """Hands each section its parsed source rows.
+
+    With jobs <= 1 (the default) sources are read lazily, streaming, as the
+    sections ask for them. Otherwise every source in `uses` is submitted to a
+    process pool at start-up and each call waits for that source's result;
+    each result is a full list, so this trades memory for wall time.
+
+    `uses` counts the sections that read each source (default: every source
+    once). Each source is read once: the rows of a source read by more than
+    one section are kept until its last reader has had them.
+    """
+
+    def __init__(self, jobs=1, uses=None, lookups=None):
+        self._pool = None
+        self._futures = {}
+        self._kept = {}
+        self._uses = Counter(SOURCES if uses is None else uses)
+        names = [name for name in SOURCES if self._uses[name] > 0]
+        if jobs > 1 and names:
+            from concurrent.futures import ProcessPoolExecutor
+            self._pool = ProcessPoolExecutor(
+                max_workers=min(jobs, len(names)), initializer=_init_worker, initargs=(UPLOAD_DIR, lookups)
+            )
+            for name in names:
+                self._futures[name] = self._pool.submit(parse_source, name)
+
+    def __call__(self, name):
+        self._uses[name] -= 1
+        if name in self._kept:
+            return self._kept[name] if self._uses[name] > 0 else self._kept.pop(name)
+        future = self._futures.pop(name, None)
+        rows = SOURCES[name]() if future is None else future.result()
+        if self._uses[name] > 0 and isinstance(rows, Iterator):
+            rows = self._kept[name] = list(rows)
+        elif self._uses[name] > 0:
+            self._kept[name] = rows
+        return rows
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ---------------------------------------------------------------------------
+# Fingerprint manifest (--delta)
+# ---------------------------------------------------------------------------
+# Sections, the parsed sources they are built from and the tables they seed.
+# A section is regenerated when any of its upload files has changed.
+# ---------------------------------------------------------------------------
+SECTIONS = OrderedDict([
+    ("org_units", (("org_units",), ("org_units",))),
+    ("locations", (("census", "transfers"), ("wards", "admitting_units", "ward_unit_map"))),
+    ("staff", (("als_csv", "bls_csv", "participants_csv", "faculty"), ("staff",))),
+    ("courses", (("courses",), ("courses",))),
+    ("faculty_members", (("faculty",), ("faculty_members",))),
+])
+
+
+def row_key(table, rec):
+    """Natural key of a normalised row, as stored in the manifest."""
+    if table == "ward_unit_map":
+        return f"{rec[0]}|{rec[1]}"
+    if table == "faculty_members":
+        # Positions shift as the list changes; e-mail is the upsert key
+        return (rec[3] or f"{rec[1]}|{rec[2]}").lower()
+    return str(rec[0])
+
+
+def file_sha256(path):
+    """Return the hex SHA-256 of a file, or None if it does not exist."""
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    except FileNotFoundError:
+        return None
+    return h.hexdigest()
+
+
+class Manifest:
+    """SHA-256 fingerprints of the upload files and of every seeded row.
+
+    A manifest is written next to the output after every run. Given the
+    previous one (--delta), sections whose upload files are unchanged are
+    skipped without being parsed, and changed sections emit only rows that
+    are new or whose fingerprint differs. Rows that disappeared from the
+    sources are reported but not deleted. A section that fails part-way is
+    recorded as failed and regenerated in full by the next run.
+    """
+
+    def __init__(self, previous=None):
+        self.previous = previous or {}
+        self.data = {"generated": datetime.now().isoformat(), "files": {}, "rows": {}, "constants": {},
+                     "failed": []}
+        self.stale = set()
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return cls(json.load(f))
+        except FileNotFoundError:
+            log.warning(f"No manifest at {path}; generating everything")
+            return cls()
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=0, sort_keys=True)
+
+    def check(self):
+        """Fingerprint the upload files and work out which sections are stale.
+
+        Returns a Counter of the parsed sources the stale sections need: how
+        many of those sections read each one.
+        """
+        old_files = self.previous.get("files", {})
+        old_rows = self.previous.get("rows", {})
+        old_failed = self.previous.get("failed", [])
+        needed = Counter()
+        for section, (sources, tables) in SECTIONS.items():
+            changed = not self.previous or section in old_failed
+            for source in sources:
+                name = SOURCE_FILES[source]
+                if name not in self.data["files"]:
+                    self.data["files"][name] = file_sha256(UPLOAD_DIR / name)
+                if old_files.get(name) != self.data["files"][name]:
+                    changed = True
+            if changed:
+                self.stale.add(section)
+                needed.update(sources)
+            else:
+                for table in tables:
+                    self.data["rows"][table] = old_rows.get(table, {})
+        return needed
+
+    def failed(self, section):
+        """Forget a section's row fingerprints so the next run emits it again.
+
+        delta() records each row as it is read, so after a failure the
+        fingerprints cover rows that were never written.
+        """
+        self.data["failed"].append(section)
+        for table in SECTIONS[section][1]:
+            self.data["rows"].pop(table, None)
+
+    def constant_changed(self, name, text):
+        """Fingerprint a fixed block of seed SQL; True if it must be emitted."""
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        self.data["constants"][name] = digest
+        return not self.previous or self.previous.get("constants", {}).get(name) != digest
+
+    def delta(self, table, records):
+        """Yield the records of `table` that are new or changed since the previous run."""
+        old = self.previous.get("rows", {}).get(table, {})
+        new = self.data["rows"][table] = {}
+        emitted = 0
+        for rec in records:
+            key = row_key(table, rec)
+            digest = hashlib.sha256(repr(rec).encode("utf-8")).hexdigest()
+            new[key] = digest
+            if old.get(key) != digest:
+                emitted += 1
+                yield rec
+        if self.previous:
+            gone = sum(1 for key in old if key not in new)
+            log.info(f"  {table}: {emitted} new or changed of {len(new)} rows"
+                     + (f", {gone} no longer in the sources (not deleted)" if gone else ""))
+
+
+# Rules are matched by name, so re-running a load never adds a second copy
+# (system.alert_rules has no natural key to conflict on).
+ALERT_RULES_SQL = """
+INSERT INTO system.alert_rules (name, description, domain, metric, group_by, method, threshold_value, lookback_periods)
+SELECT v.* FROM (VALUES
     ('High Escalation Rate - Ward',
      'Fires when a ward''s daily escalation count exceeds 2 standard deviations above its 30-day mean',
      'escalation', 'daily_escalation_count', 'ward', 'z_score', 2.0, 30),
@@ -516,38 +786,653 @@ INSERT INTO system.alert_rules (name, description, domain, metric, group_by, met
      'escalation', 'daily_escalation_count', 'unit', 'z_score', 2.0, 30),
     ('Falling ALS Compliance',
      'Fires when an org unit''s ALS compliance shows a negative slope over 8 consecutive weeks',
-     'training', 'compliance_pct', 'org_unit', 'trend_slope', -0.5, 8),
+     'training', 'als_compliance_pct', 'org_unit', 'trend_slope', -0.5, 8),
     ('Falling BLS Compliance',
      'Fires when an org unit''s BLS compliance shows a negative slope over 8 consecutive weeks',
-     'training', 'compliance_pct', 'org_unit', 'trend_slope', -0.5, 8),
+     'training', 'bls_compliance_pct', 'org_unit', 'trend_slope', -0.5, 8),
     ('Critical Escalation Spike',
      'Fires when total critical escalations (code blue + MET + stroke + trauma) exceed 10 in a single day',
-     'escalation', 'daily_critical_count', NULL, 'threshold', 10, 1);
-""")
-
-    out("COMMIT;")
-    out("")
-    out("-- ============================================================================")
-    out("-- POST-SEED: Verify counts")
-    out("-- ============================================================================")
-    out("DO $$")
-    out("BEGIN")
-    out("  RAISE NOTICE 'Org units: %', (SELECT COUNT(*) FROM core.org_units);")
-    out("  RAISE NOTICE 'Wards: %', (SELECT COUNT(*) FROM core.wards);")
-    out("  RAISE NOTICE 'Admitting units: %', (SELECT COUNT(*) FROM core.admitting_units);")
-    out("  RAISE NOTICE 'Ward-unit mappings: %', (SELECT COUNT(*) FROM core.ward_unit_map);")
-    out("  RAISE NOTICE 'Staff: %', (SELECT COUNT(*) FROM core.staff);")
-    out("  RAISE NOTICE 'Courses: %', (SELECT COUNT(*) FROM training.courses);")
-    out("  RAISE NOTICE 'Faculty: %', (SELECT COUNT(*) FROM training.faculty_members);")
-    out("  RAISE NOTICE 'Alert rules: %', (SELECT COUNT(*) FROM system.alert_rules);")
-    out("END $$;")
-
-    # Write output
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        f.write("\n".join(out_lines))
-
-    log.info(f"Seed data written to {OUTPUT_FILE}")
-    log.info(f"Total lines: {len(out_lines)}")
+     'escalation', 'daily_critical_count', NULL, 'threshold', 10, 1)
+) AS v (name, description, domain, metric, group_by, method, threshold_value, lookback_periods)
+WHERE NOT EXISTS (SELECT 1 FROM system.alert_rules r WHERE r.name = v.name);
+"""
+
+
+# ---------------------------------------------------------------------------
+# Direct-to-database loader (--load)
+# ---------------------------------------------------------------------------
+# Each staging table mirrors the tuples from the matching *_records()
+# generator. Rows are streamed in with binary COPY and merged with one
+# set-based INSERT ... SELECT per target, all inside a single transaction.
+# ---------------------------------------------------------------------------
+STAGING = {
+    "org_units": (
+        [("id", "int8"), ("name", "text"), ("directorate", "text"), ("service_line", "text")],
+        """
+        INSERT INTO core.org_units (id, name, directorate, service_line)
+        SELECT id, name, directorate, service_line FROM stage_org_units
+        ON CONFLICT (id) DO UPDATE SET
+          name = EXCLUDED.name,
+          directorate = EXCLUDED.directorate,
+          service_line = EXCLUDED.service_line,
+          updated_at = NOW()
+        """,
+    ),
+    "wards": (
+        [("code", "text")],
+        """
+        INSERT INTO core.wards (code)
+        SELECT code FROM stage_wards
+        ON CONFLICT (code) DO NOTHING
+        """,
+    ),
+    "admitting_units": (
+        [("code", "text"), ("division", "text"), ("subdivision", "text")],
+        """
+        INSERT INTO core.admitting_units (code, division, subdivision)
+        SELECT code, division, subdivision FROM stage_admitting_units
+        ON CONFLICT (code) DO UPDATE SET
+          division = COALESCE(EXCLUDED.division, core.admitting_units.division),
+          subdivision = COALESCE(EXCLUDED.subdivision, core.admitting_units.subdivision)
+        """,
+    ),
+    "ward_unit_map": (
+        [("ward_code", "text"), ("unit_code", "text")],
+        """
+        INSERT INTO core.ward_unit_map (ward_id, admitting_unit_id)
+        SELECT w.id, au.id
+        FROM stage_ward_unit_map s
+        JOIN core.wards w ON w.code = s.ward_code
+        JOIN core.admitting_units au ON au.code = s.unit_code
+        ON CONFLICT (ward_id, admitting_unit_id) DO NOTHING
+        """,
+    ),
+    "staff": (
+        [("payroll_id", "text"), ("given_name", "text"), ("surname", "text"), ("email", "text"),
+         ("discipline_stream_code", "text"), ("job_family_code", "text"), ("org_unit_id", "int8"),
+         ("facility", "text"), ("manager_name", "text")],
+        """
+        INSERT INTO core.staff (payroll_id, given_name, surname, email, discipline_stream_code,
+                                job_family_code, org_unit_id, facility, manager_name)
+        SELECT payroll_id, given_name, surname, email, discipline_stream_code,
+               job_family_code, org_unit_id, facility, manager_name
+        FROM stage_staff
+        ON CONFLICT (payroll_id) DO UPDATE SET
+          given_name = COALESCE(EXCLUDED.given_name, core.staff.given_name),
+          surname = COALESCE(EXCLUDED.surname, core.staff.surname),
+          email = COALESCE(EXCLUDED.email, core.staff.email),
+          discipline_stream_code = COALESCE(EXCLUDED.discipline_stream_code, core.staff.discipline_stream_code),
+          job_family_code = COALESCE(EXCLUDED.job_family_code, core.staff.job_family_code),
+          org_unit_id = COALESCE(EXCLUDED.org_unit_id, core.staff.org_unit_id),
+          facility = COALESCE(EXCLUDED.facility, core.staff.facility),
+          manager_name = COALESCE(EXCLUDED.manager_name, core.staff.manager_name),
+          last_seen_at = NOW(),
+          updated_at = NOW()
+        """,
+    ),
+    "courses": (
+        [("source_id", "int4"), ("title", "text"), ("course_type_code", "text"), ("course_date", "date"),
+         ("start_time", "text"), ("end_time", "text"), ("duration_hours", "float8"), ("venue", "text"),
+         ("capacity", "int4"), ("status_code", "text"), ("outlook_id", "text")],
+        """
+        INSERT INTO training.courses (source_id, title, course_type_code, course_date, start_time,
+                                      end_time, duration_hours, venue, capacity, status_code, outlook_id)
+        SELECT source_id, title, course_type_code, course_date, start_time::time,
+               end_time::time, duration_hours, venue, capacity, status_code, outlook_id
+        FROM stage_courses
+        ON CONFLICT (source_id) DO UPDATE SET
+          title = EXCLUDED.title,
+          course_type_code = EXCLUDED.course_type_code,
+          course_date = EXCLUDED.course_date,
+          start_time = EXCLUDED.start_time,
+          end_time = EXCLUDED.end_time,
+          duration_hours = EXCLUDED.duration_hours,
+          venue = EXCLUDED.venue,
+          capacity = EXCLUDED.capacity,
+          status_code = EXCLUDED.status_code,
+          outlook_id = EXCLUDED.outlook_id,
+          updated_at = NOW()
+        """,
+    ),
+    "faculty_members": (
+        [("source_id", "int4"), ("given_name", "text"), ("surname", "text"), ("email", "text"),
+         ("mobile", "text"), ("payroll_id", "text"), ("discipline", "text"),
+         ("discipline_stream_code", "text"), ("certification_date", "date"), ("is_inactive", "bool")],
+        """
+        INSERT INTO training.faculty_members (source_id, given_name, surname, email, mobile, payroll_id,
+                                              discipline, discipline_stream_code, certification_date,
+                                              is_inactive, staff_id)
+        SELECT f.source_id, f.given_name, f.surname, f.email, f.mobile, f.payroll_id,
+               f.discipline, f.discipline_stream_code, f.certification_date,
+               f.is_inactive, s.id
+        FROM stage_faculty_members f
+        LEFT JOIN core.staff s ON s.payroll_id = f.payroll_id
+        -- No e-mail, no upsert key: insert once, matched by name
+        WHERE f.email IS NOT NULL
+           OR NOT EXISTS (
+               SELECT 1 FROM training.faculty_members m
+               WHERE m.email IS NULL
+                 AND m.given_name IS NOT DISTINCT FROM f.given_name
+                 AND m.surname IS NOT DISTINCT FROM f.surname
+           )
+        ON CONFLICT (LOWER(email)) DO UPDATE SET
+          source_id = EXCLUDED.source_id,
+          given_name = EXCLUDED.given_name,
+          surname = EXCLUDED.surname,
+          email = EXCLUDED.email,
+          mobile = EXCLUDED.mobile,
+          payroll_id = EXCLUDED.payroll_id,
+          discipline = EXCLUDED.discipline,
+          discipline_stream_code = EXCLUDED.discipline_stream_code,
+          certification_date = EXCLUDED.certification_date,
+          is_inactive = EXCLUDED.is_inactive,
+          staff_id = EXCLUDED.staff_id
+        """,
+    ),
+}
+
+
+def copy_and_merge(cur, name, records):
+    """COPY `records` into a temp staging table and merge it into its target.
+
+    Returns (rows_copied, rows_merged).
+    """
+    columns, merge_sql = STAGING[name]
+    table = f"stage_{name}"
+    with stage(name) as st:
+        cur.execute(
+            f"CREATE TEMP TABLE {table} ("
+            + ", ".join(f"{col} {typ}" for col, typ in columns)
+            + ") ON COMMIT DROP"
+        )
+        copied = 0
+        with db_query(f"copy {table}"), cur.copy(
+            f"COPY {table} ({', '.join(col for col, _ in columns)}) FROM STDIN (FORMAT BINARY)"
+        ) as copy:
+            copy.set_types([typ for _, typ in columns])
+            for rec in records:
+                copy.write_row(rec)
+                copied += 1
+        with db_query(f"merge {name}"):
+            cur.execute(merge_sql)
+        merged = st.rows_out = cur.rowcount
+        st.rows_in = copied
+    log.info(f"  {name}: copied {copied}, merged {merged}")
+    return copied, merged
+
+
+def load(conninfo, src, manifest):
+    """Stream the stale seed sections straight into the database in one transaction."""
+    import psycopg
+
+    with psycopg.connect(conninfo) as conn:
+        with conn.cursor() as cur:
+            if "org_units" in manifest.stale:
+                log.info("Loading org units...")
+                copy_and_merge(cur, "org_units", manifest.delta("org_units", src("org_units")))
+
+            if "locations" in manifest.stale:
+                log.info("Loading wards and admitting units from inpatient census...")
+                wards, units, ward_units_map, unit_divisions = read_census_locations(src)
+                copy_and_merge(cur, "wards", manifest.delta("wards", ward_records(wards)))
+                copy_and_merge(cur, "admitting_units", manifest.delta(
+                    "admitting_units", admitting_unit_records(units, unit_divisions)))
+                copy_and_merge(cur, "ward_unit_map", manifest.delta(
+                    "ward_unit_map", ward_unit_records(ward_units_map)))
+
+            if "staff" in manifest.stale:
+                log.info("Loading staff from all sources...")
+                staff = collect_staff(src)
+                copy_and_merge(cur, "staff", manifest.delta("staff", staff_records(staff)))
+                del staff
+
+            if "courses" in manifest.stale:
+                log.info("Loading courses...")
+                copy_and_merge(cur, "courses", manifest.delta("courses", src("courses")))
+
+            if "faculty_members" in manifest.stale:
+                log.info("Loading faculty...")
+                copy_and_merge(cur, "faculty_members", manifest.delta("faculty_members", src("faculty")))
+
+            if manifest.constant_changed("alert_rules", ALERT_RULES_SQL):
+                log.info("Loading sample alert rules...")
+                cur.execute(ALERT_RULES_SQL)
+        # Leaving the connection block commits; any exception above rolls back.
+
+
+# ---------------------------------------------------------------------------
+# Synthetic data set (--synthetic)
+# ---------------------------------------------------------------------------
+# lib/synthetic.py rows at production volume, loaded the way the pipelines
+# load them: one import per weekly snapshot, census day, transfers day,
+# pager day and monthly deaths report, each followed by its refresh, so
+# cert history, episodes and the aggregates are built by the real database
+# functions. Every snapshot week and census day commits on its own, so a
+# 10-year load never holds one huge transaction.
+# ---------------------------------------------------------------------------
+def load_synthetic(conninfo, cfg):
+    """Load the synthetic data set `cfg` into an empty, fully migrated database."""
+    import psycopg
+    from lib.db import bulk_load, complete_import, create_import
+
+    with psycopg.connect(conninfo) as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT EXISTS (SELECT 1 FROM training.certification_snapshots)"
+                " OR EXISTS (SELECT 1 FROM clinical.inpatient_census)"
+                " OR EXISTS (SELECT 1 FROM escalation.pager_messages_raw)"
+            )
+            if cur.fetchone()[0]:
+                raise SystemExit("--synthetic needs a freshly migrated database "
+                                 "(snapshots, census or pager messages already loaded)")
+            run_id = create_import(cur, "synthetic", "generate_seed_data.py --synthetic",
+                                   cfg.metadata())
+
+            log.info(f"Generating workforce for {cfg!r}...")
+            with stage("workforce") as st:
+                workforce = synthetic.Workforce(cfg)
+                st.rows_out = len(workforce.members)
+            log.info(f"  {len(workforce.members)} staff over the period")
+            with stage("dimensions"):
+                copy_and_merge(cur, "org_units", synthetic.org_unit_records(cfg))
+                copy_and_merge(cur, "wards", synthetic.ward_records(cfg))
+                copy_and_merge(cur, "admitting_units", synthetic.admitting_unit_records(cfg))
+                copy_and_merge(cur, "ward_unit_map", synthetic.ward_unit_records(cfg))
+                copy_and_merge(cur, "staff", workforce.staff_records())
+                copy_and_merge(cur, "courses", synthetic.course_records(cfg))
+                copy_and_merge(cur, "faculty_members", workforce.faculty_records())
+                # A no-op on a migrated database, which has the rules from 010
+                cur.execute(ALERT_RULES_SQL)
+            ids = synthetic.SyntheticIds.load(cur)
+            with stage("course_participants") as st:
+                loaded = bulk_load(cur, "training.course_participants", synthetic.PARTICIPANT_COLUMNS,
+                                   workforce.participant_records(ids))
+                st.rows_out = loaded.received
+            log.info(f"  course_participants: {loaded.received}")
+            conn.commit()
+            total = 0
+
+            log.info("Loading weekly certification snapshots...")
+            with stage("cert_snapshots") as st:
+                for snapshot_date, cert_type, rows in workforce.cert_snapshots(ids):
+                    compliant = sum(1 for r in rows if r[2] == "acquired")
+                    non_compliant = sum(1 for r in rows if r[2] not in ("acquired", "not_assigned"))
+                    import_id = create_import(cur, f"{cert_type.lower()}_cert", "synthetic")
+                    cur.execute(
+                        "INSERT INTO training.certification_snapshots (import_id, certification_type,"
+                        " snapshot_date, total_compliant, total_non_compliant, compliance_pct)"
+                        " VALUES (%s, %s, %s, %s, %s, %s) RETURNING id",
+                        (import_id, cert_type, snapshot_date, compliant, non_compliant,
+                         round(100 * compliant / max(1, compliant + non_compliant), 2)),
+                    )
+                    snapshot_id = cur.fetchone()[0]
+                    loaded = bulk_load(cur, "training.staff_certifications",
+                                       ["snapshot_id", *synthetic.CERT_COLUMNS],
+                                       ((snapshot_id, *r) for r in rows))
+                    with db_query("apply_cert_snapshot"):
+                        cur.execute("SELECT training.apply_cert_snapshot(%s)", (snapshot_id,))
+                    with db_query("refresh_training_compliance"):
+                        cur.execute("SELECT agg.refresh_training_compliance(%s)", (snapshot_id,))
+                    complete_import(cur, import_id, **loaded.import_counts())
+                    conn.commit()
+                    total += loaded.received
+                    if cert_type == "BLS" and snapshot_date.month == 1 and snapshot_date.day <= 7:
+                        log.info(f"  {snapshot_date}: {total} certification rows so far")
+                st.rows_out = total
+
+            log.info("Loading census, transfers, deaths and pager messages...")
+            sim = synthetic.ClinicalSimulation(cfg, ids, PATIENT_HASHER)
+            deaths = []
+
+            def load_day(source_type, table, columns, rows):
+                import_id = create_import(cur, source_type, "synthetic")
+                loaded = bulk_load(cur, table, ["import_id", *columns],
+                                   ((import_id, *r) for r in rows))
+                complete_import(cur, import_id, **loaded.import_counts())
+                return import_id, loaded.received
+
+            with stage("clinical_days") as st:
+                clinical_start = total
+                for day in sim.days():
+                    if deaths and day.day.day == 1:
+                        total += load_day("deaths", "clinical.deaths", synthetic.DEATH_COLUMNS, deaths)[1]
+                        deaths = []
+                    deaths.extend(day.deaths)
+                    total += load_day("inpatient_census", "clinical.inpatient_census",
+                                      synthetic.CENSUS_COLUMNS, day.census)[1]
+                    with db_query("apply_census_day"):
+                        cur.execute("SELECT clinical.apply_census_day(%s)", (day.day,))
+                    total += load_day("transfers", "clinical.transfers",
+                                      synthetic.TRANSFER_COLUMNS, day.transfers)[1]
+                    total += load_day("pager_raw", "escalation.pager_messages_raw",
+                                      synthetic.PAGER_COLUMNS, day.pager)[1]
+                    cur.execute("SELECT escalation.lock_event_load()")
+                    total += bulk_load(cur, "escalation.events", synthetic.EVENT_COLUMNS,
+                                       day.events).received
+                    with db_query("refresh_escalation_daily_incremental"):
+                        cur.execute("SELECT agg.refresh_escalation_daily_incremental()")
+                    conn.commit()
+                    if day.day.month == 1 and day.day.day == 1:
+                        log.info(f"  {day.day}: {total} rows so far")
+                if deaths:
+                    total += load_day("deaths", "clinical.deaths", synthetic.DEATH_COLUMNS, deaths)[1]
+                st.rows_out = total - clinical_start
+
+            # Pager ids were assigned by the generator
+            cur.execute(
+                "SELECT setval(pg_get_serial_sequence('escalation.pager_messages_raw', 'id'),"
+                " (SELECT MAX(id) FROM escalation.pager_messages_raw))"
+            )
+            complete_import(cur, run_id, records_received=total, records_inserted=total,
+                            metadata={"instrumentation": current_run().report()})
+            log.info(f"Synthetic data set loaded: {total} fact rows")
+
+
+# ---------------------------------------------------------------------------
+# Main generation
+# ---------------------------------------------------------------------------
+def generate(w, src, manifest):
+    """Write the seed migration through SqlWriter `w`, reading sources via `src`.
+
+    Only sections in manifest.stale are generated, and only the rows that
+    manifest.delta() passes through are written.
+    """
+    w.line("-- ============================================================================")
+    if manifest.previous:
+        w.line("-- Migration 010 (delta): Seed Data changes since "
+               f"{manifest.previous.get('generated', 'the previous run')}")
+    else:
+        w.line("-- Migration 010: Seed Data (generated from sample files)")
+    w.line("-- REdI Data Platform")
+    w.line(f"-- Generated: {datetime.now().isoformat()}")
+    w.line("-- ============================================================================")
+    w.line("")
+    w.line("BEGIN;")
+    w.line("")
+
+    # ========================================================================
+    # 1. ORG UNITS
+    # ========================================================================
+    if "org_units" in manifest.stale:
+        with stage("org_units") as st:
+            log.info("Processing org units...")
+            try:
+                w.banner("ORG UNITS")
+                n = st.rows_out = w.insert(
+                    "INSERT INTO core.org_units (id, name, directorate, service_line)",
+                    (org_unit_sql(rec) for rec in manifest.delta("org_units", src("org_units"))),
+                    "ON CONFLICT (id) DO UPDATE SET\n"
+                    "  name = EXCLUDED.name,\n"
+                    "  directorate = EXCLUDED.directorate,\n"
+                    "  service_line = EXCLUDED.service_line,\n"
+                    "  updated_at = NOW();",
+                )
+                w.line("")
+                log.info(f"  Found {n} org units")
+            except Exception as e:
+                log.error(f"  Error processing org units: {e}")
+                manifest.failed("org_units")
+    else:
+        log.info("Org units unchanged")
+
+    # ========================================================================
+    # 2. WARDS (extracted from inpatient census)
+    # ========================================================================
+    if "locations" in manifest.stale:
+        with stage("locations") as st:
+            log.info("Processing wards from inpatient census...")
+            try:
+                wards, units, ward_units_map, unit_divisions = read_census_locations(src)
+                log.info(f"  Found {len(wards)} wards, {len(units)} admitting units")
+
+                w.banner("WARDS")
+                st.rows_out = w.insert(
+                    "INSERT INTO core.wards (code)",
+                    (ward_sql(rec) for rec in manifest.delta("wards", ward_records(wards))),
+                    "ON CONFLICT (code) DO NOTHING;",
+                )
+                w.line("")
+
+                # 3. ADMITTING UNITS
+                w.banner("ADMITTING UNITS")
+                st.rows_out += w.insert(
+                    "INSERT INTO core.admitting_units (code, division, subdivision)",
+                    (admitting_unit_sql(rec) for rec in manifest.delta(
+                        "admitting_units", admitting_unit_records(units, unit_divisions))),
+                    "ON CONFLICT (code) DO UPDATE SET\n"
+                    "  division = COALESCE(EXCLUDED.division, core.admitting_units.division),\n"
+                    "  subdivision = COALESCE(EXCLUDED.subdivision, core.admitting_units.subdivision);",
+                )
+                w.line("")
+
+                # 4. WARD-UNIT MAP
+                w.banner("WARD ↔ UNIT MAP")
+                st.rows_out += w.insert_select(
+                    "INSERT INTO core.ward_unit_map (ward_id, admitting_unit_id)",
+                    "SELECT w.id, au.id",
+                    (ward_unit_sql(rec) for rec in manifest.delta(
+                        "ward_unit_map", ward_unit_records(ward_units_map))),
+                    ") AS v (ward_code, unit_code)\n"
+                    "JOIN core.wards w ON w.code = v.ward_code\n"
+                    "JOIN core.admitting_units au ON au.code = v.unit_code\n"
+                    "ON CONFLICT (ward_id, admitting_unit_id) DO NOTHING;",
+                )
+                w.line("")
+
+            except Exception as e:
+                log.error(f"  Error processing wards/units: {e}")
+                manifest.failed("locations")
+    else:
+        log.info("Wards and admitting units unchanged")
+
+    # ========================================================================
+    # 5. STAFF (from all sources)
+    # ========================================================================
+    if "staff" in manifest.stale:
+        with stage("staff") as st:
+            log.info("Collecting staff from all sources...")
+            staff = collect_staff(src)
+            log.info(f"  Total unique staff: {len(staff)}")
+
+            st.rows_in = len(staff)
+            w.banner("STAFF")
+            st.rows_out = w.insert(
+                "INSERT INTO core.staff (payroll_id, given_name, surname, email, discipline_stream_code, job_family_code, org_unit_id, facility, manager_name)",
+                (staff_sql(rec) for rec in manifest.delta("staff", staff_records(staff))),
+                "ON CONFLICT (payroll_id) DO UPDATE SET\n"
+                "  given_name = COALESCE(EXCLUDED.given_name, core.staff.given_name),\n"
+                "  surname = COALESCE(EXCLUDED.surname, core.staff.surname),\n"
+                "  email = COALESCE(EXCLUDED.email, core.staff.email),\n"
+                "  discipline_stream_code = COALESCE(EXCLUDED.discipline_stream_code, core.staff.discipline_stream_code),\n"
+                "  job_family_code = COALESCE(EXCLUDED.job_family_code, core.staff.job_family_code),\n"
+                "  org_unit_id = COALESCE(EXCLUDED.org_unit_id, core.staff.org_unit_id),\n"
+                "  facility = COALESCE(EXCLUDED.facility, core.staff.facility),\n"
+                "  manager_name = COALESCE(EXCLUDED.manager_name, core.staff.manager_name),\n"
+                "  last_seen_at = NOW(),\n"
+                "  updated_at = NOW();",
+            )
+            w.line("")
+            del staff
+    else:
+        log.info("Staff unchanged")
+
+    # ========================================================================
+    # 6. COURSES
+    # ========================================================================
+    if "courses" in manifest.stale:
+        with stage("courses") as st:
+            log.info("Processing courses...")
+            w.banner("COURSES")
+            st.rows_out = w.insert(
+                "INSERT INTO training.courses (source_id, title, course_type_code, course_date, start_time, end_time, duration_hours, venue, capacity, status_code, outlook_id)",
+                (course_sql(rec) for rec in manifest.delta("courses", src("courses"))),
+                "ON CONFLICT (source_id) DO UPDATE SET\n"
+                "  title = EXCLUDED.title,\n"
+                "  course_type_code = EXCLUDED.course_type_code,\n"
+                "  course_date = EXCLUDED.course_date,\n"
+                "  start_time = EXCLUDED.start_time,\n"
+                "  end_time = EXCLUDED.end_time,\n"
+                "  duration_hours = EXCLUDED.duration_hours,\n"
+                "  venue = EXCLUDED.venue,\n"
+                "  capacity = EXCLUDED.capacity,\n"
+                "  status_code = EXCLUDED.status_code,\n"
+                "  outlook_id = EXCLUDED.outlook_id,\n"
+                "  updated_at = NOW();",
+            )
+            w.line("")
+    else:
+        log.info("Courses unchanged")
+
+    # ========================================================================
+    # 7. FACULTY MEMBERS
+    # ========================================================================
+    if "faculty_members" in manifest.stale:
+        with stage("faculty_members") as st:
+            log.info("Processing faculty...")
+            w.banner("FACULTY MEMBERS")
+            st.rows_out = w.insert_select(
+                "INSERT INTO training.faculty_members (source_id, given_name, surname, email, mobile, payroll_id, discipline, discipline_stream_code, certification_date, is_inactive, staff_id)",
+                "SELECT v.source_id, v.given_name, v.surname, v.email, v.mobile, v.payroll_id, v.discipline, v.discipline_stream_code, v.certification_date::date, v.is_inactive, s.id",
+                (faculty_sql(rec) for rec in manifest.delta("faculty_members", src("faculty"))),
+                ") AS v (source_id, given_name, surname, email, mobile, payroll_id, discipline, discipline_stream_code, certification_date, is_inactive)\n"
+                "LEFT JOIN core.staff s ON s.payroll_id = v.payroll_id\n"
+                "WHERE v.email IS NOT NULL\n"
+                "   OR NOT EXISTS (\n"
+                "       SELECT 1 FROM training.faculty_members m\n"
+                "       WHERE m.email IS NULL\n"
+                "         AND m.given_name IS NOT DISTINCT FROM v.given_name\n"
+                "         AND m.surname IS NOT DISTINCT FROM v.surname\n"
+                "   )\n"
+                "ON CONFLICT (LOWER(email)) DO UPDATE SET\n"
+                "  source_id = EXCLUDED.source_id,\n"
+                "  given_name = EXCLUDED.given_name,\n"
+                "  surname = EXCLUDED.surname,\n"
+                "  email = EXCLUDED.email,\n"
+                "  mobile = EXCLUDED.mobile,\n"
+                "  payroll_id = EXCLUDED.payroll_id,\n"
+                "  discipline = EXCLUDED.discipline,\n"
+                "  discipline_stream_code = EXCLUDED.discipline_stream_code,\n"
+                "  certification_date = EXCLUDED.certification_date,\n"
+                "  is_inactive = EXCLUDED.is_inactive,\n"
+                "  staff_id = EXCLUDED.staff_id;",
+            )
+            w.line("")
+    else:
+        log.info("Faculty unchanged")
+
+    # ========================================================================
+    # 8. SAMPLE ALERT RULES
+    # ========================================================================
+    if manifest.constant_changed("alert_rules", ALERT_RULES_SQL):
+        with stage("alert_rules"):
+            log.info("Generating sample alert rules...")
+            w.banner("SAMPLE ALERT RULES")
+            w.line(ALERT_RULES_SQL)
+
+    w.line("COMMIT;")
+    w.line("")
+    w.line("-- ============================================================================")
+    w.line("-- POST-SEED: Verify counts")
+    w.line("-- ============================================================================")
+    w.line("DO $$")
+    w.line("BEGIN")
+    w.line("  RAISE NOTICE 'Org units: %', (SELECT COUNT(*) FROM core.org_units);")
+    w.line("  RAISE NOTICE 'Wards: %', (SELECT COUNT(*) FROM core.wards);")
+    w.line("  RAISE NOTICE 'Admitting units: %', (SELECT COUNT(*) FROM core.admitting_units);")
+    w.line("  RAISE NOTICE 'Ward-unit mappings: %', (SELECT COUNT(*) FROM core.ward_unit_map);")
+    w.line("  RAISE NOTICE 'Staff: %', (SELECT COUNT(*) FROM core.staff);")
+    w.line("  RAISE NOTICE 'Courses: %', (SELECT COUNT(*) FROM training.courses);")
+    w.line("  RAISE NOTICE 'Faculty: %', (SELECT COUNT(*) FROM training.faculty_members);")
+    w.line("  RAISE NOTICE 'Alert rules: %', (SELECT COUNT(*) FROM system.alert_rules);")
+    w.line("END $$;")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate REdI seed data SQL from sample files.")
+    parser.add_argument(
+        "--chunk-size", type=int, default=INSERT_CHUNK_ROWS,
+        help=f"Maximum rows per INSERT statement (default {INSERT_CHUNK_ROWS}; 0 = one statement per section)",
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=1,
+        help="Worker processes for parsing the upload files (default 1: stream each file "
+             "sequentially with bounded memory; more parse every file in full up front)",
+    )
+    parser.add_argument(
+        "--load", action="store_true",
+        help="COPY the seed rows straight into the database instead of writing SQL",
+    )
+    parser.add_argument(
+        "--delta", action="store_true",
+        help="Only emit sections and rows that changed since the last run's manifest "
+             "(SQL goes to *_delta.sql next to the full seed)",
+    )
+    parser.add_argument(
+        "--lookups-from-db", action="store_true",
+        help="Read the label → code mappings from the system.lookup_* tables at --dsn "
+             "instead of the built-in copies",
+    )
+    parser.add_argument(
+        "--dsn", default="",
+        help="libpq connection string for --load (default: PGHOST/PGPORT/PGDATABASE/PGUSER env vars)",
+    )
+    parser.add_argument(
+        "--report", type=Path, default=OUTPUT_FILE.with_suffix(".timings.json"),
+        help="Per-stage timing, row-count and memory report (JSON; set REDI_PROFILE=cprofile,"
+             "tracemalloc to add profiles)",
+    )
+    synth = parser.add_argument_group(
+        "synthetic data", "Load a generated data set at production volume instead of the "
+                          "sample files (into the --dsn database; no SQL file is written)")
+    synth.add_argument("--synthetic", action="store_true",
+                       help="Load lib/synthetic.py data into a freshly migrated database")
+    synth.add_argument("--years", type=float, default=5, help="Years of history (default 5)")
+    synth.add_argument("--scale", type=float, default=1.0,
+                       help="Multiplier on the production volumes in redi-db-spec.md §17 (default 1.0)")
+    synth.add_argument("--seed", type=int, default=1, help="Random seed (default 1)")
+    synth.add_argument("--end", type=date.fromisoformat, default=None,
+                       help="Last day of data, YYYY-MM-DD (default today)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # No 120 s budget: this runs from the command line, not a Function
+    with Instrumentation("generate_seed_data", budget_seconds=None) as run:
+        if args.synthetic:
+            load_synthetic(args.dsn, synthetic.SyntheticConfig(args.years, args.scale, args.seed, args.end))
+        else:
+            generate_seed(args)
+    run.write_report(args.report)
+
+
+def generate_seed(args):
+    """Write (or with --load, load) the seed data from the sample files."""
+    manifest_file = OUTPUT_FILE.with_suffix(".manifest.json")
+    manifest = Manifest.load(manifest_file) if args.delta else Manifest()
+    needed = manifest.check()
+    log.info(f"Sections to generate: {', '.join(s for s in SECTIONS if s in manifest.stale) or 'none'}")
+
+    lookups = None
+    if args.lookups_from_db:
+        import psycopg
+        with psycopg.connect(args.dsn) as conn:
+            lookups = mapping.load_lookups(conn)
+
+    with SourceReader(args.jobs, needed, lookups) as src:
+        if args.load:
+            load(args.dsn, src, manifest)
+            log.info("Seed data loaded into database")
+        else:
+            output = OUTPUT_FILE.with_name(f"{OUTPUT_FILE.stem}_delta.sql") if args.delta else OUTPUT_FILE
+            with open(output, "w", encoding="utf-8") as f:
+                w = SqlWriter(f, chunk_rows=args.chunk_size)
+                generate(w, src, manifest)
+            log.info(f"Seed data written to {output}")
+            log.info(f"Total lines: {w.lines}")
+
+    manifest.save(manifest_file)
+    log.info(f"Manifest written to {manifest_file}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1 @@
+"""Shared library modules for the REdI data platform (non-function code)."""
@@ -0,0 +1,574 @@
+"""
+lib/alert_engine.py
+
+Evaluates the active system.alert_rules over the agg.* rollups and records
+the firings in system.alert_history.
+
+Pipeline position: quality_check (orch_pager, orch_certifications), after
+refresh_aggregates
+Reads: system.alert_rules, agg.escalation_daily, agg.training_compliance,
+       system.lookup_escalation_type
+Writes: system.alert_history
+Returns: Firing objects; evaluate_rules() returns per-run counts
+
+Rules are grouped by domain and each domain's lookback window is loaded in
+one query, sized for the longest rule: one GROUPING SETS query returns the
+ward, unit and facility-wide daily series for escalation, another the org
+unit, directorate and facility compliance series for each certification
+type. Each series becomes a groups × periods NumPy matrix, and every method
+(rolling mean/stddev, IQR fences, least-squares slope) is computed for all
+groups of a rule at once. Firings are written with a single INSERT over
+unnest()ed arrays.
+
+A firing is keyed by rule × period × group (migration 017). The pager
+pipeline re-evaluates the same day every 15 minutes; a repeat firing
+updates the stored value instead of adding a row, and only new firings are
+counted for notification.
+
+See redi-db-spec.md §11.3-11.4 (alert tables) and redi-functions-spec.md §3.5.
+"""
+
+import json
+import logging
+from collections.abc import Iterable, Mapping, Sequence
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+logger = logging.getLogger("redi.alert_engine")
+
+AEST = timezone(timedelta(hours=10), "AEST")   # Hospital time, no daylight saving
+
+DEFAULT_LOOKBACK = 30              # system.alert_rules.lookback_periods default
+DEFAULT_THRESHOLDS = {"z_score": 2.0, "iqr": 1.5}
+MIN_BASELINE_PERIODS = 3           # Baseline points needed for z_score / iqr
+MIN_TREND_PERIODS = 3              # Points needed for trend_slope
+
+METHODS = ("z_score", "iqr", "threshold", "trend_slope")
+
+# Rule metric → series metrics it is evaluated over, per domain
+METRICS: dict[str, dict[str, tuple[str, ...]]] = {
+    "escalation": {
+        "daily_escalation_count": ("daily_escalation_count",),
+        "daily_critical_count": ("daily_critical_count",),
+    },
+    "training": {
+        "compliance_pct": ("als_compliance_pct", "bls_compliance_pct"),
+        "als_compliance_pct": ("als_compliance_pct",),
+        "bls_compliance_pct": ("bls_compliance_pct",),
+    },
+}
+
+
+# ============================================================================
+# Rules and series
+# ============================================================================
+
+class AlertRule:
+    """One system.alert_rules row."""
+
+    __slots__ = ("id", "name", "domain", "metric", "group_by", "method",
+                 "threshold_value", "lookback_periods")
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        domain: str,
+        metric: str,
+        group_by: str | None,
+        method: str,
+        threshold_value: float | None = None,
+        lookback_periods: int | None = None,
+    ):
+        self.id = id
+        self.name = name
+        self.domain = domain
+        self.metric = metric
+        self.group_by = group_by
+        self.method = method
+        self.threshold_value = (
+            DEFAULT_THRESHOLDS.get(method) if threshold_value is None else float(threshold_value)
+        )
+        self.lookback_periods = lookback_periods or DEFAULT_LOOKBACK
+
+    def __repr__(self) -> str:
+        return f"AlertRule({self.id}, {self.name!r}, {self.method})"
+
+    @property
+    def periods_needed(self) -> int:
+        """Periods of history the rule reads, including the current one."""
+        if self.method == "threshold":
+            return 1
+        if self.method == "trend_slope":
+            return self.lookback_periods
+        return self.lookback_periods + 1
+
+
+class Series:
+    """One metric for many groups over consecutive periods.
+
+    Args:
+        metric: Series metric name (a METRICS value).
+        periods: Period dates, oldest first; the last is the current period.
+        groups: (group_by, group_id) per matrix row; group_by is None for
+            the facility-wide row.
+        values: len(groups) × len(periods) float matrix, NaN where a group
+            has no value.
+        context: Extra context added to every firing (e.g. certification type).
+    """
+
+    __slots__ = ("metric", "periods", "groups", "values", "context", "_rows")
+
+    def __init__(
+        self,
+        metric: str,
+        periods: Sequence[date],
+        groups: Sequence[tuple[str | None, object]],
+        values: np.ndarray,
+        context: Mapping | None = None,
+    ):
+        self.metric = metric
+        self.periods = list(periods)
+        self.groups = list(groups)
+        self.values = values
+        self.context = dict(context or {})
+        rows: dict[str | None, list[int]] = {}
+        for i, (group_by, _) in enumerate(self.groups):
+            rows.setdefault(group_by, []).append(i)
+        self._rows = {k: np.array(v, dtype=np.intp) for k, v in rows.items()}
+
+    def __repr__(self) -> str:
+        return f"Series({self.metric!r}, {len(self.groups)} groups × {len(self.periods)} periods)"
+
+    def rows(self, group_by: str | None) -> np.ndarray:
+        """Matrix row indices for one grouping level."""
+        return self._rows.get(group_by, np.empty(0, dtype=np.intp))
+
+    def group_key(self, i: int) -> str:
+        group_by, group_id = self.groups[i]
+        prefix = f"{self.context['certification_type']}:" if "certification_type" in self.context else ""
+        return f"{prefix}all" if group_by is None else f"{prefix}{group_by}:{group_id}"
+
+
+def _matrix(
+    rows: Iterable[Sequence],
+    period_index: Mapping[date, int],
+    n_periods: int,
+    n_metrics: int,
+    fill: float,
+) -> tuple[list[tuple[str | None, object]], np.ndarray]:
+    """Scatter (period, group_by, group_id, *metrics) rows into matrices.
+
+    Returns:
+        Groups in first-seen order, and an n_metrics × groups × periods array.
+    """
+    groups: dict[tuple[str | None, object], int] = {}
+    gi, pi, vals = [], [], []
+    for period, group_by, group_id, *metrics in rows:
+        if group_by is not None and group_id is None:
+            continue    # Events/staff without a ward or org unit: facility row only
+        p = period_index.get(period)
+        if p is None:
+            continue
+        gi.append(groups.setdefault((group_by, group_id), len(groups)))
+        pi.append(p)
+        vals.append(metrics)
+    out = np.full((n_metrics, len(groups), n_periods), fill, dtype=np.float64)
+    if vals:
+        out[:, gi, pi] = np.array(vals, dtype=np.float64).T
+    return list(groups), out
+
+
+# ============================================================================
+# Loading
+# ============================================================================
+
+_RULES_QUERY = """
+    SELECT id, name, domain, metric, group_by, method, threshold_value, lookback_periods
+    FROM system.alert_rules
+    WHERE is_active
+    ORDER BY id
+"""
+
+# WHY: detail rows only — summing them per ward, per unit and per day in one
+# GROUPING SETS pass avoids double-counting the event_type total rows
+_ESCALATION_QUERY = """
+    SELECT d.event_date,
+           CASE WHEN GROUPING(d.ward_id) = 0 THEN 'ward'
+                WHEN GROUPING(d.admitting_unit_id) = 0 THEN 'unit' END,
+           CASE WHEN GROUPING(d.ward_id) = 0 THEN d.ward_id ELSE d.admitting_unit_id END,
+           SUM(d.event_count),
+           COALESCE(SUM(d.event_count) FILTER (WHERE et.severity = 'critical'), 0)
+    FROM agg.escalation_daily d
+    LEFT JOIN system.lookup_escalation_type et ON et.code = d.event_type_code
+    WHERE d.grouping_level = 'detail'
+      AND d.event_date > %(as_of)s::date - %(periods)s
+      AND d.event_date <= %(as_of)s
+    GROUP BY GROUPING SETS (
+        (d.event_date, d.ward_id),
+        (d.event_date, d.admitting_unit_id),
+        (d.event_date)
+    )
+"""
+
+# Org-unit rows are split by discipline stream, so compliance is re-derived
+# from the summed counts at each level
+_TRAINING_QUERY = """
+    WITH snaps AS (
+        SELECT certification_type, snapshot_date,
+               ROW_NUMBER() OVER (PARTITION BY certification_type
+                                  ORDER BY snapshot_date DESC) AS rn
+        FROM (
+            SELECT DISTINCT certification_type, snapshot_date
+            FROM agg.training_compliance
+            WHERE grouping_level = 'facility' AND snapshot_date <= %(as_of)s
+        ) s
+    )
+    SELECT t.certification_type,
+           t.snapshot_date,
+           CASE WHEN GROUPING(t.org_unit_id) = 0 THEN 'org_unit'
+                WHEN GROUPING(t.directorate) = 0 THEN 'directorate' END,
+           CASE WHEN GROUPING(t.org_unit_id) = 0 THEN t.org_unit_id::text ELSE t.directorate END,
+           100.0 * SUM(t.compliant_count) / NULLIF(SUM(t.total_staff), 0)
+    FROM agg.training_compliance t
+    JOIN snaps s ON s.certification_type = t.certification_type
+                AND s.snapshot_date = t.snapshot_date
+                AND s.rn <= %(periods)s
+    WHERE t.grouping_level = 'org_unit'
+      AND t.snapshot_date >= (SELECT MIN(snapshot_date) FROM snaps WHERE rn <= %(periods)s)
+    GROUP BY GROUPING SETS (
+        (t.certification_type, t.snapshot_date, t.org_unit_id),
+        (t.certification_type, t.snapshot_date, t.directorate),
+        (t.certification_type, t.snapshot_date)
+    )
+"""
+
+
+def load_rules(conn) -> list[AlertRule]:
+    """Active alert rules, in id order.
+
+    Args:
+        conn: Open psycopg connection.
+    """
+    with conn.cursor() as cur:
+        return [AlertRule(*row) for row in cur.execute(_RULES_QUERY)]
+
+
+def load_escalation_series(conn, as_of: date, periods: int) -> list[Series]:
+    """Daily escalation counts per ward, per unit and facility-wide.
+
+    Days without events count as 0.
+
+    Args:
+        conn: Open psycopg connection.
+        as_of: Current (last) day.
+        periods: Days loaded, ending with as_of.
+    """
+    days = [as_of - timedelta(days=n) for n in range(periods - 1, -1, -1)]
+    with conn.cursor() as cur:
+        rows = cur.execute(_ESCALATION_QUERY, {"as_of": as_of, "periods": periods}).fetchall()
+    groups, values = _matrix(rows, {d: i for i, d in enumerate(days)}, periods, 2, 0.0)
+    return [
+        Series("daily_escalation_count", days, groups, values[0]),
+        Series("daily_critical_count", days, groups, values[1]),
+    ]
+
+
+def load_training_series(conn, as_of: date, periods: int) -> list[Series]:
+    """Compliance % per org unit, directorate and facility, per certification type.
+
+    Args:
+        conn: Open psycopg connection.
+        as_of: Latest snapshot date considered.
+        periods: Snapshots loaded per certification type, ending with the
+            latest on or before as_of.
+    """
+    by_type: dict[str, list[tuple]] = {}
+    with conn.cursor() as cur:
+        for cert_type, *row in cur.execute(_TRAINING_QUERY, {"as_of": as_of, "periods": periods}):
+            by_type.setdefault(cert_type, []).append(row)
+    series = []
+    for cert_type, rows in sorted(by_type.items()):
+        snapshots = sorted({r[0] for r in rows})
+        groups, values = _matrix(
+            rows, {d: i for i, d in enumerate(snapshots)}, len(snapshots), 1, np.nan,
+        )
+        series.append(Series(f"{cert_type.lower()}_compliance_pct", snapshots, groups,
+                             values[0], {"certification_type": cert_type}))
+    return series
+
+
+LOADERS = {
+    "escalation": load_escalation_series,
+    "training": load_training_series,
+}
+
+
+# ============================================================================
+# Methods
+# ============================================================================
+# Each takes the rule's groups × periods matrix (last column = current
+# period) and returns (metric_value, threshold_value, fired, stats) arrays.
+# A positive threshold fires above the bound, a negative one below it.
+
+def _beyond(value: np.ndarray, bound: np.ndarray, threshold: float) -> np.ndarray:
+    with np.errstate(invalid="ignore"):
+        return value > bound if threshold >= 0 else value < bound
+
+
+def _z_score(m: np.ndarray, lookback: int, threshold: float):
+    current = m[:, -1]
+    base = m[:, -lookback - 1:-1]
+    present = ~np.isnan(base)
+    n = present.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(present, base, 0.0).sum(axis=1) / n
+        dev = np.where(present, base - mean[:, None], 0.0)
+        std = np.sqrt((dev * dev).sum(axis=1) / (n - 1))
+        z = (current - mean) / std
+    bound = mean + threshold * std
+    # WHY: a flat baseline (a quiet ward with no events) has stddev 0 and
+    # would fire on its first event
+    ok = (n >= MIN_BASELINE_PERIODS) & (std > 0) & ~np.isnan(current)
+    fired = ok & _beyond(current, bound, threshold)
+    return current, bound, fired, {"mean": mean, "stddev": std, "z_score": z, "periods": n}
+
+
+def _quartiles(base: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-row Q1 and Q3 (linear interpolation, NaNs ignored) and counts.
+
+    WHY: np.nanpercentile falls back to a Python loop over rows; sorting
+    once (NaNs sort last) and interpolating by index stays vectorised.
+    """
+    ordered = np.sort(base, axis=1)
+    n = (~np.isnan(base)).sum(axis=1)
+    last = np.maximum(n - 1, 0)
+    quartiles = []
+    for q in (0.25, 0.75):
+        pos = last * q
+        lo = np.floor(pos).astype(np.intp)
+        hi = np.minimum(lo + 1, last)
+        a = np.take_along_axis(ordered, lo[:, None], axis=1)[:, 0]
+        b = np.take_along_axis(ordered, hi[:, None], axis=1)[:, 0]
+        quartiles.append(np.where(n > 0, a + (b - a) * (pos - lo), np.nan))
+    return quartiles[0], quartiles[1], n
+
+
+def _iqr(m: np.ndarray, lookback: int, threshold: float):
+    current = m[:, -1]
+    base = m[:, -lookback - 1:-1]
+    if not base.shape[1]:
+        base = np.full((len(m), 1), np.nan)    # No history
+    q1, q3, n = _quartiles(base)
+    iqr = q3 - q1
+    bound = (q3 if threshold >= 0 else q1) + threshold * iqr
+    with np.errstate(invalid="ignore"):
+        ok = (n >= MIN_BASELINE_PERIODS) & (iqr > 0) & ~np.isnan(current)
+    fired = ok & _beyond(current, bound, threshold)
+    return current, bound, fired, {"q1": q1, "q3": q3, "periods": n}
+
+
+def _threshold(m: np.ndarray, lookback: int, threshold: float):
+    current = m[:, -1]
+    bound = np.full(len(m), threshold)
+    fired = ~np.isnan(current) & _beyond(current, bound, threshold)
+    return current, bound, fired, {}
+
+
+def _trend_slope(m: np.ndarray, lookback: int, threshold: float):
+    window = m[:, -lookback:]
+    present = ~np.isnan(window)
+    n = present.sum(axis=1)
+    x = np.arange(window.shape[1], dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = np.where(present, x, 0.0).sum(axis=1) / n
+        y = np.where(present, window, 0.0)
+        y_mean = y.sum(axis=1) / n
+        dx = np.where(present, x - x_mean[:, None], 0.0)
+        slope = (dx * (y - y_mean[:, None])).sum(axis=1) / (dx * dx).sum(axis=1)
+    bound = np.full(len(m), threshold)
+    ok = (n >= MIN_TREND_PERIODS) & ~np.isnan(window[:, -1]) & ~np.isnan(slope)
+    fired = ok & _beyond(slope, bound, threshold)
+    return slope, bound, fired, {"current": window[:, -1], "periods": n}
+
+
+_METHODS = {
+    "z_score": _z_score,
+    "iqr": _iqr,
+    "threshold": _threshold,
+    "trend_slope": _trend_slope,
+}
+
+
+# ============================================================================
+# Evaluation
+# ============================================================================
+
+class Firing:
+    """One rule firing for one group and period (a system.alert_history row)."""
+
+    __slots__ = ("rule_id", "period_date", "group_key", "metric_value",
+                 "threshold_value", "context")
+
+    def __init__(
+        self,
+        rule_id: int,
+        period_date: date,
+        group_key: str,
+        metric_value: float,
+        threshold_value: float,
+        context: dict,
+    ):
+        self.rule_id = rule_id
+        self.period_date = period_date
+        self.group_key = group_key
+        self.metric_value = metric_value
+        self.threshold_value = threshold_value
+        self.context = context
+
+    def __repr__(self) -> str:
+        return (f"Firing(rule={self.rule_id}, {self.group_key}, {self.period_date}, "
+                f"{self.metric_value} vs {self.threshold_value})")
+
+
+def _number(value) -> float | int | None:
+    if isinstance(value, np.integer):
+        return int(value)
+    value = float(value)
+    return None if np.isnan(value) else round(value, 4)
+
+
+def evaluate(rules: Iterable[AlertRule], series: Iterable[Series]) -> list[Firing]:
+    """Evaluate rules against already loaded series.
+
+    Rules whose metric, method or grouping has no matching series are
+    skipped with a warning.
+
+    Args:
+        rules: Rules to evaluate.
+        series: Series from the domain loaders.
+
+    Returns:
+        Firings in rule order, then series and group order.
+    """
+    by_metric: dict[str, list[Series]] = {}
+    for s in series:
+        by_metric.setdefault(s.metric, []).append(s)
+
+    firings = []
+    for rule in rules:
+        method = _METHODS.get(rule.method)
+        metrics = METRICS.get(rule.domain, {}).get(rule.metric)
+        if method is None or metrics is None:
+            logger.warning("Alert rule %s: unsupported %s metric %r / method %r",
+                           rule.id, rule.domain, rule.metric, rule.method)
+            continue
+        if rule.threshold_value is None:
+            logger.warning("Alert rule %s (%s) has no threshold_value", rule.id, rule.method)
+            continue
+        for s in (s for name in metrics for s in by_metric.get(name, ())):
+            rows = s.rows(rule.group_by)
+            if not len(rows):
+                continue
+            value, bound, fired, stats = method(s.values[rows], rule.lookback_periods,
+                                                rule.threshold_value)
+            for j in np.flatnonzero(fired):
+                i = rows[j]
+                group_by, group_id = s.groups[i]
+                context = {
+                    "rule": rule.name,
+                    "metric": s.metric,
+                    "method": rule.method,
+                    "group_by": group_by,
+                    "group_id": group_id,
+                    **s.context,
+                    **{k: _number(v[j]) for k, v in stats.items()},
+                }
+                firings.append(Firing(rule.id, s.periods[-1], s.group_key(i),
+                                      _number(value[j]), _number(bound[j]), context))
+    return firings
+
+
+_INSERT_FIRINGS = """
+    INSERT INTO system.alert_history (
+        alert_rule_id, period_date, group_key, metric_value, threshold_value, context
+    )
+    SELECT * FROM unnest(
+        %s::int[], %s::date[], %s::varchar[], %s::numeric[], %s::numeric[], %s::jsonb[]
+    )
+    ON CONFLICT (alert_rule_id, period_date, group_key) WHERE period_date IS NOT NULL
+    DO UPDATE SET metric_value    = EXCLUDED.metric_value,
+                  threshold_value = EXCLUDED.threshold_value,
+                  context         = EXCLUDED.context
+    WHERE system.alert_history.metric_value IS DISTINCT FROM EXCLUDED.metric_value
+    RETURNING (xmax = 0) AS inserted
+"""
+
+
+def write_firings(conn, firings: Sequence[Firing]) -> int:
+    """Upsert firings into system.alert_history in one statement.
+
+    A firing already recorded for the same rule, period and group has its
+    value and context updated; fired_at and notification_sent are kept.
+
+    Args:
+        conn: Open psycopg connection (the caller commits).
+        firings: Firings from evaluate().
+
+    Returns:
+        Number of new firings (not previously recorded).
+    """
+    if not firings:
+        return 0
+    params = (
+        [f.rule_id for f in firings],
+        [f.period_date for f in firings],
+        [f.group_key for f in firings],
+        [f.metric_value for f in firings],
+        [f.threshold_value for f in firings],
+        [json.dumps(f.context, default=str) for f in firings],
+    )
+    with conn.cursor() as cur:
+        return sum(inserted for (inserted,) in cur.execute(_INSERT_FIRINGS, params))
+
+
+def evaluate_rules(conn, as_of: date | None = None, domains: Iterable[str] | None = None) -> dict:
+    """Evaluate all active rules and record their firings.
+
+    Args:
+        conn: Open psycopg connection (the caller commits).
+        as_of: Current period; defaults to today in hospital time.
+        domains: Restrict to these rule domains (e.g. ("escalation",)
+            after a pager batch).
+
+    Returns:
+        Counts: rules evaluated, groups, firings and new firings.
+    """
+    as_of = as_of or datetime.now(AEST).date()
+    rules = load_rules(conn)
+    if domains is not None:
+        domains = set(domains)
+        rules = [r for r in rules if r.domain in domains]
+
+    by_domain: dict[str, list[AlertRule]] = {}
+    for rule in rules:
+        by_domain.setdefault(rule.domain, []).append(rule)
+
+    counts = {"rules": 0, "groups": 0, "fired": 0, "new": 0}
+    for domain, domain_rules in by_domain.items():
+        loader = LOADERS.get(domain)
+        if loader is None:
+            logger.warning("No alert series for domain %r; %d rule(s) skipped",
+                           domain, len(domain_rules))
+            continue
+        series = loader(conn, as_of, max(r.periods_needed for r in domain_rules))
+        firings = evaluate(domain_rules, series)
+        new = write_firings(conn, firings)
+        counts["rules"] += len(domain_rules)
+        counts["groups"] += sum(len(s.groups) for s in series)
+        counts["fired"] += len(firings)
+        counts["new"] += new
+        logger.info("Alert rules (%s, as of %s): %d rules, %d firings, %d new",
+                    domain, as_of, len(domain_rules), len(firings), new)
+    return counts
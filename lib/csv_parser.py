@@ -0,0 +1,478 @@
+"""
+lib/csv_parser.py
+
+Reverse-pivot engine for the grouped TMS certification exports (ALS_Cert.csv
+and the grouped BLS completion summary).
+
+Pipeline position: parse_grouped_csv (orch_certifications) and
+generate_seed_data.py (staff from the ALS/BLS exports)
+Reads: Validated CSV bytes or a file path
+Writes: system.data_quality_flags (write_checksum_flags(), one row per
+        group whose totals do not match its people)
+Returns: GroupedCsvResult — CertificationRecord per person, the summary row
+         totals and the checksum mismatches
+
+The export is a grouped report: a summary row for the certification, then
+manager, location and org unit group rows, each followed by the rows below
+it, down to one row per person (redi-functions-spec.md §3.1). A row is a
+person if and only if `Person Person No.` is set; its depth in the hierarchy
+otherwise is the deepest of the group columns that is filled in.
+
+GroupedCsvParser reads the file in one pass, keeping a stack of the open
+groups (summary → manager → location → org). Each person is emitted as it
+is read, inheriting manager, location and org unit from the enclosing groups
+where its own cells are blank, and is counted into the innermost open group
+only. When a group closes (a row at the same or a shallower level, or the
+end of the file) its counts are compared with the compliant/non-compliant
+totals on its own row and then folded into its parent, so every group is
+checked with O(1) work per person and nothing but the stack and the current
+row is held.
+
+Person records use __slots__ and share one string object per distinct
+manager, location, org name, job family and status, so a full snapshot
+(~9,500 people) stays small enough to return from an activity.
+parse_certifications() parses the weekly ALS and BLS files in parallel.
+
+See redi-functions-spec.md §3.1 for the source layout and pipeline.
+"""
+
+import csv
+import io
+import logging
+import os
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+from lib.exceptions import ChecksumMismatchError, CsvParseError
+from lib.instrumentation import track_metric
+from lib.mapping import map_cert_status
+
+logger = logging.getLogger("redi.csv_parser")
+
+# Hierarchy levels, outermost first
+SUMMARY, MANAGER, LOCATION, ORG, PERSON = range(5)
+LEVEL_NAMES = ("summary", "manager", "location", "org", "person")
+
+# Column positions in the §3.1 layout, used when the header does not name
+# the column. The three total columns are always the last three.
+DEFAULT_COLUMNS = {
+    "certification": 0,
+    "manager_name": 1,
+    "location": 2,
+    "org_unit_id": 3,
+    "org_unit_name": 4,
+    "payroll_id": 5,
+    "full_name": 6,
+    "job_family": 7,
+    "status": 8,
+}
+
+# TMS header names, where they are known; they win over the positions above
+HEADER_NAMES = {
+    "manager_name": "Manager Full Name",
+    "org_unit_id": "Person Organisation Number",
+    "payroll_id": "Person Person No.",
+    "full_name": "Person Full Name",
+    "job_family": "Job Family Name",
+}
+
+# Columns that open a group, by level
+GROUP_COLUMNS = ("certification", "manager_name", "location", "org_unit_id")
+
+COMPLIANT_STATUS = "acquired"
+
+
+# ============================================================================
+# Records
+# ============================================================================
+
+class CertificationRecord:
+    """One person row of a grouped certification export."""
+
+    __slots__ = ("payroll_id", "full_name", "org_unit_id", "org_unit_name",
+                 "location", "job_family", "status_code", "manager_name")
+
+    def __init__(
+        self,
+        payroll_id: str,
+        full_name: str | None,
+        org_unit_id: str | None,
+        org_unit_name: str | None,
+        location: str | None,
+        job_family: str | None,
+        status_code: str,
+        manager_name: str | None,
+    ):
+        self.payroll_id = payroll_id
+        self.full_name = full_name
+        self.org_unit_id = org_unit_id
+        self.org_unit_name = org_unit_name
+        self.location = location
+        self.job_family = job_family
+        self.status_code = status_code
+        self.manager_name = manager_name
+
+    def __repr__(self) -> str:
+        return f"CertificationRecord({self.payroll_id}, {self.status_code}, org={self.org_unit_id})"
+
+
+class ChecksumMismatch:
+    """A group whose compliant/non-compliant totals disagree with its people."""
+
+    __slots__ = ("level", "path", "line", "expected", "actual")
+
+    def __init__(self, level: int, path: str, line: int,
+                 expected: tuple[int, int], actual: tuple[int, int]):
+        self.level = level
+        self.path = path
+        self.line = line
+        self.expected = expected
+        self.actual = actual
+
+    def __repr__(self) -> str:
+        return (f"ChecksumMismatch({LEVEL_NAMES[self.level]} {self.path!r} line {self.line}: "
+                f"expected {self.expected}, counted {self.actual})")
+
+    def describe(self) -> str:
+        """Issue text for system.data_quality_flags."""
+        return (f"{LEVEL_NAMES[self.level].capitalize()} group '{self.path}' (line {self.line}) "
+                f"reports {self.expected[0]} compliant / {self.expected[1]} non-compliant; "
+                f"its people count {self.actual[0]} / {self.actual[1]}")
+
+
+class _Group:
+    __slots__ = ("level", "label", "line", "expected", "compliant", "non_compliant",
+                 "manager_name", "location", "org_unit_id", "org_unit_name")
+
+    def __init__(self, level, label, line, expected, parent):
+        self.level = level
+        self.label = label
+        self.line = line
+        self.expected = expected
+        self.compliant = 0
+        self.non_compliant = 0
+        # Context inherited by the people below this group
+        if parent is None:
+            self.manager_name = self.location = self.org_unit_id = self.org_unit_name = None
+        else:
+            self.manager_name = parent.manager_name
+            self.location = parent.location
+            self.org_unit_id = parent.org_unit_id
+            self.org_unit_name = parent.org_unit_name
+
+
+# ============================================================================
+# Parsing
+# ============================================================================
+
+def _cell(values: Sequence[str], i: int | None) -> str | None:
+    if i is None or i >= len(values):
+        return None
+    return values[i].strip() or None
+
+
+def _count(value: str | None) -> int | None:
+    if value is None:
+        return None
+    try:
+        return int(float(value.replace(",", "")))
+    except ValueError:
+        return None
+
+
+def _percent(value: str | None) -> float | None:
+    if value is None:
+        return None
+    try:
+        return float(value.rstrip("%").strip())
+    except ValueError:
+        return None
+
+
+class GroupedCsvParser:
+    """Single-pass reverse pivot of one grouped export.
+
+    Iterate parse() for the person records; once it is exhausted the summary
+    totals, `mismatches` and the group/person counts are set.
+
+    Args:
+        cert_type: 'ALS' or 'BLS'.
+        strict: Raise ChecksumMismatchError at the first group whose totals
+            do not match, instead of collecting every mismatch.
+    """
+
+    def __init__(self, cert_type: str, *, strict: bool = False):
+        self.cert_type = cert_type
+        self.source_type = f"{cert_type.lower()}_cert"
+        self.strict = strict
+        self.certification: str | None = None
+        self.total_compliant: int | None = None
+        self.total_non_compliant: int | None = None
+        self.compliance_pct: float | None = None
+        self.mismatches: list[ChecksumMismatch] = []
+        self.groups_checked = 0
+        self.persons = 0
+        self._columns: dict[str, int | None] = {}
+        self._shared: dict[str, str] = {}
+
+    def _resolve_columns(self, header: Sequence[str]) -> None:
+        names = {name.strip(): i for i, name in enumerate(header)}
+        if HEADER_NAMES["payroll_id"] not in names and len(header) <= DEFAULT_COLUMNS["status"]:
+            raise CsvParseError(
+                f"{self.cert_type} export header has {len(header)} columns and no "
+                f"'{HEADER_NAMES['payroll_id']}' column; not a grouped certification export",
+                source_type=self.source_type, context={"header": list(header)},
+            )
+        self._columns = {
+            field: names.get(HEADER_NAMES.get(field), pos) for field, pos in DEFAULT_COLUMNS.items()
+        }
+        width = len(header)
+        self._columns.update(pct=width - 3, compliant=width - 2, non_compliant=width - 1)
+
+    def _share(self, value: str | None) -> str | None:
+        if value is None:
+            return None
+        return self._shared.setdefault(value, value)
+
+    def parse(self, lines: Iterable[str]) -> Iterator[CertificationRecord]:
+        """Yield one CertificationRecord per person row of `lines`.
+
+        Args:
+            lines: Text lines of the export (BOM already stripped), e.g. an
+                open file or io.StringIO.
+
+        Raises:
+            CsvParseError: If there is no header or summary row, or a person
+                row comes before the summary row.
+            ChecksumMismatchError: In strict mode, on the first mismatch.
+        """
+        lines = iter(lines)
+        for line in lines:
+            if line.strip():
+                break
+        else:
+            raise CsvParseError(f"{self.cert_type} export is empty", source_type=self.source_type)
+        reader = csv.reader(chain((line,), lines))
+        self._resolve_columns(next(reader))
+        col = self._columns
+        group_cols = [col[name] for name in GROUP_COLUMNS]
+        share = self._share
+        stack: list[_Group] = []
+
+        for values in reader:
+            line_no = reader.line_num
+            payroll_id = _cell(values, col["payroll_id"])
+            if payroll_id is None:
+                level = next((lvl for lvl in range(ORG, SUMMARY - 1, -1)
+                              if _cell(values, group_cols[lvl]) is not None), None)
+                if level is None:
+                    continue    # Blank or spacer row
+                while stack and stack[-1].level >= level:
+                    self._close(stack)
+                self._open(stack, level, values, line_no)
+                continue
+
+            if not stack:
+                raise CsvParseError(
+                    f"{self.cert_type} export: person row at line {line_no} before the summary row",
+                    source_type=self.source_type, context={"line": line_no},
+                )
+            group = stack[-1]
+            status = map_cert_status(_cell(values, col["status"]))
+            compliant = _count(_cell(values, col["compliant"]))
+            non_compliant = _count(_cell(values, col["non_compliant"]))
+            if compliant is None and non_compliant is None:
+                compliant, non_compliant = (1, 0) if status == COMPLIANT_STATUS else (0, 1)
+            group.compliant += compliant or 0
+            group.non_compliant += non_compliant or 0
+            self.persons += 1
+            yield CertificationRecord(
+                payroll_id,
+                _cell(values, col["full_name"]),
+                share(_cell(values, col["org_unit_id"])) or group.org_unit_id,
+                share(_cell(values, col["org_unit_name"])) or group.org_unit_name,
+                share(_cell(values, col["location"])) or group.location,
+                share(_cell(values, col["job_family"])),
+                status,
+                share(_cell(values, col["manager_name"])) or group.manager_name,
+            )
+
+        if self.certification is None:
+            raise CsvParseError(f"{self.cert_type} export has no summary row",
+                                source_type=self.source_type)
+        while stack:
+            self._close(stack)
+        if self.mismatches:
+            logger.warning("%s export: %d of %d groups do not match their people's totals",
+                           self.cert_type, len(self.mismatches), self.groups_checked)
+        track_metric("checksum_mismatches", len(self.mismatches), certification_type=self.cert_type)
+        logger.info("%s export: %d people, %d groups checked", self.cert_type,
+                    self.persons, self.groups_checked)
+
+    def _open(self, stack: list[_Group], level: int, values: Sequence[str], line_no: int) -> None:
+        col = self._columns
+        compliant = _count(_cell(values, col["compliant"]))
+        non_compliant = _count(_cell(values, col["non_compliant"]))
+        expected = None if compliant is None or non_compliant is None else (compliant, non_compliant)
+        label = _cell(values, col[GROUP_COLUMNS[level]])
+        group = _Group(level, label, line_no, expected, stack[-1] if stack else None)
+        if level == SUMMARY:
+            self.certification = label
+            self.total_compliant, self.total_non_compliant = expected or (None, None)
+            self.compliance_pct = _percent(_cell(values, col["pct"]))
+        elif level == MANAGER:
+            group.manager_name = self._share(label)
+        elif level == LOCATION:
+            group.location = self._share(label)
+        else:
+            group.org_unit_id = self._share(label)
+            group.org_unit_name = self._share(_cell(values, col["org_unit_name"]))
+        stack.append(group)
+
+    def _close(self, stack: list[_Group]) -> None:
+        group = stack.pop()
+        actual = (group.compliant, group.non_compliant)
+        if group.expected is not None:
+            self.groups_checked += 1
+            if group.expected != actual:
+                path = " > ".join(g.label for g in (*stack, group) if g.label)
+                mismatch = ChecksumMismatch(group.level, path, group.line, group.expected, actual)
+                if self.strict:
+                    raise ChecksumMismatchError(
+                        f"{self.cert_type} export: {mismatch.describe()}",
+                        source_type=self.source_type,
+                        context={"path": path, "line": group.line,
+                                 "expected": list(group.expected), "actual": list(actual)},
+                    )
+                self.mismatches.append(mismatch)
+        if stack:
+            stack[-1].compliant += group.compliant
+            stack[-1].non_compliant += group.non_compliant
+
+
+class GroupedCsvResult:
+    """A fully parsed export: person records plus the checksum outcome.
+
+    Iterating it yields the CertificationRecords in file order.
+    """
+
+    __slots__ = ("cert_type", "certification", "records", "total_compliant",
+                 "total_non_compliant", "compliance_pct", "mismatches", "groups_checked")
+
+    def __init__(self, parser: GroupedCsvParser, records: list[CertificationRecord]):
+        self.cert_type = parser.cert_type
+        self.certification = parser.certification
+        self.records = records
+        self.total_compliant = parser.total_compliant
+        self.total_non_compliant = parser.total_non_compliant
+        self.compliance_pct = parser.compliance_pct
+        self.mismatches = parser.mismatches
+        self.groups_checked = parser.groups_checked
+
+    def __iter__(self) -> Iterator[CertificationRecord]:
+        return iter(self.records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __repr__(self) -> str:
+        return (f"GroupedCsvResult({self.cert_type}, {len(self.records)} people, "
+                f"{len(self.mismatches)}/{self.groups_checked} groups mismatched)")
+
+
+def _lines(source: str | os.PathLike | bytes) -> Iterator[str]:
+    if isinstance(source, bytes):
+        yield from io.StringIO(source.decode("utf-8-sig"), newline="")
+        return
+    with open(source, encoding="utf-8-sig", newline="") as f:
+        yield from f
+
+
+def parse_grouped_csv(
+    source: str | os.PathLike | bytes,
+    cert_type: str,
+    *,
+    strict: bool = False,
+) -> GroupedCsvResult:
+    """Reverse-pivot one grouped certification export.
+
+    Args:
+        source: Path to the CSV, or its validated bytes (UTF-8, optional BOM).
+        cert_type: 'ALS' or 'BLS'.
+        strict: Raise on the first checksum mismatch.
+
+    Returns:
+        GroupedCsvResult with every person and any checksum mismatches.
+
+    Raises:
+        CsvParseError: If the file is not a grouped certification export.
+        ChecksumMismatchError: In strict mode, if any group's totals differ.
+    """
+    parser = GroupedCsvParser(cert_type, strict=strict)
+    records = list(parser.parse(_lines(source)))
+    return GroupedCsvResult(parser, records)
+
+
+def parse_certifications(
+    als: str | os.PathLike | bytes,
+    bls: str | os.PathLike | bytes,
+    *,
+    workers: int = 2,
+    strict: bool = False,
+) -> dict[str, GroupedCsvResult]:
+    """Parse the weekly ALS and BLS exports, in parallel when workers > 1.
+
+    Returns:
+        {"ALS": result, "BLS": result}
+    """
+    sources = {"ALS": als, "BLS": bls}
+    if workers <= 1:
+        return {t: parse_grouped_csv(s, t, strict=strict) for t, s in sources.items()}
+    # Processes, not threads: see PatientHasher.hash_many() in lib/deidentify.py
+    with ProcessPoolExecutor(max_workers=min(workers, len(sources))) as pool:
+        futures = {t: pool.submit(parse_grouped_csv, s, t, strict=strict)
+                   for t, s in sources.items()}
+        return {t: f.result() for t, f in futures.items()}
+
+
+# ============================================================================
+# Data quality flags
+# ============================================================================
+
+_INSERT_FLAGS = """
+    INSERT INTO system.data_quality_flags (
+        import_id, severity, table_name, record_identifier, field_name, issue_description
+    )
+    SELECT %s, * FROM unnest(%s::varchar[], %s::varchar[], %s::varchar[], %s::varchar[], %s::text[])
+"""
+
+
+def write_checksum_flags(cur, import_id: int, result: GroupedCsvResult) -> int:
+    """Record a parse's checksum mismatches in system.data_quality_flags.
+
+    A mismatch on the summary row means the snapshot totals themselves are
+    wrong and is an error; group-level mismatches are warnings.
+
+    Args:
+        cur: Cursor in the load transaction.
+        import_id: import_log entry of the certification load.
+        result: The parse_grouped_csv() result.
+
+    Returns:
+        Number of flags written.
+    """
+    if not result.mismatches:
+        return 0
+    severities, tables, identifiers, fields, issues = [], [], [], [], []
+    for m in result.mismatches:
+        severities.append("error" if m.level == SUMMARY else "warning")
+        tables.append("training.certification_snapshots" if m.level == SUMMARY
+                      else "training.staff_certifications")
+        identifiers.append(m.path[:200])
+        fields.append("total_compliant" if m.expected[0] != m.actual[0] else "total_non_compliant")
+        issues.append(m.describe())
+    cur.execute(_INSERT_FLAGS, (import_id, severities, tables, identifiers, fields, issues))
+    logger.info("Import %d: %d %s checksum mismatch flag(s) written",
+                import_id, len(result.mismatches), result.cert_type)
+    return len(result.mismatches)
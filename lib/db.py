@@ -0,0 +1,424 @@
+"""
+lib/db.py
+
+Connection pool, transaction helpers, the import_log protocol and the bulk
+loader used by every load activity.
+
+Pipeline position: shared by all load activities and maintenance scripts
+Reads: Nothing directly
+Writes: system.import_log; any target table via bulk_load()
+Returns: Cursors, import ids, LoadResult counts
+
+bulk_load() picks one of three paths by batch size and conflict handling:
+
+  * append (no conflict target): COPY straight into the table;
+  * small batches (<= PIPELINE_MAX_ROWS rows): one parameterised
+    INSERT … ON CONFLICT per row, sent together in pipeline mode so the
+    batch costs a single round trip;
+  * large batches: COPY into a temp staging table, then one
+    INSERT … SELECT … ON CONFLICT into the target.
+
+Every path reports inserted / updated / skipped counts (from xmax on the
+returned rows) for complete_import(). Upserts only rewrite rows whose
+update columns actually changed; identical rows are counted as skipped
+and leave no dead tuples behind. Each call is timed as a
+"bulk_load <table>" db_query() (lib/instrumentation.py).
+
+See redi-functions-spec.md §5 for the connection and import-log protocol.
+"""
+
+import itertools
+import json
+import logging
+import os
+from collections.abc import Iterable, Sequence
+from contextlib import contextmanager
+
+from psycopg import sql
+
+from lib.instrumentation import db_query
+
+logger = logging.getLogger("redi.db")
+
+# Batches up to this size are pipelined INSERTs; larger ones are COPYed
+PIPELINE_MAX_ROWS = 100
+
+_pool = None
+
+# (table, columns, conflict, update) → pipelined INSERT text. Composing and
+# quoting the statement costs more than sending a small batch.
+_insert_cache: dict[tuple, str] = {}
+
+
+# ============================================================================
+# Connections
+# ============================================================================
+
+def get_pool():
+    """Return the shared connection pool, creating it on first call.
+
+    Uses Azure Managed Identity for authentication in production.
+    Falls back to password auth for local development.
+    """
+    global _pool
+    if _pool is not None:
+        return _pool
+
+    # WHY: imported here so scripts and benchmarks can use the loader with a
+    # plain psycopg connection, without the function app's dependencies
+    from psycopg_pool import ConnectionPool
+
+    host = os.environ["REDI_DB_HOST"]
+    dbname = os.environ["REDI_DB_NAME"]
+
+    if os.environ.get("REDI_DB_PASSWORD"):
+        # Local development with password
+        conninfo = (
+            f"host={host} dbname={dbname} "
+            f"user={os.environ['REDI_DB_USER']} "
+            f"password={os.environ['REDI_DB_PASSWORD']} "
+            f"sslmode=require"
+        )
+        logger.info("Initialising DB pool with password auth (local dev)")
+    else:
+        # Production: Managed Identity token
+        from azure.identity import DefaultAzureCredential
+
+        credential = DefaultAzureCredential()
+        token = credential.get_token("https://ossrdbms-aad.database.windows.net/.default")
+        conninfo = (
+            f"host={host} dbname={dbname} "
+            f"user={os.environ.get('REDI_DB_USER', 'redi-func-identity')} "
+            f"password={token.token} "
+            f"sslmode=require"
+        )
+        logger.info("Initialising DB pool with Managed Identity")
+
+    _pool = ConnectionPool(
+        conninfo=conninfo,
+        min_size=2,
+        max_size=10,
+        max_idle=300,       # Close idle connections after 5 min
+        max_lifetime=3600,  # Recycle connections hourly (token refresh)
+    )
+
+    logger.info("DB pool initialised: min=%d max=%d", 2, 10)
+    return _pool
+
+
+@contextmanager
+def get_connection():
+    """Yield a connection from the pool with automatic return."""
+    pool = get_pool()
+    with pool.connection() as conn:
+        yield conn
+
+
+@contextmanager
+def get_cursor(*, autocommit: bool = False):
+    """Yield a cursor with transaction management.
+
+    Default: wrapped in a transaction (committed on clean exit, rolled back on error).
+    autocommit=True: each statement auto-commits (use for DDL or read-only).
+    """
+    with get_connection() as conn:
+        if autocommit:
+            conn.autocommit = True
+        with conn.cursor() as cur:
+            yield cur
+        if not autocommit:
+            conn.commit()
+
+
+# ============================================================================
+# Import log protocol
+# ============================================================================
+
+def create_import(
+    cur,
+    source_type: str,
+    source_filename: str | None = None,
+    metadata: dict | None = None,
+) -> int:
+    """Create an import_log entry and return its id.
+
+    Call at the START of a load activity. Update on completion via complete_import().
+    """
+    cur.execute(
+        """
+        INSERT INTO system.import_log
+            (source_type, source_filename, status, metadata)
+        VALUES
+            (%s, %s, 'running', %s::jsonb)
+        RETURNING id
+        """,
+        (source_type, source_filename, json.dumps(metadata or {})),
+    )
+    import_id = cur.fetchone()[0]
+    logger.info("Created import_log entry: id=%d source_type=%s", import_id, source_type)
+    return import_id
+
+
+def complete_import(
+    cur,
+    import_id: int,
+    *,
+    status: str = "completed",
+    records_received: int = 0,
+    records_inserted: int = 0,
+    records_updated: int = 0,
+    records_skipped: int = 0,
+    error_message: str | None = None,
+    metadata: dict | None = None,
+) -> None:
+    """Update an import_log entry on pipeline completion or failure.
+
+    The counts are usually a bulk_load() result:
+    ``complete_import(cur, import_id, **result.import_counts())``.
+    `metadata` keys are merged into the entry's metadata (e.g.
+    ``{"instrumentation": run.report()}``, see lib/instrumentation.py).
+    """
+    cur.execute(
+        """
+        UPDATE system.import_log SET
+            status = %s,
+            import_completed_at = NOW(),
+            records_received = %s,
+            records_inserted = %s,
+            records_updated = %s,
+            records_skipped = %s,
+            error_message = %s,
+            metadata = COALESCE(metadata, '{}'::jsonb) || %s::jsonb
+        WHERE id = %s
+        """,
+        (status, records_received, records_inserted, records_updated,
+         records_skipped, error_message, json.dumps(metadata or {}, default=str), import_id),
+    )
+    logger.info(
+        "Completed import %d: status=%s received=%d inserted=%d updated=%d skipped=%d",
+        import_id, status, records_received, records_inserted, records_updated, records_skipped,
+    )
+
+
+# ============================================================================
+# Bulk loading
+# ============================================================================
+
+class LoadResult:
+    """Row counts from one bulk_load() call.
+
+    Attributes:
+        received: Records passed in.
+        inserted: New rows written.
+        updated: Existing rows changed by the upsert.
+        skipped: Records that changed nothing: conflicts under DO NOTHING,
+            upserts identical to the stored row, and earlier duplicates of
+            a conflict key within the batch.
+    """
+
+    __slots__ = ("received", "inserted", "updated", "skipped")
+
+    def __init__(self, received: int = 0, inserted: int = 0, updated: int = 0):
+        self.received = received
+        self.inserted = inserted
+        self.updated = updated
+        self.skipped = received - inserted - updated
+
+    def import_counts(self) -> dict[str, int]:
+        """Keyword arguments for complete_import()."""
+        return {
+            "records_received": self.received,
+            "records_inserted": self.inserted,
+            "records_updated": self.updated,
+            "records_skipped": self.skipped,
+        }
+
+    def __repr__(self) -> str:
+        return (f"LoadResult(received={self.received}, inserted={self.inserted}, "
+                f"updated={self.updated}, skipped={self.skipped})")
+
+
+def _table(name: str) -> sql.Identifier:
+    return sql.Identifier(*name.split("."))
+
+
+def _names(columns: Sequence[str]) -> sql.Composed:
+    return sql.SQL(", ").join(map(sql.Identifier, columns))
+
+
+def _insert_sql(
+    table: str,
+    columns: Sequence[str],
+    source: sql.Composable,
+    conflict: Sequence[str] | str | None,
+    update: Sequence[str] | None,
+) -> sql.Composed:
+    """INSERT … ON CONFLICT … RETURNING (xmax = 0) from `source`
+    (a VALUES list or a SELECT)."""
+    query = sql.SQL("INSERT INTO {} AS t ({}) {}").format(_table(table), _names(columns), source)
+    if conflict is not None:
+        target = (sql.SQL(conflict) if isinstance(conflict, str)
+                  else sql.SQL("({})").format(_names(conflict)))
+        if update:
+            names = [sql.Identifier(c) for c in update]
+            assign = sql.SQL(", ").join(sql.SQL("{0} = EXCLUDED.{0}").format(n) for n in names)
+            current = sql.SQL(", ").join(sql.SQL("t.{}").format(n) for n in names)
+            incoming = sql.SQL(", ").join(sql.SQL("EXCLUDED.{}").format(n) for n in names)
+            action = sql.SQL("DO UPDATE SET {} WHERE ROW({}) IS DISTINCT FROM ROW({})").format(
+                assign, current, incoming)
+        else:
+            action = sql.SQL("DO NOTHING")
+        query += sql.SQL(" ON CONFLICT {} {}").format(target, action)
+    # xmax is 0 on a freshly inserted row version and non-zero on an update
+    return query + sql.SQL(" RETURNING (xmax = 0)")
+
+
+def _values_insert(
+    cur,
+    table: str,
+    columns: Sequence[str],
+    conflict: Sequence[str] | str | None,
+    update: Sequence[str] | None,
+) -> str:
+    key = (table, tuple(columns),
+           conflict if conflict is None or isinstance(conflict, str) else tuple(conflict),
+           tuple(update or ()))
+    query = _insert_cache.get(key)
+    if query is None:
+        values = sql.SQL("VALUES ({})").format(
+            sql.SQL(", ").join(sql.Placeholder() * len(columns)))
+        query = _insert_sql(table, columns, values, conflict, update).as_string(cur)
+        _insert_cache[key] = query
+    return query
+
+
+def _dedupe(records: list[Sequence], key: list[int]) -> list[Sequence]:
+    """Keep the last record per conflict key. Records with a NULL key
+    column never conflict and are all kept."""
+    keys = [tuple(record[j] for j in key) for record in records]
+    last = {k: i for i, k in enumerate(keys) if None not in k}
+    return [record for i, (record, k) in enumerate(zip(records, keys))
+            if None in k or last[k] == i]
+
+
+def _load_pipelined(cur, query: str, records: list[Sequence]) -> tuple[int, int]:
+    inserted = updated = 0
+    with cur.connection.pipeline():
+        cur.executemany(query, records, returning=True)
+        while True:
+            row = cur.fetchone()
+            if row is not None:
+                if row[0]:
+                    inserted += 1
+                else:
+                    updated += 1
+            if not cur.nextset():
+                break
+    return inserted, updated
+
+
+def _copy(cur, table: sql.Composable, columns: Sequence[str], records: Iterable[Sequence]) -> int:
+    copied = 0
+    with cur.copy(sql.SQL("COPY {} ({}) FROM STDIN").format(table, _names(columns))) as copy:
+        for record in records:
+            copy.write_row(record)
+            copied += 1
+    return copied
+
+
+def _load_staged(
+    cur,
+    table: str,
+    columns: Sequence[str],
+    records: Iterable[Sequence],
+    conflict: Sequence[str] | str,
+    update: Sequence[str] | None,
+) -> tuple[int, int, int]:
+    stage = sql.Identifier("bulk_load_stage")
+    # WHY: a savepoint (or a transaction under autocommit) so a failed load
+    # also rolls back the staging table and the next load can recreate it
+    with cur.connection.transaction():
+        # Same column types as the target, none of its constraints or indexes
+        cur.execute(sql.SQL("CREATE TEMP TABLE {} AS SELECT {} FROM {} WITH NO DATA").format(
+            stage, _names(columns), _table(table)))
+        received = _copy(cur, stage, columns, records)
+
+        source = sql.SQL("SELECT {} FROM {}").format(_names(columns), stage)
+        if update and not isinstance(conflict, str):
+            # WHY: one INSERT cannot update the same row twice, so keep the
+            # last staged row per key (ctid follows COPY order); NULL keys
+            # never conflict and are all kept
+            keys = _names(conflict)
+            nulls = sql.SQL(" OR ").join(
+                sql.SQL("{} IS NULL").format(sql.Identifier(c)) for c in conflict)
+            source = sql.SQL(
+                "SELECT {cols} FROM (SELECT {cols}, ROW_NUMBER() OVER "
+                "(PARTITION BY {keys} ORDER BY ctid DESC) AS rn FROM {stage}) s "
+                "WHERE rn = 1 OR {nulls}"
+            ).format(cols=_names(columns), keys=keys, stage=stage, nulls=nulls)
+
+        cur.execute(sql.SQL(
+            "WITH merged (is_insert) AS ({}) "
+            "SELECT COUNT(*) FILTER (WHERE is_insert), COUNT(*) FILTER (WHERE NOT is_insert) "
+            "FROM merged"
+        ).format(_insert_sql(table, columns, source, conflict, update)))
+        inserted, updated = cur.fetchone()
+        cur.execute(sql.SQL("DROP TABLE {}").format(stage))
+    return received, inserted, updated
+
+
+def bulk_load(
+    cur,
+    table: str,
+    columns: Sequence[str],
+    records: Iterable[Sequence],
+    *,
+    conflict: Sequence[str] | str | None = None,
+    update: Sequence[str] | None = None,
+) -> LoadResult:
+    """Insert or upsert records and return the row counts.
+
+    Runs in the caller's transaction; nothing is committed here.
+
+    Args:
+        table: Fully qualified table name (e.g. 'clinical.inpatient_census').
+        columns: Column names matching the order of each record.
+        records: Tuples (or other sequences), one per row. Any iterable: a
+            large generator is streamed through COPY without being held in
+            memory.
+        conflict: ON CONFLICT target: column names, or a literal target
+            for expression indexes and constraints (e.g.
+            "ON CONSTRAINT uq_x"). None appends with plain COPY/INSERT.
+        update: Columns overwritten from the incoming row on conflict. None
+            means DO NOTHING. Rows whose update columns already hold the
+            incoming values are left alone and counted as skipped.
+    """
+    if update and conflict is None:
+        raise ValueError("bulk_load: update columns need a conflict target")
+
+    records = iter(records)
+    head = list(itertools.islice(records, PIPELINE_MAX_ROWS + 1))
+    if not head:
+        return LoadResult()
+
+    with db_query(f"bulk_load {table}"):
+        if conflict is None and len(head) > PIPELINE_MAX_ROWS:
+            received = _copy(cur, _table(table), columns, itertools.chain(head, records))
+            result = LoadResult(received, received)
+            path = "copy"
+        elif len(head) <= PIPELINE_MAX_ROWS:
+            batch = head
+            if update and not isinstance(conflict, str):
+                batch = _dedupe(head, [columns.index(c) for c in conflict])
+            inserted, updated = _load_pipelined(
+                cur, _values_insert(cur, table, columns, conflict, update), batch)
+            result = LoadResult(len(head), inserted, updated)
+            path = "pipeline"
+        else:
+            received, inserted, updated = _load_staged(
+                cur, table, columns, itertools.chain(head, records), conflict, update)
+            result = LoadResult(received, inserted, updated)
+            path = "staged copy"
+
+    logger.debug("bulk_load %s (%s): %r", table, path, result)
+    return result
@@ -0,0 +1,90 @@
+"""
+lib/exceptions.py
+
+Custom exception hierarchy for the REdI pipeline. Every error carries
+structured context (source type, import id, diagnostic dict) for logging
+and monitoring; the three groups below decide retry behaviour.
+
+See redi-functions-spec.md §6 for how each group is handled.
+"""
+
+
+class RediBaseError(Exception):
+    """Base exception for all REdI pipeline errors.
+
+    Attributes:
+        message: Human-readable error description.
+        source_type: Pipeline domain (e.g. 'als_cert', 'pager').
+        import_id: Associated import_log entry, if created.
+        context: Arbitrary dict of diagnostic data.
+    """
+    def __init__(
+        self,
+        message: str,
+        *,
+        source_type: str | None = None,
+        import_id: int | None = None,
+        context: dict | None = None,
+    ):
+        self.source_type = source_type
+        self.import_id = import_id
+        self.context = context or {}
+        super().__init__(message)
+
+    def to_dict(self) -> dict:
+        return {
+            "error_type": type(self).__name__,
+            "message": str(self),
+            "source_type": self.source_type,
+            "import_id": self.import_id,
+            "context": self.context,
+        }
+
+
+# --- Validation Errors (reject input, no retry) ----------------------------
+
+class ValidationError(RediBaseError):
+    """Input payload fails schema or business rule validation."""
+    pass
+
+class CsvParseError(ValidationError):
+    """CSV structure doesn't match expected grouped format."""
+    pass
+
+class ExcelParseError(ValidationError):
+    """Excel file can't be parsed or has unexpected structure."""
+    pass
+
+class ChecksumMismatchError(ValidationError):
+    """Record counts don't match source summary totals."""
+    pass
+
+
+# --- Processing Errors (may be retried) ------------------------------------
+
+class DeidentificationError(RediBaseError):
+    """Error during patient data de-identification."""
+    pass
+
+class MappingError(RediBaseError):
+    """Unknown value encountered during dimension mapping."""
+    pass
+
+class ParsingError(RediBaseError):
+    """Pager message parsing failed at regex/NLP/LLM layer."""
+    pass
+
+
+# --- Infrastructure Errors (retry with backoff) ----------------------------
+
+class DatabaseError(RediBaseError):
+    """Database operation failed."""
+    pass
+
+class KeyVaultError(RediBaseError):
+    """Azure Key Vault secret retrieval failed."""
+    pass
+
+class OpenAIError(RediBaseError):
+    """Azure OpenAI API call failed."""
+    pass
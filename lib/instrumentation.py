@@ -0,0 +1,438 @@
+"""
+lib/instrumentation.py
+
+Per-stage wall time, row counts and peak memory for the pipelines and the
+seed generator, and the Application Insights metrics that come from them.
+
+Pipeline position: wraps activity functions, generate_seed_data.py sections
+                   and every bulk_load() / timed database call
+Reads: REDI_PROFILE, REDI_PROFILE_DIR, APPLICATIONINSIGHTS_CONNECTION_STRING
+       or APPINSIGHTS_INSTRUMENTATIONKEY (env)
+Writes: JSON run report (Instrumentation.write_report), Application Insights
+        custom metrics; the report goes into system.import_log.metadata via
+        complete_import(metadata=...)
+Returns: Stage records and a run report dict
+
+An Instrumentation is one run (an activity invocation, a seed generator
+run). Inside it, each `with run.stage("name"):` block records its wall
+time, rows in and out, peak RSS and the database time spent in db_query()
+blocks, broken down by query type. Stages nest; nested stage names are
+joined with "/". The run report lists the stages in order with their share
+of POWER_AUTOMATE_TIMEOUT_SECONDS, so the stage that pushes an HTTP-triggered
+run past the Power Automate timeout is named rather than guessed.
+
+Peak RSS is the kernel's high-water mark (VmHWM), reset at the start of
+each stage where Linux allows it, so it is the stage's own peak; elsewhere
+it is the process peak so far.
+
+REDI_PROFILE=cprofile and/or tracemalloc (comma-separated) profiles each
+outermost stage: cProfile stats are dumped to REDI_PROFILE_DIR and the top
+functions by cumulative time go into the report; tracemalloc adds the peak
+traced memory and the top allocation sites. Both are off by default — they
+slow a run down several times.
+
+Metrics (redi-functions-spec.md §7.3): activity_duration_seconds and
+records_processed per stage, db_query_duration_seconds per db_query() and
+pipeline_duration_seconds per run. They are sent with the applicationinsights
+client when the Function App's Application Insights setting is present, and
+logged either way.
+
+See redi-functions-spec.md §7 for logging and metrics.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger("redi.instrumentation")
+
+PROFILE_ENV = "REDI_PROFILE"
+PROFILE_DIR_ENV = "REDI_PROFILE_DIR"
+APPINSIGHTS_CONNECTION_ENV = "APPLICATIONINSIGHTS_CONNECTION_STRING"
+APPINSIGHTS_KEY_ENV = "APPINSIGHTS_INSTRUMENTATIONKEY"   # Older app settings
+
+POWER_AUTOMATE_TIMEOUT_SECONDS = 120   # HTTP action timeout on the calling flows
+PROFILE_TOP = 15                       # Functions / allocation sites kept per stage
+
+_run: ContextVar["Instrumentation | None"] = ContextVar("redi_instrumentation_run", default=None)
+_stage: ContextVar["Stage | None"] = ContextVar("redi_instrumentation_stage", default=None)
+_UNSET = object()
+_telemetry_client = _UNSET
+
+
+# ============================================================================
+# Memory and telemetry helpers
+# ============================================================================
+
+def _peak_rss_kb() -> int | None:
+    """High-water mark of resident memory in KB (since the last reset)."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _reset_peak_rss() -> None:
+    """Reset VmHWM to the current RSS (Linux 4.0+; otherwise a no-op)."""
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _instrumentation_key() -> str | None:
+    """Instrumentation key from the connection string or the legacy setting."""
+    for part in os.environ.get(APPINSIGHTS_CONNECTION_ENV, "").split(";"):
+        name, _, value = part.partition("=")
+        if name.strip().lower() == "instrumentationkey" and value.strip():
+            return value.strip()
+    return os.environ.get(APPINSIGHTS_KEY_ENV) or None
+
+
+def _telemetry():
+    """The Application Insights client, or None when not configured."""
+    global _telemetry_client
+    if _telemetry_client is _UNSET:
+        _telemetry_client = None
+        key = _instrumentation_key()
+        if key:
+            try:
+                # WHY: imported lazily so scripts and tests run without it
+                from applicationinsights import TelemetryClient
+            except ImportError:
+                logger.warning("Application Insights is configured but applicationinsights "
+                               "is not installed; metrics are only logged")
+            else:
+                _telemetry_client = TelemetryClient(key)
+    return _telemetry_client
+
+
+def track_metric(name: str, value: float, **properties) -> None:
+    """Send one custom metric to Application Insights (if configured)."""
+    client = _telemetry()
+    if client is not None:
+        client.track_metric(name, value, properties={k: str(v) for k, v in properties.items()})
+
+
+def _profile_modes() -> frozenset[str]:
+    modes = {m.strip().lower() for m in os.environ.get(PROFILE_ENV, "").split(",") if m.strip()}
+    unknown = modes - {"cprofile", "tracemalloc"}
+    if unknown:
+        logger.warning("%s: ignoring unknown profiler(s) %s", PROFILE_ENV, ", ".join(sorted(unknown)))
+    return frozenset(modes - unknown)
+
+
+# ============================================================================
+# Stages and runs
+# ============================================================================
+
+class Stage:
+    """Measurements for one stage of a run.
+
+    Set rows_in / rows_out inside the block (or pass rows_in to stage()).
+
+    Attributes:
+        name: Stage name; nested stages are "outer/inner".
+        started_at: UTC start time.
+        duration_seconds: Wall time (set on exit).
+        rows_in: Rows read or received, if known.
+        rows_out: Rows written or emitted, if known.
+        peak_rss_mb: Peak resident memory during the stage.
+        db: Query type → [calls, seconds] for db_query() blocks in the stage.
+        profile: cProfile / tracemalloc results when REDI_PROFILE is set.
+        error: Exception type name if the stage raised.
+    """
+
+    __slots__ = ("name", "started_at", "duration_seconds", "rows_in", "rows_out",
+                 "peak_rss_mb", "db", "profile", "error", "_child_peak_kb")
+
+    def __init__(self, name: str, rows_in: int | None = None):
+        self.name = name
+        self.started_at = datetime.now(timezone.utc)
+        self.duration_seconds = 0.0
+        self.rows_in = rows_in
+        self.rows_out: int | None = None
+        self.peak_rss_mb: float | None = None
+        self.db: dict[str, list] = {}
+        self.profile: dict | None = None
+        self.error: str | None = None
+        self._child_peak_kb = 0
+
+    def __repr__(self) -> str:
+        return (f"Stage({self.name!r}, {self.duration_seconds:.2f}s, rows_in={self.rows_in}, "
+                f"rows_out={self.rows_out}, peak_rss_mb={self.peak_rss_mb})")
+
+    @property
+    def db_seconds(self) -> float:
+        return sum(seconds for _, seconds in self.db.values())
+
+    def to_dict(self) -> dict:
+        out = {
+            "name": self.name,
+            "started_at": self.started_at.isoformat(timespec="milliseconds"),
+            "duration_seconds": round(self.duration_seconds, 3),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "peak_rss_mb": self.peak_rss_mb,
+            "db_seconds": round(self.db_seconds, 3),
+            "db": {q: {"calls": n, "seconds": round(s, 3)}
+                   for q, (n, s) in sorted(self.db.items(), key=lambda kv: -kv[1][1])},
+        }
+        if self.profile:
+            out["profile"] = self.profile
+        if self.error:
+            out["error"] = self.error
+        return out
+
+
+class Instrumentation:
+    """One instrumented run: an activity invocation or a script run.
+
+    Use as a context manager; stage() and db_query() calls made while it
+    is open (directly or from called code) are recorded against it.
+
+    Args:
+        name: Run name, e.g. "load_census" or "generate_seed_data".
+        budget_seconds: Wall time the caller waits for; stages are
+            reported as a share of it and a run over it logs a warning.
+        profile: Profilers to use ("cprofile", "tracemalloc"); default
+            from REDI_PROFILE.
+    """
+
+    def __init__(self, name: str, budget_seconds: float | None = POWER_AUTOMATE_TIMEOUT_SECONDS,
+                 profile: frozenset[str] | set[str] | None = None):
+        self.name = name
+        self.budget_seconds = budget_seconds
+        self.profile = frozenset(profile) if profile is not None else _profile_modes()
+        self.stages: list[Stage] = []
+        self.started_at = datetime.now(timezone.utc)
+        self.duration_seconds = 0.0
+        self._start = time.perf_counter()
+        self._token = None
+        self._profiling = False
+
+    def __enter__(self) -> "Instrumentation":
+        self.started_at = datetime.now(timezone.utc)
+        self._start = time.perf_counter()
+        self._token = _run.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.duration_seconds = time.perf_counter() - self._start
+        _run.reset(self._token)
+        track_metric("pipeline_duration_seconds", self.duration_seconds, pipeline=self.name)
+        self._log_summary()
+        client = _telemetry()
+        if client is not None:
+            client.flush()
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int | None = None):
+        """Time the enclosed block as stage `name`; yields its Stage."""
+        parent = _stage.get()
+        st = Stage(f"{parent.name}/{name}" if parent else name, rows_in)
+        self.stages.append(st)
+        token = _stage.set(st)
+        profiler = None
+        tracing = False
+        if self.profile and not self._profiling:
+            if "tracemalloc" in self.profile and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                tracing = True
+            if "cprofile" in self.profile:
+                profiler = cProfile.Profile()
+                profiler.enable()
+            self._profiling = profiler is not None or tracing
+        _reset_peak_rss()
+        start = time.perf_counter()
+        try:
+            yield st
+        except BaseException as e:
+            st.error = type(e).__name__
+            raise
+        finally:
+            st.duration_seconds = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+            if profiler is not None or tracing:
+                self._profiling = False
+                st.profile = self._profile_results(st, profiler, tracing)
+            peak = max(_peak_rss_kb() or 0, st._child_peak_kb)
+            st.peak_rss_mb = round(peak / 1024, 1) if peak else None
+            _stage.reset(token)
+            if parent is not None:
+                parent._child_peak_kb = max(parent._child_peak_kb, peak)
+                for query, (calls, seconds) in st.db.items():
+                    total = parent.db.setdefault(query, [0, 0.0])
+                    total[0] += calls
+                    total[1] += seconds
+            self._log_stage(st)
+
+    def _profile_results(self, st: Stage, profiler, tracing) -> dict:
+        results = {}
+        if profiler is not None:
+            directory = Path(os.environ.get(PROFILE_DIR_ENV) or tempfile.gettempdir())
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"{self.name}.{st.name.replace('/', '.')}.{os.getpid()}.prof"
+            profiler.dump_stats(path)
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+            results["cprofile_path"] = str(path)
+            results["cprofile_top"] = [
+                line.strip() for line in out.getvalue().splitlines()
+                if line.strip() and line.strip()[0].isdigit()
+            ][:PROFILE_TOP]
+        if tracing:
+            _, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics("lineno")[:PROFILE_TOP]
+            tracemalloc.stop()
+            results["tracemalloc_peak_mb"] = round(peak / 1048576, 1)
+            results["tracemalloc_top"] = [
+                f"{s.traceback[0].filename}:{s.traceback[0].lineno} {s.size / 1048576:.1f} MB "
+                f"({s.count} blocks)" for s in top
+            ]
+        return results
+
+    def _log_stage(self, st: Stage) -> None:
+        track_metric("activity_duration_seconds", st.duration_seconds,
+                     pipeline=self.name, stage=st.name)
+        if st.rows_out is not None:
+            track_metric("records_processed", st.rows_out, pipeline=self.name, stage=st.name)
+        logger.info(
+            "%s: %s %.2fs rows_in=%s rows_out=%s peak_rss=%sMB db=%.2fs",
+            self.name, st.name, st.duration_seconds, st.rows_in, st.rows_out,
+            st.peak_rss_mb, st.db_seconds,
+            extra={"pipeline": self.name, "duration_seconds": st.duration_seconds,
+                   "record_count": st.rows_out},
+        )
+
+    def _log_summary(self) -> None:
+        top = sorted((s for s in self.stages if "/" not in s.name),
+                     key=lambda s: -s.duration_seconds)[:3]
+        slowest = ", ".join(f"{s.name} {s.duration_seconds:.1f}s" for s in top) or "no stages"
+        if self.budget_seconds and self.duration_seconds > self.budget_seconds:
+            logger.warning("%s: %.1fs, over the %ss budget; slowest stages: %s",
+                           self.name, self.duration_seconds, self.budget_seconds, slowest,
+                           extra={"pipeline": self.name, "duration_seconds": self.duration_seconds})
+        else:
+            logger.info("%s: %.1fs; slowest stages: %s", self.name, self.duration_seconds, slowest,
+                        extra={"pipeline": self.name, "duration_seconds": self.duration_seconds})
+
+    def report(self) -> dict:
+        """The run as a JSON-serialisable dict (also what goes into import_log.metadata)."""
+        duration = self.duration_seconds or (time.perf_counter() - self._start)
+        stages = []
+        for st in self.stages:
+            entry = st.to_dict()
+            if self.budget_seconds:
+                entry["budget_share"] = round(st.duration_seconds / self.budget_seconds, 3)
+            stages.append(entry)
+        return {
+            "run": self.name,
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "duration_seconds": round(duration, 3),
+            "budget_seconds": self.budget_seconds,
+            "over_budget": bool(self.budget_seconds and duration > self.budget_seconds),
+            "peak_rss_mb": max((s.peak_rss_mb or 0 for s in self.stages), default=None),
+            "profile": sorted(self.profile),
+            "stages": stages,
+        }
+
+    def write_report(self, path: str | Path) -> Path:
+        """Write report() as JSON to `path` and return the path."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(), indent=2, default=str), encoding="utf-8")
+        logger.info("%s: instrumentation report written to %s", self.name, path)
+        return path
+
+
+# ============================================================================
+# Module-level entry points (use the current run)
+# ============================================================================
+
+def current_run() -> Instrumentation | None:
+    """The Instrumentation open in this context, if any."""
+    return _run.get()
+
+
+@contextmanager
+def stage(name: str, rows_in: int | None = None):
+    """run.stage() on the current run; outside a run, a one-stage run of its own."""
+    run = _run.get()
+    if run is not None:
+        with run.stage(name, rows_in) as st:
+            yield st
+        return
+    with Instrumentation(name) as run, run.stage(name, rows_in) as st:
+        yield st
+
+
+def instrumented(name: str | None = None):
+    """Decorator: run the function as a stage (see stage()).
+
+    rows_out is taken from the return value when it is an int, a sized
+    collection, or has a `received` count (LoadResult).
+    """
+    def decorate(fn):
+        stage_name = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name) as st:
+                result = fn(*args, **kwargs)
+                if isinstance(result, bool):
+                    pass
+                elif isinstance(result, int):
+                    st.rows_out = result
+                elif hasattr(result, "received"):
+                    st.rows_out = result.received
+                elif hasattr(result, "__len__"):
+                    st.rows_out = len(result)
+                return result
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def db_query(query_type: str):
+    """Time a database call as db_query_duration_seconds{query_type}.
+
+    The time is also added to the current stage's db breakdown.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        st = _stage.get()
+        if st is not None:
+            total = st.db.setdefault(query_type, [0, 0.0])
+            total[0] += 1
+            total[1] += seconds
+        run = _run.get()
+        track_metric("db_query_duration_seconds", seconds, query_type=query_type,
+                     pipeline=run.name if run else None)
@@ -0,0 +1,283 @@
+"""
+lib/mapping.py
+
+Normalises source-system labels to lookup codes (discipline stream, job
+family, booking/course/certification status, course type) and parses the
+date and time strings found in the SharePoint and TMS exports.
+
+Pipeline position: shared by the parse/load activities and generate_seed_data.py
+Reads: system.lookup_* (optional, via load_lookups())
+Writes: Nothing (pure transformation)
+Returns: Lookup codes, date and time values
+
+Each mapping table is built once at import time from the same values seeded
+by 002_system_schema.sql. load_lookups() replaces them with the live lookup
+tables so Python and the SQL helpers (system.map_discipline_stream(),
+system.map_job_family()) agree. Every mapper also has a batch form that
+normalises a whole column in one call.
+
+Date and time parsing is memoised with a bounded LRU cache: the exports
+repeat the same few hundred date strings across thousands of rows, and
+datetime.strptime is by far the most expensive per-cell operation.
+"""
+
+import logging
+from collections.abc import Iterable, Mapping
+from datetime import date, datetime, time
+from functools import lru_cache
+
+logger = logging.getLogger("redi.mapping")
+
+# Max distinct (value, format) pairs remembered by parse_date()/parse_time()
+PARSE_CACHE_SIZE = 4096
+
+
+# ============================================================================
+# Lookup maps
+# ============================================================================
+
+class LookupMap:
+    """Source label → lookup code table with a fallback code.
+
+    Instances are callable (``map_stream("Medical")``) and are shared module
+    globals, so a table replaced by load_lookups() is seen by every caller.
+
+    Args:
+        name: Lookup name, matching the system.lookup_<name> table.
+        table: Source label → code.
+        default: Code returned for unknown labels (None if unmapped labels
+            should surface as NULL).
+    """
+
+    __slots__ = ("name", "default", "_table")
+
+    def __init__(self, name: str, table: Mapping[str, str], default: str | None = None):
+        self.name = name
+        self.default = default
+        self._table = dict(table)
+
+    def __call__(self, value: str | None) -> str | None:
+        return self._table.get(value, self.default)
+
+    def map_many(self, values: Iterable[str | None]) -> list[str | None]:
+        """Map a whole column of source labels at once."""
+        get = self._table.get
+        default = self.default
+        return [get(v, default) for v in values]
+
+    @property
+    def table(self) -> dict[str, str]:
+        """A copy of the current label → code table."""
+        return dict(self._table)
+
+    def replace(self, table: Mapping[str, str]) -> None:
+        """Swap in a new label → code table (default code is unchanged)."""
+        self._table = dict(table)
+
+
+# --- Tables (mirror the seed rows in 002_system_schema.sql) -----------------
+
+map_stream = LookupMap("discipline_stream", {
+    "Medical": "medical",
+    "Nursing & Midwifery": "nursing",
+    "Nursing or Midwifery": "nursing",
+    "Nursing": "nursing",
+    "Health Practitioner": "allied_health",
+    "Allied Health": "allied_health",
+    "Health Practitioners": "allied_health",
+    "Managerial and Clerical": "admin",
+    "none": "other",
+    "": "other",
+}, default="other")
+
+map_job_family = LookupMap("job_family", {
+    "Medical": "medical",
+    "Visiting Medical Staff": "visiting_medical",
+    "Registered / Clinical Nurse - Grades 5-6": "rn_cn_5_6",
+    "Enrolled Nurses - Grades 3-4": "en_3_4",
+    "Assistant In Nursing - Grades 1-2": "ain_1_2",
+    "Nurse Manager - Grade 7-8": "nm_7_8",
+    "Nurse Executive - Grade 9-13": "ne_9_13",
+    "Health Practitioners": "health_prac",
+    "Health Clinical Assistants": "health_clin_asst",
+    "Managerial and Clerical": "admin_clerical",
+})  # WHY: no default — unknown job families stay NULL and are flagged downstream
+
+map_booking_status = LookupMap("booking_status", {
+    "Finalised": "finalised",
+    "Attended": "attended",
+    "Completed": "completed",
+    "Enrolled": "enrolled",
+    "Booked": "booked",
+    "Did Not Attend": "did_not_attend",
+    "Further Assessment Required": "further_assessment",
+    "Cancel Request": "cancel_request",
+    "Rejected": "rejected",
+}, default="enrolled")
+
+map_course_type = LookupMap("course_type", {
+    "Full Course": "full_course",
+    "Assessment": "assessment",
+    "Refresher": "refresher",
+    "ANZCA Refresher": "anzca_refresher",
+    "Sim Workshop": "sim_workshop",
+})
+
+map_course_status = LookupMap("course_status", {
+    "Open": "open",
+    "Closed": "closed",
+    "Cancelled": "cancelled",
+}, default="closed")
+
+map_cert_status = LookupMap("certification_status", {
+    "Acquired": "acquired",
+    "Overdue": "overdue",
+    "Assigned": "assigned",
+    "Expired": "expired",
+    "In Progress": "in_progress",
+}, default="assigned")
+
+LOOKUP_MAPS: dict[str, LookupMap] = {
+    m.name: m for m in (
+        map_stream, map_job_family, map_booking_status,
+        map_course_type, map_course_status, map_cert_status,
+    )
+}
+
+# Query returning (source label, code) for each lookup, in precedence order
+_LOOKUP_QUERIES: dict[str, str] = {
+    "discipline_stream": """
+        SELECT v.label, s.code
+        FROM system.lookup_discipline_stream s,
+             unnest(s.source_variants) AS v(label)
+        WHERE s.is_active
+        ORDER BY s.sort_order, s.id
+    """,
+    "job_family": """
+        SELECT source_label, code FROM system.lookup_job_family
+        WHERE is_active AND source_label IS NOT NULL
+        ORDER BY sort_order, id
+    """,
+    "booking_status": """
+        SELECT label, code FROM system.lookup_booking_status
+        WHERE is_active ORDER BY sort_order, id
+    """,
+    "course_type": """
+        SELECT label, code FROM system.lookup_course_type
+        WHERE is_active ORDER BY sort_order, id
+    """,
+    "course_status": """
+        SELECT label, code FROM system.lookup_course_status
+        WHERE is_active ORDER BY sort_order, id
+    """,
+    "certification_status": """
+        SELECT label, code FROM system.lookup_certification_status
+        WHERE is_active ORDER BY sort_order, id
+    """,
+}
+
+
+def load_lookups(conn) -> dict[str, dict[str, str]]:
+    """Replace the mapping tables with the contents of system.lookup_*.
+
+    Args:
+        conn: Open psycopg connection.
+
+    Returns:
+        Lookup name → label → code, suitable for install_lookups() in
+        another process.
+    """
+    tables: dict[str, dict[str, str]] = {}
+    with conn.cursor() as cur:
+        for name, query in _LOOKUP_QUERIES.items():
+            table: dict[str, str] = {}
+            for label, code in cur.execute(query):
+                # WHY: first match by sort_order wins, like the LIMIT 1 in
+                # system.map_discipline_stream()
+                table.setdefault(label, code)
+            tables[name] = table
+    install_lookups(tables)
+    logger.info("Loaded lookup tables from database: %s",
+                ", ".join(f"{name}={len(t)}" for name, t in tables.items()))
+    return tables
+
+
+def install_lookups(tables: Mapping[str, Mapping[str, str]]) -> None:
+    """Install lookup tables previously returned by load_lookups()."""
+    for name, table in tables.items():
+        LOOKUP_MAPS[name].replace(table)
+
+
+# ============================================================================
+# Dates and times
+# ============================================================================
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_datetime(value: str, fmt: str) -> datetime | None:
+    try:
+        return datetime.strptime(value.strip(), fmt)
+    except ValueError:
+        return None
+
+
+def parse_date(value: str | date | None, fmt: str = "%d/%m/%Y") -> date | None:
+    """Parse a date string, or None if empty/unparseable. Dates pass through."""
+    if isinstance(value, date):
+        return value.date() if isinstance(value, datetime) else value
+    if not isinstance(value, str) or not value.strip():
+        return None
+    parsed = _parse_datetime(value, fmt)
+    return parsed.date() if parsed else None
+
+
+def parse_time(value: str | None, fmt: str = "%H:%M") -> time | None:
+    """Parse a time-of-day string, or None if empty/unparseable."""
+    if not isinstance(value, str) or not value.strip():
+        return None
+    parsed = _parse_datetime(value, fmt)
+    return parsed.time() if parsed else None
+
+
+def parse_dates(values: Iterable[str | date | None], fmt: str = "%d/%m/%Y") -> list[date | None]:
+    """Parse a whole column of date strings at once.
+
+    Each distinct value is parsed once per call, so repeated values cost a
+    dict lookup instead of a cache-wrapped function call.
+    """
+    seen: dict = {}
+    out: list[date | None] = []
+    for v in values:
+        if v not in seen:
+            seen[v] = parse_date(v, fmt)
+        out.append(seen[v])
+    return out
+
+
+def parse_times(values: Iterable[str | None], fmt: str = "%H:%M") -> list[time | None]:
+    """Parse a whole column of time strings at once (see parse_dates())."""
+    seen: dict = {}
+    out: list[time | None] = []
+    for v in values:
+        if v not in seen:
+            seen[v] = parse_time(v, fmt)
+        out.append(seen[v])
+    return out
+
+
+def duration_hours(start: time | None, end: time | None) -> float | None:
+    """Hours from start to end, rounded to 2 dp; wraps past midnight."""
+    if start is None or end is None:
+        return None
+    seconds = ((end.hour - start.hour) * 3600 + (end.minute - start.minute) * 60
+               + (end.second - start.second)) % 86400
+    return round(seconds / 3600, 2)
+
+
+def parse_cache_info():
+    """Hit/miss statistics of the shared date/time parse cache."""
+    return _parse_datetime.cache_info()
+
+
+def clear_parse_cache() -> None:
+    """Empty the shared date/time parse cache."""
+    _parse_datetime.cache_clear()
@@ -0,0 +1,329 @@
+"""
+lib/pager_filter.py
+
+Pager message prefilter: decides which raw Pagermon messages are worth
+parsing before any regex/NLP/LLM work is done.
+
+Pipeline position: load_raw_messages (orch_pager) and pager history backfills
+Reads: Address allowlist and system-test addresses (app settings),
+       escalation.pager_aliases rows
+Writes: Nothing (pure classification)
+Returns: One verdict per message (RELEVANT, NOISE, ADDRESS_DENIED or
+         ADDRESS_NOT_ALLOWED) and the matching alias, if any
+
+About 95% of the feed is noise: pages to non-RBWH capcodes and the
+"Periodical paging system" test pages. The allowlist ranges, the
+system-test addresses and the per-capcode pager_aliases rows are compiled
+once into a CapcodeIndex — sorted, disjoint capcode intervals searched with
+bisect — so an address lookup is O(log n) in the number of ranges instead
+of a scan over every range. Verdicts are memoised per address string, since
+a feed repeats the same few thousand capcodes. All noise patterns are fused
+into one compiled regex, and it only runs on messages whose address passed.
+
+PagerPrefilter.classify_many() classifies a whole batch in a single pass;
+a backfill of months of history (millions of messages) takes seconds.
+
+See redi-functions-spec.md §3.5 (orch_pager) and §9.1 (pager config).
+"""
+
+import logging
+import os
+import re
+from bisect import bisect_right
+from collections.abc import Iterable, Mapping, Sequence
+
+from lib.exceptions import ValidationError
+
+logger = logging.getLogger("redi.pager_filter")
+
+ALLOWLIST_ENV = "REDI_PAGER_ADDRESS_ALLOWLIST"
+SYSTEM_TEST_ENV = "REDI_PAGER_SYSTEM_TEST_ADDRESSES"
+
+DEFAULT_ALLOWLIST = "1234500-1234599,1234600-1234649"
+DEFAULT_SYSTEM_TEST_ADDRESSES = "42463,1999999"
+
+MEMO_MAX = 65536               # Address strings remembered before the memo is reset
+
+# Verdicts, in the order they are checked
+ADDRESS_NOT_ALLOWED = "address_not_allowed"    # Outside every allowlist range
+ADDRESS_DENIED = "address_denied"              # System-test address or inactive alias
+NOISE = "noise"                                # Allowed address, noise text
+RELEVANT = "relevant"
+
+# Message text that is never a clinical page. Each entry is a regex; they
+# are matched case-insensitively against the start of the message text.
+NOISE_PATTERNS: tuple[str, ...] = (
+    r".*Periodical paging system",     # Network keep-alive test page
+    r"\s*$",                           # Empty / whitespace-only page
+    r"\s*test(?:\s+(?:page|message))?\W*$",    # Manual "TEST" pages
+)
+
+
+# ============================================================================
+# Configuration parsing
+# ============================================================================
+
+def parse_ranges(spec: str | Iterable[str] | None) -> list[tuple[int, int]]:
+    """Parse an address list such as "1234500-1234599,42463".
+
+    Args:
+        spec: Comma-separated string, or an iterable of entries. Each entry
+            is a single capcode or an inclusive "low-high" range.
+
+    Returns:
+        (low, high) tuples in input order.
+
+    Raises:
+        ValidationError: If an entry is not a capcode or range, or a range
+            is reversed.
+    """
+    if spec is None:
+        return []
+    entries = spec.split(",") if isinstance(spec, str) else spec
+    ranges = []
+    for entry in entries:
+        entry = entry.strip()
+        if not entry:
+            continue
+        low, sep, high = entry.partition("-")
+        try:
+            lo = int(low)
+            hi = int(high) if sep else lo
+        except ValueError:
+            raise ValidationError(
+                f"Invalid pager address entry {entry!r}", source_type="pager",
+            ) from None
+        if hi < lo:
+            raise ValidationError(
+                f"Reversed pager address range {entry!r}", source_type="pager",
+            )
+        ranges.append((lo, hi))
+    return ranges
+
+
+def compile_noise_pattern(patterns: Sequence[str] = NOISE_PATTERNS) -> re.Pattern:
+    """Fuse noise patterns into one case-insensitive alternation.
+
+    Each pattern becomes a named group (noise_0, noise_1, ...) so
+    match.lastgroup tells which one fired.
+    """
+    if not patterns:
+        return re.compile(r"(?!)")     # Never matches
+    fused = "|".join(f"(?P<noise_{i}>{p})" for i, p in enumerate(patterns))
+    return re.compile(fused, re.IGNORECASE | re.DOTALL)
+
+
+def _capcode(address: object) -> int | None:
+    """Integer capcode of a pager address, or None if it is not numeric."""
+    text = str(address).strip()
+    return int(text) if text.isdigit() else None
+
+
+# ============================================================================
+# Capcode interval index
+# ============================================================================
+
+class CapcodeIndex:
+    """Sorted, disjoint capcode intervals with a verdict and alias each.
+
+    Built from three sources, later ones overriding earlier ones:
+    allowlist ranges (RELEVANT), pager_aliases rows (active rows attach
+    their alias to an allowed capcode, inactive rows deny it) and
+    system-test addresses (ADDRESS_DENIED). Aliases do not widen the
+    allowlist. Capcodes in no interval are ADDRESS_NOT_ALLOWED.
+
+    Args:
+        allow: Allowlist (low, high) ranges.
+        deny: System-test (low, high) ranges; these always win.
+        aliases: escalation.pager_aliases rows as mappings with at least
+            pager_address and is_active. Rows with a non-numeric address
+            are ignored.
+    """
+
+    __slots__ = ("_starts", "_ends", "_verdicts", "_aliases")
+
+    def __init__(
+        self,
+        allow: Iterable[tuple[int, int]],
+        deny: Iterable[tuple[int, int]] = (),
+        aliases: Iterable[Mapping] = (),
+    ):
+        allow = list(allow)
+        deny = list(deny)
+        by_code = {}
+        for row in aliases:
+            code = _capcode(row["pager_address"])
+            if code is not None:
+                by_code[code] = row
+
+        # Elementary segments: every range edge and every alias point starts one
+        bounds = {lo for lo, _ in allow} | {hi + 1 for _, hi in allow}
+        bounds |= {lo for lo, _ in deny} | {hi + 1 for _, hi in deny}
+        for code in by_code:
+            bounds.update((code, code + 1))
+        bounds = sorted(bounds)
+
+        allow_edges = _edges(allow)
+        deny_edges = _edges(deny)
+        allow_depth = deny_depth = 0
+        starts, ends, verdicts, rows = [], [], [], []
+        for lo, nxt in zip(bounds, bounds[1:]):
+            allow_depth += allow_edges.get(lo, 0)
+            deny_depth += deny_edges.get(lo, 0)
+            alias = by_code.get(lo) if nxt == lo + 1 else None
+            if deny_depth:
+                verdict, alias = ADDRESS_DENIED, None
+            elif not allow_depth:
+                continue
+            elif alias is not None and not alias.get("is_active", True):
+                verdict, alias = ADDRESS_DENIED, None
+            else:
+                verdict = RELEVANT
+            # Merge with the previous interval if it is adjacent and identical
+            if (alias is None and starts and ends[-1] == lo - 1
+                    and verdicts[-1] == verdict and rows[-1] is None):
+                ends[-1] = nxt - 1
+                continue
+            starts.append(lo)
+            ends.append(nxt - 1)
+            verdicts.append(verdict)
+            rows.append(alias)
+
+        self._starts = starts
+        self._ends = ends
+        self._verdicts = verdicts
+        self._aliases = rows
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self)} intervals)"
+
+    def lookup(self, capcode: int) -> tuple[str, Mapping | None]:
+        """Verdict and alias row for one capcode."""
+        i = bisect_right(self._starts, capcode) - 1
+        if i >= 0 and capcode <= self._ends[i]:
+            return self._verdicts[i], self._aliases[i]
+        return ADDRESS_NOT_ALLOWED, None
+
+    def intervals(self) -> list[tuple[int, int, str]]:
+        """(low, high, verdict) for every interval, in capcode order."""
+        return list(zip(self._starts, self._ends, self._verdicts))
+
+
+def _edges(ranges: Iterable[tuple[int, int]]) -> dict[int, int]:
+    """Depth change at each range edge, for the segment sweep."""
+    edges: dict[int, int] = {}
+    for lo, hi in ranges:
+        edges[lo] = edges.get(lo, 0) + 1
+        edges[hi + 1] = edges.get(hi + 1, 0) - 1
+    return edges
+
+
+# ============================================================================
+# Prefilter
+# ============================================================================
+
+class PagerPrefilter:
+    """Classify raw pager messages as relevant or noise.
+
+    Args:
+        index: Compiled capcode index.
+        noise_patterns: Regexes for message text that is never clinical.
+    """
+
+    __slots__ = ("index", "_noise", "_memo")
+
+    def __init__(self, index: CapcodeIndex, noise_patterns: Sequence[str] = NOISE_PATTERNS):
+        self.index = index
+        self._noise = compile_noise_pattern(noise_patterns)
+        self._memo: dict[object, tuple[str, Mapping | None]] = {}
+
+    @classmethod
+    def from_settings(
+        cls,
+        aliases: Iterable[Mapping] = (),
+        allowlist: str | None = None,
+        system_test: str | None = None,
+    ) -> "PagerPrefilter":
+        """Build a prefilter from the pager app settings.
+
+        Args:
+            aliases: escalation.pager_aliases rows.
+            allowlist: Overrides REDI_PAGER_ADDRESS_ALLOWLIST.
+            system_test: Overrides REDI_PAGER_SYSTEM_TEST_ADDRESSES.
+
+        Raises:
+            ValidationError: If either address list is malformed.
+        """
+        if allowlist is None:
+            allowlist = os.environ.get(ALLOWLIST_ENV, DEFAULT_ALLOWLIST)
+        if system_test is None:
+            system_test = os.environ.get(SYSTEM_TEST_ENV, DEFAULT_SYSTEM_TEST_ADDRESSES)
+        index = CapcodeIndex(parse_ranges(allowlist), parse_ranges(system_test), aliases)
+        logger.debug("Pager prefilter compiled: %r", index)
+        return cls(index)
+
+    def _address(self, address: object) -> tuple[str, Mapping | None]:
+        hit = self._memo.get(address)
+        if hit is None:
+            code = _capcode(address)
+            hit = (ADDRESS_NOT_ALLOWED, None) if code is None else self.index.lookup(code)
+            if len(self._memo) >= MEMO_MAX:
+                self._memo.clear()
+            self._memo[address] = hit
+        return hit
+
+    def alias(self, address: object) -> Mapping | None:
+        """Active pager_aliases row for an allowed address, if any."""
+        return self._address(address)[1]
+
+    def classify(self, address: object, text: str | None) -> str:
+        """Verdict for a single message."""
+        verdict = self._address(address)[0]
+        if verdict is RELEVANT and (text is None or self._noise.match(text)):
+            return NOISE
+        return verdict
+
+    def classify_many(
+        self,
+        messages: Iterable[Mapping],
+        address_key: str = "pager_address",
+        text_key: str = "message_text",
+    ) -> list[str]:
+        """Classify a batch of messages in one pass.
+
+        Args:
+            messages: Raw messages as mappings (Pagermon JSON or DB rows).
+            address_key: Key holding the capcode.
+            text_key: Key holding the message text.
+
+        Returns:
+            One verdict per message, in input order. Pass the result to
+            collections.Counter for per-verdict counts.
+        """
+        memo = self._memo
+        address = self._address
+        match = self._noise.match
+        out = []
+        append = out.append
+        for msg in messages:
+            addr = msg[address_key]
+            hit = memo.get(addr) or address(addr)
+            if hit[0] is not RELEVANT:
+                append(hit[0])
+                continue
+            text = msg[text_key]
+            append(NOISE if text is None or match(text) else RELEVANT)
+        return out
+
+    def relevant(
+        self,
+        messages: Sequence[Mapping],
+        address_key: str = "pager_address",
+        text_key: str = "message_text",
+    ) -> list[Mapping]:
+        """The messages classify_many() marks RELEVANT, in input order."""
+        verdicts = self.classify_many(messages, address_key, text_key)
+        return [m for m, v in zip(messages, verdicts) if v is RELEVANT]
@@ -0,0 +1,185 @@
+"""
+lib/staff_merge.py
+
+Consolidates staff identity records from several sources (ALS and BLS
+certification exports, course participants, faculty list, ...) into one
+record per payroll id, using an explicit field-by-source precedence table.
+
+Pipeline position: upsert_staff (orch_certifications, orch_elearning,
+orch_courses) and generate_seed_data.py, before the core.staff upsert
+Reads: Normalised staff tuples from the source parsers
+Writes: Nothing (pure transformation)
+Returns: StaffMerger, iterated as rows in first-seen payroll order
+
+Merged values are held column-wise: one list per field plus a bytearray of
+the rank of the source that supplied each value, indexed by a per-payroll
+slot number. Sources can be merged one at a time as they arrive; earlier
+sources are never rescanned.
+
+See redi-db-spec.md §5 (core.staff) for the target schema.
+"""
+
+import logging
+from collections.abc import Iterable, Mapping, Sequence
+
+logger = logging.getLogger("redi.staff_merge")
+
+
+# --- Per-source policies ----------------------------------------------------
+# How repeated rows from the *same* source combine for one field.
+
+REPLACE = "replace"                # Last row wins, even if its value is empty
+REPLACE_IF_SET = "replace_if_set"  # Last non-empty value wins
+FILL = "fill"                      # First non-empty value wins
+
+_POLICIES = (REPLACE, REPLACE_IF_SET, FILL)
+
+
+# --- Staff precedence table -------------------------------------------------
+# For each core.staff field, the sources that may supply it, listed from
+# lowest to highest priority, each with its same-source policy. A non-empty
+# value from a higher-priority source replaces a lower-priority one; a
+# lower-priority source only ever fills a field that is still empty.
+#
+# WHY: org unit, manager and job family only exist in the TMS certification
+# exports, where ALS rows win over BLS. Names, email and discipline stream
+# come preferentially from the SharePoint lists (participants, then faculty),
+# which carry the names staff actually use rather than the TMS
+# "Surname, Given" form.
+
+STAFF_PRECEDENCE: dict[str, tuple[tuple[str, str], ...]] = {
+    "given_name":             (("als", REPLACE), ("participants", REPLACE_IF_SET),
+                               ("faculty", REPLACE_IF_SET)),
+    "surname":                (("als", REPLACE), ("participants", REPLACE_IF_SET),
+                               ("faculty", REPLACE_IF_SET)),
+    "email":                  (("participants", REPLACE_IF_SET), ("faculty", REPLACE_IF_SET)),
+    "discipline_stream_code": (("bls", FILL), ("als", REPLACE_IF_SET),
+                               ("participants", REPLACE_IF_SET), ("faculty", REPLACE_IF_SET)),
+    "job_family_code":        (("bls", FILL), ("als", REPLACE)),
+    "org_unit_id":            (("bls", FILL), ("als", REPLACE)),
+    "facility":               (("participants", REPLACE_IF_SET),),
+    "manager_name":           (("bls", FILL), ("als", REPLACE)),
+}
+
+
+def split_full_name(full_name: str | None) -> tuple[str | None, str | None]:
+    """Split a TMS "Surname, Given Names" string into (given_name, surname).
+
+    Args:
+        full_name: Person Full Name as exported by TMS.
+
+    Returns:
+        (given_name, surname); given_name is the last token and surname the
+        first with its trailing comma removed. Empty parts are None.
+    """
+    tokens = full_name.split() if full_name else None
+    if not tokens:
+        return None, None
+    return tokens[-1], tokens[0].rstrip(",") or None
+
+
+# ============================================================================
+# Merge engine
+# ============================================================================
+
+class StaffMerger:
+    """Column-oriented staff store keyed by payroll id.
+
+    Args:
+        precedence: Field → ((source, policy), ...) from lowest to highest
+            priority. Defaults to STAFF_PRECEDENCE.
+    """
+
+    __slots__ = ("_precedence", "_slots", "_values", "_ranks", "sources")
+
+    def __init__(self, precedence: Mapping[str, Sequence[tuple[str, str]]] = STAFF_PRECEDENCE):
+        for field, entries in precedence.items():
+            for source, policy in entries:
+                if policy not in _POLICIES:
+                    raise ValueError(f"Unknown merge policy {policy!r} for {field}/{source}")
+            if len(entries) > 255:
+                raise ValueError(f"Too many sources for field {field}")
+        self._precedence = precedence
+        self._slots: dict[str, int] = {}
+        self._values: dict[str, list] = {field: [] for field in precedence}
+        # WHY: rank 0 marks "never supplied"; source ranks start at 1 so
+        # one byte per field per person is enough.
+        self._ranks: dict[str, bytearray] = {field: bytearray() for field in precedence}
+        self.sources: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, payroll_id: str) -> bool:
+        return payroll_id in self._slots
+
+    def merge(self, source: str, fields: Sequence[str], rows: Iterable[Sequence]) -> int:
+        """Merge rows from one source into the store.
+
+        Args:
+            source: Source name as used in the precedence table.
+            fields: Field names for row[1:]; row[0] is the payroll id.
+                Empty strings must already be normalised to None.
+            rows: Iterable of (payroll_id, value, ...) tuples. Rows with an
+                empty payroll id are skipped.
+
+        Returns:
+            Number of rows merged.
+
+        Raises:
+            ValueError: If `source` may not supply one of `fields`.
+        """
+        # --- Resolve (rank, policy) for this source once ---------------------
+        plan = []
+        for i, field in enumerate(fields, 1):
+            entries = self._precedence.get(field, ())
+            for rank, (name, policy) in enumerate(entries, 1):
+                if name == source:
+                    plan.append((i, self._values[field], self._ranks[field], rank, policy))
+                    break
+            else:
+                raise ValueError(f"Source {source!r} is not a precedence source for {field!r}")
+
+        slots = self._slots
+        columns = [(self._values[f], self._ranks[f]) for f in self._precedence]
+        merged = 0
+        for row in rows:
+            pid = row[0]
+            if not pid:
+                continue
+            slot = slots.get(pid)
+            if slot is None:
+                slot = slots[pid] = len(slots)
+                for values, ranks in columns:
+                    values.append(None)
+                    ranks.append(0)
+            for i, values, ranks, rank, policy in plan:
+                new = row[i]
+                current_rank = ranks[slot]
+                if current_rank == rank:
+                    if policy == REPLACE or (new is not None and (
+                            policy == REPLACE_IF_SET or values[slot] is None)):
+                        values[slot] = new
+                elif current_rank < rank:
+                    if new is not None or values[slot] is None:
+                        values[slot] = new
+                        ranks[slot] = rank
+                elif new is not None and values[slot] is None:
+                    values[slot] = new
+                    ranks[slot] = rank
+            merged += 1
+
+        self.sources.append(source)
+        logger.info("Merged %d %s rows; %d staff in total", merged, source, len(slots))
+        return merged
+
+    def get(self, payroll_id: str, field: str) -> object | None:
+        """Return the merged value of `field` for `payroll_id`, or None."""
+        slot = self._slots.get(payroll_id)
+        return None if slot is None else self._values[field][slot]
+
+    def rows(self, fields: Sequence[str]) -> Iterable[tuple]:
+        """Yield (payroll_id, value, ...) for `fields` in first-seen order."""
+        columns = [self._values[f] for f in fields]
+        for pid, slot in self._slots.items():
+            yield (pid, *(column[slot] for column in columns))
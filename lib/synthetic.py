@@ -0,0 +1,736 @@
+"""
+lib/synthetic.py
+
+Synthetic, referentially consistent data for every table the pipelines
+fill, at production volume over a configurable number of years. Used to
+exercise the views, agg.refresh_* functions and retention jobs at 5 or 10
+years of history, which the sample files in 010_seed_data.sql cannot.
+
+Pipeline position: generate_seed_data.py --synthetic (benchmark databases only)
+Reads: Ids of the loaded dimension rows (SyntheticIds.load)
+Writes: Nothing (pure generation)
+Returns: Row tuples in the column order of the *_COLUMNS lists; dimension
+         rows in the shape of generate_seed_data's *_records() generators
+
+Volumes are the §17 estimates (VOLUMES) multiplied by SyntheticConfig.scale.
+Every table draws from its own random stream derived from the seed, so the
+same (years, scale, seed, end) always gives the same rows, whichever tables
+are generated and in whatever order.
+
+The data hangs together the way the real feeds do:
+
+  * staff are hired and leave over the period (~12% turnover a year), and
+    occasionally move org unit; weekly ALS/BLS snapshots list everyone
+    employed that week, with statuses that follow each person's
+    certification expiry (acquired → overdue → expired, renewed at random);
+  * courses run on weekdays throughout the period and their participants
+    are staff employed on the course date;
+  * the census is a day-by-day simulation of admissions and discharges
+    (stable patient hashes, readmissions, internal ward moves, the odd
+    patient missing from one day's census), so clinical.apply_census_day()
+    builds realistic episodes; transfers are the day's inter-hospital
+    admissions and deaths are a share of the discharges;
+  * ~5% of pager messages are relevant, and each one has an escalation
+    event, usually for a patient in the census on that ward.
+
+See redi-db-spec.md §17 for the volume estimates.
+"""
+
+import math
+import random
+from collections import deque
+from collections.abc import Iterator
+from datetime import date, datetime, time, timedelta, timezone
+
+from lib.deidentify import PatientHasher, age_band
+
+AEST = timezone(timedelta(hours=10), "AEST")
+
+# Production volumes (redi-db-spec.md §17), before scaling
+VOLUMES = {
+    "org_units": 1200,
+    "wards": 100,
+    "admitting_units": 60,
+    "staff": 9500,               # Headcount at any one time
+    "faculty": 120,
+    "courses_per_year": 350,
+    "participants_per_year": 2400,
+    "census_per_day": 500,
+    "transfers_per_day": 50,
+    "deaths_per_year": 300,
+    "pager_per_day": 1000,
+    "events_per_day": 50,
+}
+
+ORG_UNIT_BASE = 900_000_000      # Synthetic org unit ids start above the real ones
+PAYROLL_BASE = 90_000_000        # Likewise payroll numbers
+SOURCE_ID_BASE = 900_000_000     # And SharePoint item ids (courses, participants, faculty)
+STAFF_TURNOVER = 0.12            # Leavers per head per year
+STAFF_MOVES = 0.03               # Org unit changes per head per year
+ALS_SCOPE = {"medical": 0.6, "visiting_medical": 0.3, "rn_cn_5_6": 0.25, "nm_7_8": 0.3}
+CERT_VALIDITY_DAYS = {"ALS": 730, "BLS": 365}
+OVERDUE_DAYS = 90                # acquired → overdue at expiry, → expired after this
+MEAN_LOS_DAYS = 8.0             # ~23K admissions a year at 500 inpatients (§17)
+READMISSION_RATE = 0.12
+WARM_UP_DAYS = 60                # Census simulated before the first day emitted
+
+# ============================================================================
+# Column orders for the fact generators (import_id is prepended by the loader)
+# ============================================================================
+
+PARTICIPANT_COLUMNS = [
+    "source_id", "course_id", "staff_id", "given_name", "surname", "payroll_id",
+    "email", "discipline_stream_code", "work_area", "facility", "booking_status_code",
+    "prereading_status_code", "source_created_at",
+]
+CERT_COLUMNS = [
+    "staff_id", "certification_type", "status_code", "org_unit_id",
+    "job_family_code", "manager_name",
+]
+CENSUS_COLUMNS = [
+    "census_date", "patient_hash", "ward_id", "admitting_unit_id", "treating_doctor_hash",
+    "bed", "sex", "age_band", "admission_date", "expected_discharge", "los_days",
+]
+TRANSFER_COLUMNS = [
+    "transfer_date", "patient_hash", "age_band", "sex", "admission_source", "source_hospital",
+    "admitting_unit_id", "admitting_division", "admitting_subdivision", "admission_ward_id",
+    "current_ward_id", "admission_type", "admission_status", "weekday",
+]
+DEATH_COLUMNS = [
+    "report_month", "patient_hash", "age_band", "sex", "admitting_unit_id",
+    "discharge_unit_id", "admission_date", "discharge_date", "los_days",
+]
+PAGER_COLUMNS = [
+    "id", "source_id", "message_time", "pager_address", "message_text", "source",
+    "alias_id", "is_relevant", "processing_status",
+]
+EVENT_COLUMNS = [
+    "pager_message_id", "event_time", "event_date", "event_type_code", "event_type_confidence",
+    "ward_id", "ward_confidence", "ward_raw", "admitting_unit_id", "unit_confidence",
+    "patient_hash", "patient_confidence", "reason", "reason_confidence", "weekday",
+    "time_of_day_code", "parsing_method",
+]
+
+# ============================================================================
+# Vocabularies
+# ============================================================================
+
+GIVEN_NAMES = [
+    "Olivia", "Jack", "Charlotte", "Noah", "Amelia", "William", "Isla", "Oliver", "Mia",
+    "Thomas", "Grace", "James", "Ava", "Lucas", "Chloe", "Henry", "Emily", "Ethan", "Ruby",
+    "Liam", "Sophie", "Samuel", "Zoe", "Daniel", "Priya", "Wei", "Aisha", "Mohammed",
+    "Hannah", "Joshua", "Ella", "Benjamin", "Lily", "Lachlan", "Sienna", "Cooper", "Harper",
+    "Riley", "Matilda", "Nguyen",
+]
+SURNAMES = [
+    "Smith", "Jones", "Williams", "Brown", "Wilson", "Taylor", "Nguyen", "Johnson", "Martin",
+    "White", "Anderson", "Walker", "Thompson", "Harris", "Lee", "Ryan", "Robinson", "Kelly",
+    "King", "Davis", "Wright", "Evans", "Roberts", "Green", "Hall", "Wood", "Jackson",
+    "Clarke", "Patel", "Singh", "Chen", "Wang", "Campbell", "Mitchell", "O'Brien", "Murphy",
+    "Hughes", "Edwards", "Scott", "Young",
+]
+# Directorate (facility code) → service lines
+DIRECTORATES = {
+    "RBWH": ["Internal Medicine Services", "Cardiology", "Surgical and Perioperative Services",
+             "Critical Care", "Women's and Newborn Services", "Cancer Care Services"],
+    "STARS": ["Orthopaedics", "Rehabilitation", "Surgical Services"],
+    "TPCH": ["Cardiology", "Thoracic Medicine", "Emergency"],
+    "REDH": ["Redcliffe Medicine Group", "Redcliffe Surgical Group"],
+    "CABH": ["Caboolture Obstetric Services", "Nurse Education"],
+    "CESS": ["Clinical Streams", "Allied Health", "Corporate Services"],
+}
+ORG_UNIT_KINDS = ["Ward", "Team", "Clinic", "Service", "Unit", "Office"]
+DIVISIONS = {
+    "Medicine": ["General Medicine", "Cardiology", "Respiratory", "Neurology", "Renal"],
+    "Surgery": ["General Surgery", "Orthopaedics", "Vascular", "Urology"],
+    "Critical Care": ["Emergency", "Intensive Care"],
+    "Women's and Newborn": ["Obstetrics", "Neonatology"],
+    "Cancer Care": ["Medical Oncology", "Haematology"],
+}
+# (job family code, discipline stream code, share of headcount)
+JOB_FAMILIES = [
+    ("rn_cn_5_6", "nursing", 0.38), ("en_3_4", "nursing", 0.06), ("ain_1_2", "nursing", 0.05),
+    ("nm_7_8", "nursing", 0.04), ("ne_9_13", "nursing", 0.005), ("medical", "medical", 0.16),
+    ("visiting_medical", "medical", 0.02), ("health_prac", "allied_health", 0.12),
+    ("health_clin_asst", "allied_health", 0.04), ("admin_clerical", "admin", 0.125),
+]
+FACILITIES = ["RBWH", "RBWH", "RBWH", "STARS", "TPCH"]
+# (course type, title, duration hours, capacity, share of courses)
+COURSE_TYPES = [
+    ("full_course", "Advanced Life Support Full Course", 7.5, 16, 0.35),
+    ("assessment", "ALS Assessment", 2.0, 8, 0.25),
+    ("refresher", "ALS Refresher", 3.5, 12, 0.2),
+    ("anzca_refresher", "ANZCA ALS Refresher", 3.5, 10, 0.1),
+    ("sim_workshop", "Resuscitation Simulation Workshop", 4.0, 8, 0.1),
+]
+VENUES = ["Skills Centre Room 1", "Skills Centre Room 2", "Sim Lab", "Education Centre"]
+# Past courses; future ones are booked/enrolled
+BOOKING_OUTCOMES = [
+    ("completed", 0.55), ("attended", 0.15), ("finalised", 0.1), ("did_not_attend", 0.08),
+    ("further_assessment", 0.04), ("cancel_request", 0.05), ("rejected", 0.03),
+]
+SOURCE_HOSPITALS = [
+    "The Prince Charles Hospital", "Redcliffe Hospital", "Caboolture Hospital",
+    "Princess Alexandra Hospital", "Toowoomba Hospital", "Sunshine Coast University Hospital",
+    "Mackay Base Hospital", "Townsville University Hospital", "Private Hospital",
+]
+# (event type, pager label, share of events)
+EVENT_TYPES = [
+    ("clinical_callback", "CB15", 0.33), ("urgent_review", "UCR", 0.2),
+    ("medical_emergency", "MET CALL", 0.15), ("rapid_response", "RAPID RESPONSE", 0.1),
+    ("code_blue", "CODE BLUE", 0.03), ("code_stroke", "CODE STROKE", 0.03),
+    ("trauma", "TRAUMA ALERT", 0.02), ("other_clinical", "CLINICAL REVIEW", 0.11),
+    ("non_clinical", "BED MGMT", 0.03),
+]
+REASONS = [
+    "SBP below 100", "HR above 140", "RR above 30", "SpO2 below 90", "CHEST PAIN",
+    "DECREASED GCS", "SEIZURE", "FALL", "TEMP above 39", "CONCERN", "Q-ADDS 6",
+]
+NOISE_TEXTS = [
+    "Periodical paging system test", "PLEASE CALL {ext} RE ROSTER", "PATHOLOGY RESULT READY {ext}",
+    "CALL SWITCH {ext}", "REMINDER: HANDOVER 0730", "PORTER REQUIRED {ext}",
+    "IT OUTAGE NOTICE - SEE EMAIL",
+]
+RELEVANT_ADDRESSES = range(1234500, 1234650)   # lib/pager_filter.py DEFAULT_ALLOWLIST
+
+
+def _weighted(rng: random.Random, table: list[tuple], weight_index: int = -1) -> tuple:
+    """One row of `table`, chosen with probability proportional to its weight column."""
+    return rng.choices(table, weights=[row[weight_index] for row in table])[0]
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    """Approximately Poisson-distributed count (normal approximation above 30)."""
+    if mean <= 0:
+        return 0
+    if mean > 30:
+        return max(0, round(rng.gauss(mean, math.sqrt(mean))))
+    limit, k, p = math.exp(-mean), 0, rng.random()
+    while p > limit:
+        k += 1
+        p *= rng.random()
+    return k
+
+
+def time_of_day(hour: int) -> str:
+    """system.lookup_time_of_day code for an hour (hospital time)."""
+    if 7 <= hour <= 17:
+        return "day"
+    if 18 <= hour <= 22:
+        return "evening"
+    return "overnight"
+
+
+# ============================================================================
+# Configuration and database ids
+# ============================================================================
+
+class SyntheticConfig:
+    """Size and seed of a synthetic data set.
+
+    Attributes:
+        years: Length of the period, ending on `end`.
+        scale: Multiplier applied to every VOLUMES entry.
+        seed: Root of every per-table random stream.
+        end: Last day of data (default: today).
+    """
+
+    __slots__ = ("years", "scale", "seed", "end")
+
+    def __init__(self, years: float = 5, scale: float = 1.0, seed: int = 1, end: date | None = None):
+        if years <= 0 or scale <= 0:
+            raise ValueError(f"years and scale must be positive, got {years} and {scale}")
+        self.years = years
+        self.scale = scale
+        self.seed = seed
+        self.end = end or date.today()
+
+    def __repr__(self) -> str:
+        return (f"SyntheticConfig(years={self.years}, scale={self.scale}, "
+                f"seed={self.seed}, end={self.end.isoformat()})")
+
+    @property
+    def start(self) -> date:
+        return self.end - timedelta(days=round(365.25 * self.years) - 1)
+
+    def count(self, volume: str) -> int:
+        """VOLUMES[volume] at this scale (at least 1)."""
+        return max(1, round(VOLUMES[volume] * self.scale))
+
+    def rng(self, stream: str) -> random.Random:
+        """Independent, reproducible random stream for one table."""
+        return random.Random(f"{self.seed}:{stream}")
+
+    def metadata(self) -> dict:
+        """Parameters recorded in system.import_log.metadata for the data set."""
+        return {"years": self.years, "scale": self.scale, "seed": self.seed,
+                "start": self.start.isoformat(), "end": self.end.isoformat()}
+
+
+class SyntheticIds:
+    """Database ids of the loaded synthetic dimension rows.
+
+    Attributes:
+        wards: Ward code → core.wards.id.
+        units: Admitting unit code → core.admitting_units.id.
+        staff: Payroll id → core.staff.id.
+        courses: Course source_id → training.courses.id.
+    """
+
+    __slots__ = ("wards", "units", "staff", "courses")
+
+    def __init__(self, wards: dict, units: dict, staff: dict, courses: dict):
+        self.wards = wards
+        self.units = units
+        self.staff = staff
+        self.courses = courses
+
+    @classmethod
+    def load(cls, cur) -> "SyntheticIds":
+        def pairs(query):
+            cur.execute(query)
+            return dict(cur.fetchall())
+
+        return cls(
+            pairs("SELECT code, id FROM core.wards"),
+            pairs("SELECT code, id FROM core.admitting_units"),
+            pairs("SELECT payroll_id, id FROM core.staff WHERE payroll_id IS NOT NULL"),
+            pairs("SELECT source_id, id FROM training.courses"),
+        )
+
+
+# ============================================================================
+# Dimensions (shaped like generate_seed_data's *_records())
+# ============================================================================
+
+def org_unit_records(cfg: SyntheticConfig) -> Iterator[tuple]:
+    """Yield (id, name, directorate, service_line)."""
+    rng = cfg.rng("org_units")
+    directorates = list(DIRECTORATES)
+    for i in range(cfg.count("org_units")):
+        directorate = rng.choice(directorates)
+        service_line = rng.choice(DIRECTORATES[directorate])
+        yield (ORG_UNIT_BASE + i, f"{service_line} {rng.choice(ORG_UNIT_KINDS)} {i + 1}",
+               directorate, service_line)
+
+
+def ward_records(cfg: SyntheticConfig) -> Iterator[tuple]:
+    """Yield (code,)."""
+    for i in range(cfg.count("wards")):
+        yield (f"SW{i + 1:03d}",)
+
+
+def admitting_unit_records(cfg: SyntheticConfig) -> Iterator[tuple]:
+    """Yield (code, division, subdivision)."""
+    rng = cfg.rng("admitting_units")
+    divisions = list(DIVISIONS)
+    for i in range(cfg.count("admitting_units")):
+        division = rng.choice(divisions)
+        yield (f"SU{i + 1:03d}", division, rng.choice(DIVISIONS[division]))
+
+
+def ward_unit_records(cfg: SyntheticConfig) -> Iterator[tuple]:
+    """Yield (ward_code, unit_code): each ward takes patients from 1-3 units."""
+    rng = cfg.rng("ward_unit_map")
+    units = [rec[0] for rec in admitting_unit_records(cfg)]
+    for (ward,) in ward_records(cfg):
+        for unit in rng.sample(units, min(len(units), rng.randint(1, 3))):
+            yield (ward, unit)
+
+
+def course_records(cfg: SyntheticConfig) -> Iterator[tuple]:
+    """Yield training.courses tuples (source_id, title, type, date, start, end,
+    duration, venue, capacity, status, outlook_id), weekdays only."""
+    rng = cfg.rng("courses")
+    days = (cfg.end - cfg.start).days + 1
+    per_day = cfg.count("courses_per_year") / 365.25 * 7 / 5
+    source_id = SOURCE_ID_BASE
+    for offset in range(days):
+        day = cfg.start + timedelta(days=offset)
+        if day.weekday() >= 5:
+            continue
+        for _ in range(_poisson(rng, per_day)):
+            source_id += 1
+            course_type, title, hours, capacity, _share = _weighted(rng, COURSE_TYPES)
+            start_hour = rng.choice([8, 9, 13]) if hours < 7 else 8
+            end_minutes = start_hour * 60 + round(hours * 60)
+            status = "cancelled" if rng.random() < 0.05 else (
+                "closed" if day < cfg.end - timedelta(days=7) else "open")
+            yield (source_id, title, course_type, day, f"{start_hour:02d}:00",
+                   f"{end_minutes // 60:02d}:{end_minutes % 60:02d}", hours,
+                   rng.choice(VENUES), capacity, status, f"SYN-{source_id - SOURCE_ID_BASE:06d}")
+
+
+# ============================================================================
+# Workforce
+# ============================================================================
+
+class StaffMember:
+    """One synthetic employee over their tenure.
+
+    Attributes:
+        payroll_id: Synthetic payroll number.
+        given_name, surname: Name.
+        job_family: system.lookup_job_family code.
+        stream: Discipline stream of the job family.
+        postings: (from date, org unit id) pairs, in date order.
+        hired: First day employed.
+        left: First day no longer employed, or None.
+        als: ALS applies to the role (otherwise ALS rows are not_assigned).
+    """
+
+    __slots__ = ("payroll_id", "given_name", "surname", "job_family", "stream",
+                 "postings", "hired", "left", "als")
+
+    def employed(self, day: date) -> bool:
+        return self.hired <= day and (self.left is None or day < self.left)
+
+    def org_unit(self, day: date) -> int:
+        unit = self.postings[0][1]
+        for since, org_unit_id in self.postings[1:]:
+            if since > day:
+                break
+            unit = org_unit_id
+        return unit
+
+    @property
+    def email(self) -> str:
+        return f"{self.given_name}.{self.surname}{self.payroll_id[-4:]}@synthetic.example".lower()
+
+
+class Workforce:
+    """Everyone employed at some point in the period.
+
+    The headcount starts at VOLUMES["staff"] (scaled); every leaver is
+    replaced on the day they leave, in the same job family.
+    """
+
+    def __init__(self, cfg: SyntheticConfig):
+        rng = cfg.rng("staff")
+        self.cfg = cfg
+        org_units = [rec[0] for rec in org_unit_records(cfg)]
+        # A few large org units and many small ones
+        sizes = [rng.paretovariate(1.2) for _ in org_units]
+        self.managers = {
+            unit: f"{rng.choice(GIVEN_NAMES)} {rng.choice(SURNAMES)}" for unit in org_units
+        }
+        self.members: list[StaffMember] = []
+
+        period_years = (cfg.end - cfg.start).days / 365.25
+        hires = deque(
+            (cfg.start - timedelta(days=rng.randrange(3650)), None)
+            for _ in range(cfg.count("staff"))
+        )
+        while hires:
+            hired, family = hires.popleft()
+            m = StaffMember()
+            m.payroll_id = str(PAYROLL_BASE + len(self.members) + 1)
+            m.given_name = rng.choice(GIVEN_NAMES)
+            m.surname = rng.choice(SURNAMES)
+            m.job_family, m.stream, _share = family or _weighted(rng, JOB_FAMILIES)
+            m.hired = hired
+            m.als = rng.random() < ALS_SCOPE.get(m.job_family, 0)
+            # Tenure is memoryless, so staff already employed at the start
+            # draw theirs from the start of the period
+            tenure_from = max(hired, cfg.start)
+            m.left = tenure_from + timedelta(days=round(rng.expovariate(STAFF_TURNOVER) * 365.25))
+            m.postings = [(hired, rng.choices(org_units, weights=sizes)[0])]
+            if rng.random() < STAFF_MOVES * period_years:
+                moved = tenure_from + timedelta(days=rng.randrange(max(1, (m.left - tenure_from).days)))
+                m.postings.append((moved, rng.choices(org_units, weights=sizes)[0]))
+            if m.left > cfg.end:
+                m.left = None
+            else:
+                hires.append((m.left, (m.job_family, m.stream, 0)))
+            self.members.append(m)
+
+    def staff_records(self) -> Iterator[tuple]:
+        """Yield core.staff tuples (payroll_id, given, surname, email, stream,
+        job_family, org_unit_id, facility, manager)."""
+        rng = self.cfg.rng("staff_records")
+        for m in self.members:
+            unit = m.postings[-1][1]
+            yield (m.payroll_id, m.given_name, m.surname, m.email, m.stream, m.job_family,
+                   unit, rng.choice(FACILITIES), self.managers[unit])
+
+    def faculty_records(self) -> Iterator[tuple]:
+        """Yield training.faculty_members tuples (source_id, given, surname, email,
+        mobile, payroll_id, discipline, stream, cert_date, is_inactive)."""
+        rng = self.cfg.rng("faculty")
+        clinical = [m for m in self.members if m.stream in ("medical", "nursing")]
+        members = rng.sample(clinical, min(len(clinical), self.cfg.count("faculty")))
+        for i, m in enumerate(members, SOURCE_ID_BASE + 1):
+            cert_date = max(m.hired, self.cfg.start) + timedelta(days=rng.randrange(365))
+            yield (i, m.given_name, m.surname, m.email, f"04{rng.randrange(10**8):08d}",
+                   m.payroll_id, "Medicine" if m.stream == "medical" else "Nursing", m.stream,
+                   min(cert_date, self.cfg.end), m.left is not None)
+
+    def participant_records(self, ids: SyntheticIds) -> Iterator[tuple]:
+        """Yield PARTICIPANT_COLUMNS rows: staff employed on each course date."""
+        cfg = self.cfg
+        rng = cfg.rng("participants")
+        per_course = cfg.count("participants_per_year") / cfg.count("courses_per_year")
+        source_id = SOURCE_ID_BASE
+        for course in course_records(cfg):
+            course_sid, _title, _type, day, *_rest, capacity, status, _outlook = course
+            if status == "cancelled":
+                continue
+            future = day >= cfg.end - timedelta(days=7)
+            for _ in range(min(capacity, _poisson(rng, per_course))):
+                m = rng.choice(self.members)
+                while not m.employed(day):
+                    m = rng.choice(self.members)
+                source_id += 1
+                booking = (rng.choice(["booked", "enrolled"]) if future
+                           else _weighted(rng, BOOKING_OUTCOMES)[0])
+                prereading = ("completed" if booking in ("completed", "attended", "finalised")
+                              else rng.choice(["in_progress", "not_started"]))
+                booked_at = datetime.combine(day - timedelta(days=rng.randint(7, 90)),
+                                             time(9), AEST)
+                yield (source_id, ids.courses[course_sid], ids.staff.get(m.payroll_id),
+                       m.given_name, m.surname, m.payroll_id, m.email, m.stream,
+                       self.managers[m.org_unit(day)].split()[-1] + " team",
+                       "RBWH", booking, prereading, booked_at)
+
+    def cert_snapshots(self, ids: SyntheticIds) -> Iterator[tuple[date, str, list[tuple]]]:
+        """Yield (snapshot_date, certification_type, CERT_COLUMNS rows) for every
+        weekly ALS and BLS snapshot (Mondays), oldest first.
+
+        ALS snapshots include the not_assigned rows that derive_not_assigned
+        adds for staff outside ALS scope.
+        """
+        cfg = self.cfg
+        rng = cfg.rng("certifications")
+        # [expiry date or None (never certified), course in progress]
+        state = {}
+        for m in self.members:
+            for cert_type in ("ALS", "BLS") if m.als else ("BLS",):
+                expiry = None
+                if m.hired < cfg.start and rng.random() > 0.03:
+                    validity = CERT_VALIDITY_DAYS[cert_type]
+                    expiry = cfg.start + timedelta(days=rng.randint(-OVERDUE_DAYS - 60, validity))
+                state[m.payroll_id, cert_type] = [expiry, False]
+
+        day = cfg.start + timedelta(days=-cfg.start.weekday() % 7)
+        while day <= cfg.end:
+            employed = [m for m in self.members if m.employed(day)]
+            for cert_type in ("ALS", "BLS"):
+                validity = timedelta(days=CERT_VALIDITY_DAYS[cert_type])
+                rows = []
+                for m in employed:
+                    unit = m.org_unit(day)
+                    if cert_type == "ALS" and not m.als:
+                        status = "not_assigned"
+                    else:
+                        status = self._step(rng, state[m.payroll_id, cert_type], day, validity)
+                    rows.append((ids.staff[m.payroll_id], cert_type, status, unit,
+                                 m.job_family, self.managers[unit]))
+                yield day, cert_type, rows
+            day += timedelta(weeks=1)
+
+    @staticmethod
+    def _step(rng: random.Random, st: list, day: date, validity: timedelta) -> str:
+        """Advance one person's certification by a week and return this week's status."""
+        expiry, in_progress = st
+        if in_progress:
+            st[:] = [day + validity, False]
+            return "acquired"
+        if expiry is None:
+            status, renew = "assigned", 0.15
+        elif day < expiry:
+            status, renew = "acquired", 0.12 if (expiry - day).days <= 60 else 0
+        elif (day - expiry).days < OVERDUE_DAYS:
+            status, renew = "overdue", 0.25
+        else:
+            status, renew = "expired", 0.04
+        if rng.random() < renew:
+            if rng.random() < 0.4:
+                st[1] = True
+                return "in_progress"
+            st[0] = day + validity
+            return "acquired"
+        return status
+
+
+# ============================================================================
+# Census, transfers, deaths, pager
+# ============================================================================
+
+class Patient:
+    __slots__ = ("hash", "sex", "age_band", "ward", "unit", "admitted", "discharge",
+                 "expected", "bed", "doctor")
+
+
+class ClinicalDay:
+    """One simulated day of clinical and pager rows (import_id not included).
+
+    Attributes:
+        day: The census date.
+        census: CENSUS_COLUMNS rows.
+        transfers: TRANSFER_COLUMNS rows (inter-hospital admissions).
+        deaths: DEATH_COLUMNS rows for patients who died on discharge today.
+        pager: PAGER_COLUMNS rows, ids ascending in message time.
+        events: EVENT_COLUMNS rows for the relevant pager messages.
+    """
+
+    __slots__ = ("day", "census", "transfers", "deaths", "pager", "events")
+
+    def __init__(self, day: date):
+        self.day = day
+        self.census: list[tuple] = []
+        self.transfers: list[tuple] = []
+        self.deaths: list[tuple] = []
+        self.pager: list[tuple] = []
+        self.events: list[tuple] = []
+
+
+class ClinicalSimulation:
+    """Day-by-day admissions, discharges and escalations over the period.
+
+    Args:
+        cfg: Data set configuration.
+        ids: Database ids of the synthetic wards and units.
+        hasher: Hashes the synthetic URNs and doctor codes, as the census
+            loader does.
+        first_pager_id: Id given to the first raw pager message; the rest
+            follow in time order so events can reference them.
+    """
+
+    def __init__(self, cfg: SyntheticConfig, ids: SyntheticIds, hasher: PatientHasher,
+                 first_pager_id: int = 1):
+        self.cfg = cfg
+        self.hasher = hasher
+        self.next_pager_id = first_pager_id
+        self.ward_codes = {ids.wards[code]: code for (code,) in ward_records(cfg)}
+        self.unit_info = {ids.units[code]: (division, subdivision)
+                          for code, division, subdivision in admitting_unit_records(cfg)}
+        self.ward_units: dict[int, list[int]] = {}
+        for ward, unit in ward_unit_records(cfg):
+            self.ward_units.setdefault(ids.wards[ward], []).append(ids.units[unit])
+        self.wards = list(self.ward_units)
+        self.doctors = {unit: [hasher.hash(f"DR-{unit}-{k}") for k in range(8)]
+                        for unit in self.unit_info}
+
+    def days(self) -> Iterator[ClinicalDay]:
+        """Yield a ClinicalDay for every day from cfg.start to cfg.end."""
+        cfg = self.cfg
+        rng = cfg.rng("clinical")
+        pager_rng = cfg.rng("pager")
+        admissions = cfg.count("census_per_day") / MEAN_LOS_DAYS
+        p_transfer = min(1.0, cfg.count("transfers_per_day") / admissions)
+        p_death = cfg.count("deaths_per_year") / 365.25 / admissions
+        inpatients: list[Patient] = []
+        discharged: deque[Patient] = deque(maxlen=20000)
+        urn = 0
+
+        day = cfg.start - timedelta(days=WARM_UP_DAYS)
+        while day <= cfg.end:
+            out = ClinicalDay(day)
+            emit = day >= cfg.start
+
+            # Discharges (the census lists patients still in at midnight)
+            staying = []
+            for p in inpatients:
+                if p.discharge > day:
+                    staying.append(p)
+                elif rng.random() < p_death:
+                    if emit:
+                        out.deaths.append((day.replace(day=1), p.hash, p.age_band, p.sex,
+                                           p.unit, p.unit, p.admitted, day,
+                                           (day - p.admitted).days))
+                else:
+                    discharged.append(p)
+            inpatients = staying
+
+            # Admissions: fewer at weekends
+            arrivals = _poisson(rng, admissions * (0.75 if day.weekday() >= 5 else 1.1))
+            for _ in range(arrivals):
+                if discharged and rng.random() < READMISSION_RATE:
+                    p = discharged.pop()
+                else:
+                    urn += 1
+                    p = Patient()
+                    p.hash = self.hasher.hash(f"SYN{urn:08d}")
+                    p.sex = "F" if rng.random() < 0.51 else ("M" if rng.random() < 0.99 else "U")
+                    p.age_band = age_band(int(rng.triangular(0, 100, 72)))
+                p.ward = rng.choice(self.wards)
+                p.unit = rng.choice(self.ward_units[p.ward])
+                p.admitted = day
+                # 3% long stays; ~MEAN_LOS_DAYS overall
+                los = rng.expovariate(1 / 30) if rng.random() < 0.03 else rng.expovariate(1 / 6.7)
+                p.discharge = day + timedelta(days=1 + int(los))
+                p.expected = day + timedelta(days=1 + int(los * rng.uniform(0.6, 1.3)))
+                p.bed = f"B{rng.randint(1, 32):02d}"
+                p.doctor = rng.choice(self.doctors[p.unit])
+                inpatients.append(p)
+                if emit and rng.random() < p_transfer:
+                    division, subdivision = self.unit_info[p.unit]
+                    out.transfers.append((
+                        day, p.hash, p.age_band, p.sex, "Transfer from another hospital",
+                        rng.choice(SOURCE_HOSPITALS), p.unit, division, subdivision,
+                        p.ward, p.ward, "Emergency" if rng.random() < 0.85 else "Elective",
+                        "Admitted", day.strftime("%A"),
+                    ))
+
+            # Internal ward moves
+            for p in inpatients:
+                if rng.random() < 0.02:
+                    p.ward = rng.choice(self.wards)
+                    p.bed = f"B{rng.randint(1, 32):02d}"
+
+            if emit:
+                for p in inpatients:
+                    # On leave or missed by the census for a day
+                    if rng.random() < 0.003:
+                        continue
+                    out.census.append((day, p.hash, p.ward, p.unit, p.doctor, p.bed, p.sex,
+                                       p.age_band, p.admitted, p.expected,
+                                       (day - p.admitted).days))
+                self._pager(pager_rng, out, inpatients)
+                yield out
+            day += timedelta(days=1)
+
+    def _pager(self, rng: random.Random, out: ClinicalDay, inpatients: list[Patient]) -> None:
+        cfg = self.cfg
+        day = out.day
+        midnight = datetime.combine(day, time(0), AEST)
+        events = _poisson(rng, cfg.count("events_per_day"))
+        noise = max(0, _poisson(rng, cfg.count("pager_per_day")) - events)
+
+        messages = []
+        for _ in range(events):
+            # Busier through the day shift
+            hour = min(23, int(rng.triangular(0, 24, 13)))
+            at = midnight + timedelta(hours=hour, seconds=rng.randrange(3600))
+            event_type, label, _share = _weighted(rng, EVENT_TYPES)
+            patient = rng.choice(inpatients) if inpatients and rng.random() < 0.85 else None
+            ward = patient.ward if patient else rng.choice(self.wards)
+            unit = patient.unit if patient else None
+            reason = rng.choice(REASONS)
+            bed = patient.bed if patient else f"B{rng.randint(1, 32):02d}"
+            text = f"{label} {self.ward_codes[ward]} {bed} {reason} PH {rng.randint(1000, 9999)}"
+            messages.append((at, text, True, (event_type, ward, unit, patient, reason)))
+        for _ in range(noise):
+            at = midnight + timedelta(seconds=rng.randrange(86400))
+            text = rng.choice(NOISE_TEXTS).format(ext=rng.randint(1000, 9999))
+            messages.append((at, text, False, None))
+        messages.sort(key=lambda msg: msg[0])
+
+        for at, text, relevant, event in messages:
+            msg_id = self.next_pager_id
+            self.next_pager_id += 1
+            address = (rng.choice(RELEVANT_ADDRESSES) if relevant
+                       else rng.randint(1000000, 1999999))
+            out.pager.append((msg_id, msg_id, at, str(address), text, "UNK", None,
+                              relevant, "processed"))
+            if event is None:
+                continue
+            event_type, ward, unit, patient, reason = event
+            known = "known" if patient else "unknown"
+            out.events.append((
+                msg_id, at, day, event_type, "known" if rng.random() < 0.95 else "inferred",
+                ward, "known", self.ward_codes[ward], unit,
+                "inferred" if patient else "unknown", patient.hash if patient else None, known,
+                reason, "known", day.strftime("%A"), time_of_day(at.hour),
+                "regex" if rng.random() < 0.95 else "llm",
+            ))